@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+
+from app.database import SessionLocal
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
+from app.services.appeal_import import AppealImporter
+
+
+def import_appeals(args: argparse.Namespace) -> int:
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    db = SessionLocal()
+    try:
+        importer = AppealImporter(db, args.chunk_size)
+        for event in importer.run(stream):
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+    finally:
+        db.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    return 1 if importer.failed else 0
+
+
+def check_counters(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        repo = DistributionCounterRepository(db)
+        drift = repo.reconcile(repair=args.repair)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(json.dumps(entry, default=str), flush=True)
+    print(
+        json.dumps({"drifted": len(drift), "repaired": args.repair}),
+        flush=True
+    )
+    return 1 if drift and not args.repair else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-appeals",
+        help="Import newline-delimited AppealCreate records"
+    )
+    import_parser.add_argument("path", help="NDJSON file or '-' for stdin")
+    import_parser.add_argument("--chunk-size", type=int, default=500)
+    import_parser.set_defaults(handler=import_appeals)
+
+    counters_parser = commands.add_parser(
+        "check-counters",
+        help="Reconcile distribution_counters against appeals"
+    )
+    counters_parser.add_argument(
+        "--repair", action="store_true",
+        help="Rewrite drifted counters from appeals"
+    )
+    counters_parser.set_defaults(handler=check_counters)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,26 @@
+from typing import Optional
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    LOAD_LEDGER_TTL_SECONDS: float = 60.0
+    CONFIG_VERSION_POLL_SECONDS: float = 1.0
+    CONFIG_CACHE_SIZE: int = 10000
+    APPEAL_BATCH_MAX_SIZE: int = 1000
+    REASSIGN_CHUNK_SIZE: int = 500
+    SLOW_QUERY_MS: Optional[float] = 200.0
+    FAST_JSON_RESPONSES: bool = False
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -10,5 +28,10 @@ class Settings(BaseSettings):
         extra="ignore"
     )
 
+    @field_validator("DB_STATEMENT_TIMEOUT_MS", "SLOW_QUERY_MS", mode="before")
+    @classmethod
+    def _empty_as_none(cls, value):
+        return None if value == "" else value
+
 
 settings = Settings()
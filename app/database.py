@@ -1,8 +1,261 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from typing import Callable, Optional, TypeVar, Union
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
+T = TypeVar("T")
+
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """``url`` with its driver replaced by the asyncio driver of the
+    same backend, e.g. ``postgresql+psycopg2`` -> ``postgresql+asyncpg``."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for {backend!r}")
+    return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+
+
+class PoolStats:
+    """Checkout counts and wait times of one connection pool.
+
+    The wait covers everything ``Pool.connect`` does: waiting for a free
+    connection, opening an overflow connection and the pre-ping.
+    """
+
+    # Upper bounds of the wait histogram, in milliseconds.
+    BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    self._buckets[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(self.BUCKETS_MS, self._buckets):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            histogram["+Inf"] = self.checkouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_ms_total, 3),
+                "wait_ms_avg": round(
+                    self.wait_ms_total / self.checkouts, 3
+                ) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "wait_ms_histogram": histogram,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_ms_total = 0.0
+            self.wait_ms_max = 0.0
+            self._buckets = [0] * len(self.BUCKETS_MS)
+
+
+class _TimedPoolMixin:
+    stats: PoolStats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the counters.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+def engine_options(url: Union[str, URL], is_async: bool = False) -> dict:
+    """``create_engine`` pool options from the ``DB_POOL_*`` settings.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, where
+    pool sizing does not apply.
+    """
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (
+        None, "", ":memory:"
+    ):
+        return options
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def apply_statement_timeout(engine: Engine) -> None:
+    """Set ``DB_STATEMENT_TIMEOUT_MS`` on every new PostgreSQL
+    connection of ``engine``."""
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if not timeout or engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(timeout)}")
+        cursor.close()
+
+
+def pool_status(pool: Pool) -> dict:
+    """Current occupancy and checkout statistics of ``pool``."""
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+
+engine = create_engine(
+    settings.DATABASE_URL, echo=False,
+    **engine_options(settings.DATABASE_URL)
+)
+apply_statement_timeout(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    # Imported only here: the asyncio extension needs greenlet and the
+    # async drivers are optional dependencies.
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = (
+        settings.ASYNC_DATABASE_URL
+        or async_database_url(settings.DATABASE_URL)
+    )
+    async_engine = create_async_engine(
+        _async_url, echo=False, **engine_options(_async_url, is_async=True)
+    )
+    apply_statement_timeout(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+_ON_COMMIT_KEY = "on_commit_callbacks"
+
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(db: Session) -> Optional[Callable]:
+    """Return the dialect ``insert`` supporting ``ON CONFLICT`` for the
+    database ``db`` is bound to, or ``None`` if there is none."""
+    return _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the current transaction of ``db`` commits.
+
+    Callbacks are dropped if the transaction is rolled back, so
+    process-local state never sees uncommitted changes.
+    """
+    db.info.setdefault(_ON_COMMIT_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit_callbacks(db: Session) -> None:
+    callbacks = db.info.pop(_ON_COMMIT_KEY, [])
+    for callback in callbacks:
+        callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_on_commit_callbacks(db: Session, transaction) -> None:
+    if transaction.parent is None:
+        db.info.pop(_ON_COMMIT_KEY, None)
+
+
+async def run_db(db, fn: Callable[..., T], *args) -> T:
+    """Run ``fn(session, *args)`` without blocking the event loop.
+
+    Repositories and services are written once against ``Session``. On
+    an ``AsyncSession`` they run through ``run_sync``: the code executes
+    on the event loop and every statement awaits the asyncio driver, so
+    no thread is held while the database works. A plain ``Session`` is
+    handed to the threadpool, as Starlette does for sync handlers.
+
+    ``fn`` should return plain data or response schemas, not ORM
+    objects that may lazy-load after it returns.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+
+
+def sync_session(db) -> Session:
+    """The ``Session`` behind ``db``, for objects that keep a session
+    and are only used inside ``run_db``."""
+    return db if isinstance(db, Session) else db.sync_session
@@ -1,11 +1,70 @@
-from typing import Generator
+from typing import TYPE_CHECKING, AsyncGenerator, Optional, Union
+
+from fastapi import Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, run_db
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
+from app.state.config_version import get_config_version
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
+async def get_db() -> AsyncGenerator[Union[Session, "AsyncSession"], None]:
+    """Session for one request: an ``AsyncSession`` when
+    ``DATABASE_ASYNC`` is set, a ``Session`` otherwise. Route handlers
+    run their queries through ``app.database.run_db`` either way."""
+    if settings.DATABASE_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
 
-def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison
+    return "*" in candidates or etag in (
+        tag[2:] if tag.startswith("W/") else tag for tag in candidates
+    )
+
+
+def _conditional(request: Request, response: Response, etag: str) -> None:
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+async def config_etag(
+    request: Request, response: Response, db=Depends(get_db)
+) -> None:
+    """ETag of responses built from sources, operators and weights only.
+
+    Derived from the config version with one single-row read; a matching
+    ``If-None-Match`` answers 304 before the handler runs.
+    """
+    version = await run_db(db, get_config_version)
+    _conditional(request, response, f'"c{version}"')
+
+
+async def data_etag(
+    request: Request, response: Response, db=Depends(get_db)
+) -> None:
+    """ETag of responses that also include distribution counters
+    (operator loads, distribution stats)."""
+    config, counters = await run_db(
+        db, lambda db: DistributionCounterRepository(db).get_versions()
+    )
+    _conditional(request, response, f'"c{config}-d{counters}"')
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 
-from app.routes import operators, sources, appeals, stats
+from app.middleware import QueryStatsMiddleware
+from app.routes import operators, sources, appeals, stats, metrics, export
 
 app = FastAPI(
     title="Mini CRM - Lead Distribution System",
@@ -8,10 +9,14 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.add_middleware(QueryStatsMiddleware)
+
 app.include_router(operators.router)
 app.include_router(sources.router)
 app.include_router(appeals.router)
 app.include_router(stats.router)
+app.include_router(metrics.router)
+app.include_router(export.router)
 
 
 @app.get("/")
@@ -0,0 +1,127 @@
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.state import metrics
+from app.state.query_stats import (
+    RequestQueryStats,
+    current_request_stats,
+    route_query_stats,
+)
+
+logger = logging.getLogger("app.sql")
+
+_START_KEY = "_query_started_at"
+
+# parameter sets of an executemany shown in the slow query log
+LOGGED_PARAMETER_SETS = 3
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    if context is not None:
+        setattr(context, _START_KEY, time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    started_at = getattr(context, _START_KEY, None)
+    if started_at is None:
+        return
+    seconds = time.perf_counter() - started_at
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    threshold = settings.SLOW_QUERY_MS
+    if threshold is not None and seconds * 1000 >= threshold:
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s; parameters: %s",
+            seconds * 1000,
+            stats.route if stats is not None else "-",
+            statement,
+            _loggable_parameters(parameters, executemany)
+        )
+
+
+def _loggable_parameters(parameters, executemany: bool) -> str:
+    if not executemany or len(parameters) <= LOGGED_PARAMETER_SETS:
+        return repr(parameters)
+    shown = ", ".join(
+        repr(p) for p in parameters[:LOGGED_PARAMETER_SETS]
+    )
+    return f"[{shown}, ...] ({len(parameters)} sets)"
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL statements and database time of every request.
+
+    The totals go out in a ``Server-Timing`` header (``db`` and
+    ``db-slowest``) and into ``route_query_stats`` per route. Statements
+    slower than ``SLOW_QUERY_MS`` are logged to ``app.sql`` with their
+    parameters and route.
+
+    Request counts and latency, statement counts and database time also
+    go to the Prometheus metrics in ``app.state.metrics``.
+
+    The header is sent with the response start, so for a streaming
+    response it covers only the statements issued before the first
+    chunk; the per-route totals cover the whole response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = current_request_stats.set(stats)
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            elapsed = time.perf_counter() - started_at
+            route_query_stats.record(stats, elapsed)
+            record_request_metrics(stats, status, elapsed)
+
+
+def record_request_metrics(
+    stats: RequestQueryStats, status: int, seconds: float
+) -> None:
+    method, route = stats.route.split(" ", 1)
+    metrics.http_requests.inc(method, route, status)
+    metrics.http_request_seconds.observe(seconds, method, route)
+    metrics.db_statements.inc(method, route, amount=stats.statements)
+    metrics.db_seconds.inc(method, route, amount=stats.db_seconds)
+
+
+def server_timing(stats: RequestQueryStats) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};'
+        f'desc="{stats.statements} statements", '
+        f'db-slowest;dur={stats.slowest_seconds * 1000:.2f}'
+    )
@@ -4,5 +4,22 @@ from app.models.source import Source
 from app.models.operator_weight import OperatorWeight
 from app.models.lead import Lead
 from app.models.appeal import Appeal
+from app.models.config_version import ConfigVersion
+from app.models.distribution_counter import (
+    DailyDistributionCounter,
+    DistributionCounter,
+    HourlyDistributionCounter,
+)
 
-__all__ = ["Base", "Operator", "Source", "OperatorWeight", "Lead", "Appeal"]
+__all__ = [
+    "Base",
+    "Operator",
+    "Source",
+    "OperatorWeight",
+    "Lead",
+    "Appeal",
+    "ConfigVersion",
+    "DistributionCounter",
+    "HourlyDistributionCounter",
+    "DailyDistributionCounter",
+]
@@ -1,11 +1,37 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import (
+    Column, Integer, String, ForeignKey, DateTime, Index, literal, text
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.models.base import Base
 
+# Compare with this instead of a bound "active" parameter: the value is
+# rendered into the SQL, so the planner can use the partial index on
+# active appeals.
+ACTIVE_STATUS = literal("active", literal_execute=True)
+
 
 class Appeal(Base):
     __tablename__ = "appeals"
+    __table_args__ = (
+        Index(
+            "ix_appeals_created_at_source_operator",
+            "created_at", "source_id", "operator_id"
+        ),
+        Index(
+            "ix_appeals_operator_id_active", "operator_id",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'")
+        ),
+        Index("ix_appeals_lead_id_id", "lead_id", "id"),
+        # Stats and counter reconciliation group by the first three
+        # columns; the waiting queue reads (source_id, NULL, 'active')
+        # in id order.
+        Index(
+            "ix_appeals_source_operator_status_id",
+            "source_id", "operator_id", "status", "id"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
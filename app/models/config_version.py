@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer
+from app.models.base import Base
+
+
+class ConfigVersion(Base):
+    __tablename__ = "config_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from app.models.base import Base
+
+# operator_id of appeals created without an operator
+UNASSIGNED_OPERATOR_ID = 0
+
+
+class DistributionCounter(Base):
+    __tablename__ = "distribution_counters"
+
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    operator_id = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    # Bumped on every change of the row; the sum over the table is the
+    # version of everything derived from the counters (ETags)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+
+class HourlyDistributionCounter(Base):
+    __tablename__ = "distribution_hourly_counters"
+
+    # Start of the UTC hour the appeals were created in
+    bucket_start = Column(DateTime, primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    operator_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyDistributionCounter(Base):
+    __tablename__ = "distribution_daily_counters"
+
+    # Start of the UTC day the appeals were created in
+    bucket_start = Column(DateTime, primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), primary_key=True)
+    operator_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -10,6 +10,8 @@ class Operator(Base):
     name = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     max_load = Column(Integer, default=10)
+    # Active appeals reserved through OperatorRepository.reserve
+    active_load = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     weights = relationship(
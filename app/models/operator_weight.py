@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
 
 class OperatorWeight(Base):
     __tablename__ = "operator_weights"
+    __table_args__ = (
+        Index(
+            "ix_operator_weights_source_id_operator_id",
+            "source_id", "operator_id",
+            unique=True
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     operator_id = Column(Integer, ForeignKey("operators.id"), nullable=False)
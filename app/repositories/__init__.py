@@ -2,10 +2,14 @@ from app.repositories.operator import OperatorRepository
 from app.repositories.source import SourceRepository
 from app.repositories.lead import LeadRepository
 from app.repositories.appeal import AppealRepository
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
 
 __all__ = [
     "OperatorRepository",
     "SourceRepository",
     "LeadRepository",
     "AppealRepository",
+    "DistributionCounterRepository",
 ]
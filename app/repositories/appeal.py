@@ -1,81 +1,386 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import Row, func, insert, select, union_all, update
 from sqlalchemy.orm import Session
-from typing import Optional
-from app.models import Appeal, Source, Operator
+from typing import Iterator, List, Optional, Sequence
+from app.models import Appeal, Lead, Source, Operator, OperatorWeight
+from app.models.appeal import ACTIVE_STATUS
+from app.repositories.operator import OperatorRepository
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+    build_distribution_stats,
+    counter_key,
+    hourly_counter_key,
+)
+from app.state.load_ledger import load_ledger
+from app.state.metrics import track_appeals_created
+
+
+def appeal_filters(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source_id: Optional[int] = None,
+    status: Optional[str] = None
+) -> list:
+    """Conditions for appeals created in ``[start, end)`` with the given
+    source and status; ``None`` leaves a filter out."""
+    conditions = []
+    if start is not None:
+        conditions.append(Appeal.created_at >= start)
+    if end is not None:
+        conditions.append(Appeal.created_at < end)
+    if source_id is not None:
+        conditions.append(Appeal.source_id == source_id)
+    if status is not None:
+        conditions.append(Appeal.status == status)
+    return conditions
 
 
 class AppealRepository:
 
     def __init__(self, db: Session):
         self.db = db
+        self.counters = DistributionCounterRepository(db)
 
     def create(
         self,
         lead_id: int,
         source_id: int,
         operator_id: Optional[int],
-        message: Optional[str] = None
+        message: Optional[str] = None,
+        commit: bool = True
     ) -> Appeal:
+        created_at = datetime.utcnow()
         appeal = Appeal(
             lead_id=lead_id,
             source_id=source_id,
             operator_id=operator_id,
             message=message,
-            status="active"
+            status="active",
+            created_at=created_at
         )
         self.db.add(appeal)
+        self.counters.add({counter_key(source_id, operator_id, "active"): 1})
+        self.counters.add_hourly(
+            {hourly_counter_key(created_at, source_id, operator_id): 1}
+        )
+        if operator_id:
+            load_ledger.track(self.db, operator_id, 1)
+        track_appeals_created(self.db, {(source_id, bool(operator_id)): 1})
+        if not commit:
+            self.db.flush()
+            return appeal
+
         self.db.commit()
         self.db.refresh(appeal)
         return appeal
 
+    def create_many(self, appeals: List[dict]) -> List[Row]:
+        """Insert appeals with one multi-row INSERT, without committing.
+
+        Each dict holds ``lead_id``, ``source_id``, ``operator_id`` and
+        ``message``. Returns rows with ``id``, ``lead_id``,
+        ``operator_id``, ``status`` and ``created_at`` in input order.
+        """
+        if not appeals:
+            return []
+
+        table = Appeal.__table__
+        created_at = datetime.utcnow()
+        rows = [
+            dict(appeal, status="active", created_at=created_at)
+            for appeal in appeals
+        ]
+        created = self.db.execute(
+            insert(table).returning(
+                table.c.id,
+                table.c.lead_id,
+                table.c.operator_id,
+                table.c.status,
+                table.c.created_at,
+                sort_by_parameter_order=True
+            ),
+            rows
+        ).all()
+
+        self.counters.add(
+            Counter(
+                counter_key(row["source_id"], row["operator_id"], "active")
+                for row in rows
+            )
+        )
+        self.counters.add_hourly(
+            Counter(
+                hourly_counter_key(
+                    created_at, row["source_id"], row["operator_id"]
+                )
+                for row in rows
+            )
+        )
+        loads = Counter(
+            row["operator_id"] for row in rows if row["operator_id"]
+        )
+        for operator_id, count in loads.items():
+            load_ledger.track(self.db, operator_id, count)
+        track_appeals_created(
+            self.db,
+            Counter(
+                (row["source_id"], bool(row["operator_id"])) for row in rows
+            )
+        )
+
+        return created
+
     def get_by_id(self, appeal_id: int) -> Optional[Appeal]:
         return self.db.query(Appeal).filter(Appeal.id == appeal_id).first()
 
     def close(self, appeal_id: int) -> bool:
-        appeal = self.get_by_id(appeal_id)
-        if not appeal:
-            return False
+        """Close an active appeal and give its slot to the oldest waiting
+        appeal. Returns False when the appeal does not exist.
 
-        appeal.status = "closed"
+        The status changes in a conditional UPDATE, so of concurrent
+        closes only one releases the slot and moves the counters. The
+        operator comes from RETURNING: if a reassignment holds the row,
+        the UPDATE waits for it and frees the new operator's slot.
+        """
+        closed = self.db.execute(
+            update(Appeal).where(
+                Appeal.id == appeal_id,
+                Appeal.status == ACTIVE_STATUS
+            ).values(status="closed").returning(
+                Appeal.source_id, Appeal.operator_id
+            )
+        ).first()
+        if closed is None:
+            exists = self.db.query(Appeal.id).filter(
+                Appeal.id == appeal_id
+            ).first() is not None
+            self.db.commit()
+            return exists
+
+        source_id, operator_id = closed
+        self.counters.add(
+            {
+                counter_key(source_id, operator_id, "active"): -1,
+                counter_key(source_id, operator_id, "closed"): 1,
+            }
+        )
+        if operator_id:
+            load_ledger.track(self.db, operator_id, -1)
+            OperatorRepository(self.db).release(operator_id)
+            self.assign_waiting(operator_id, 1)
         self.db.commit()
         return True
 
-    def get_distribution_stats(self) -> list:
-        sources = self.db.query(Source).all()
-        result = []
-
-        for source in sources:
-            appeals = self.db.query(Appeal).filter(
-                Appeal.source_id == source.id
-            ).all()
-
-            operator_counts = {}
-            for appeal in appeals:
-                if appeal.operator_id:
-                    operator_counts[appeal.operator_id] = operator_counts.get(
-                        appeal.operator_id, 0
-                    ) + 1
-
-            operators_stats = []
-            for operator_id, count in operator_counts.items():
-                operator = self.db.query(Operator).filter(
-                    Operator.id == operator_id
-                ).first()
-                if operator:
-                    operators_stats.append(
-                        {
-                            "operator_id": operator_id,
-                            "operator_name": operator.name,
-                            "appeals_count": count
-                        }
-                    )
-
-            result.append(
-                {
-                    "source_id": source.id,
-                    "source_name": source.name,
-                    "total_appeals": len(appeals),
-                    "operators": operators_stats
-                }
+    def get_waiting(self, operator_id: int, limit: int) -> List[Appeal]:
+        """Oldest unassigned active appeals from the sources the operator
+        has a positive weight for, at most ``limit``.
+
+        Every source's queue is read from the head of
+        ``ix_appeals_source_operator_status_id``, at most ``limit`` rows
+        each, so the cost does not grow with the length of the queues.
+        On PostgreSQL the rows are locked and rows already locked by
+        another worker are skipped.
+        """
+        source_ids = self.db.scalars(
+            select(OperatorWeight.source_id).where(
+                OperatorWeight.operator_id == operator_id,
+                OperatorWeight.weight > 0
             )
+        ).all()
+        if not source_ids:
+            return []
+
+        # Each head is wrapped in a subquery: SQLite does not allow
+        # LIMIT on the members of a UNION.
+        heads = union_all(
+            *(
+                select(head.c.id) for head in (
+                    select(Appeal.id).where(
+                        Appeal.source_id == source_id,
+                        Appeal.operator_id.is_(None),
+                        Appeal.status == ACTIVE_STATUS
+                    ).order_by(Appeal.id).limit(limit).subquery()
+                    for source_id in source_ids
+                )
+            )
+        ).subquery()
+        return self.db.query(Appeal).filter(
+            Appeal.id.in_(select(heads.c.id)),
+            Appeal.operator_id.is_(None)
+        ).order_by(
+            Appeal.id
+        ).limit(limit).with_for_update(skip_locked=True).all()
+
+    def assign_waiting(self, operator_id: int, slots: int) -> List[int]:
+        """Give up to ``slots`` waiting appeals to the operator, oldest
+        first, without committing.
+
+        Slots are reserved on the operator row like for new appeals, so
+        ``max_load`` holds even if other workers assign concurrently.
+        Returns the ids of the assigned appeals.
+        """
+        if slots <= 0:
+            return []
+        appeals = self.get_waiting(operator_id, slots)
+        if not appeals:
+            return []
+
+        operators = OperatorRepository(self.db)
+        if operators.reserve(operator_id, len(appeals)):
+            reserved = len(appeals)
+        else:
+            reserved = 0
+            while reserved < len(appeals) and operators.reserve(operator_id):
+                reserved += 1
+        appeals = appeals[:reserved]
+        if not appeals:
+            return []
+
+        counters = Counter()
+        hourly = Counter()
+        for appeal in appeals:
+            appeal.operator_id = operator_id
+            counters[counter_key(appeal.source_id, None, "active")] -= 1
+            counters[counter_key(appeal.source_id, operator_id, "active")] += 1
+            hourly[
+                hourly_counter_key(appeal.created_at, appeal.source_id, None)
+            ] -= 1
+            hourly[
+                hourly_counter_key(
+                    appeal.created_at, appeal.source_id, operator_id
+                )
+            ] += 1
+        self.counters.add(counters)
+        self.counters.add_hourly(hourly)
+        load_ledger.track(self.db, operator_id, len(appeals))
+        self.db.flush()
+        return [appeal.id for appeal in appeals]
+
+    def get_active_for_operator(
+        self, operator_id: int, limit: int, newest_first: bool = False
+    ) -> List[Row]:
+        """Ids, sources and creation times of up to ``limit`` active
+        appeals of the operator, locked until the transaction ends on
+        PostgreSQL."""
+        return self.db.execute(
+            select(Appeal.id, Appeal.source_id, Appeal.created_at).where(
+                Appeal.operator_id == operator_id,
+                Appeal.status == ACTIVE_STATUS
+            ).order_by(
+                Appeal.id.desc() if newest_first else Appeal.id
+            ).limit(limit).with_for_update()
+        ).all()
+
+    def reassign(
+        self,
+        appeals: List[Row],
+        from_operator_id: int,
+        operator_ids: List[Optional[int]]
+    ) -> None:
+        """Move active ``appeals`` of ``from_operator_id`` to
+        ``operator_ids`` (``None`` puts an appeal back in the waiting
+        queue), without committing.
+
+        One UPDATE per target operator. Slots on the targets must already
+        be reserved; the slots on ``from_operator_id`` are released.
+        """
+        if not appeals:
+            return
+
+        groups = defaultdict(list)
+        counters = Counter()
+        hourly = Counter()
+        for appeal, operator_id in zip(appeals, operator_ids):
+            groups[operator_id].append(appeal.id)
+            counters[
+                counter_key(appeal.source_id, from_operator_id, "active")
+            ] -= 1
+            counters[counter_key(appeal.source_id, operator_id, "active")] += 1
+            hourly[
+                hourly_counter_key(
+                    appeal.created_at, appeal.source_id, from_operator_id
+                )
+            ] -= 1
+            hourly[
+                hourly_counter_key(
+                    appeal.created_at, appeal.source_id, operator_id
+                )
+            ] += 1
+
+        for operator_id, appeal_ids in groups.items():
+            self.db.execute(
+                update(Appeal).where(
+                    Appeal.id.in_(appeal_ids)
+                ).values(operator_id=operator_id),
+                execution_options={"synchronize_session": False}
+            )
+            if operator_id:
+                load_ledger.track(self.db, operator_id, len(appeal_ids))
+
+        self.counters.add(counters)
+        self.counters.add_hourly(hourly)
+        OperatorRepository(self.db).release(from_operator_id, len(appeals))
+        load_ledger.track(self.db, from_operator_id, -len(appeals))
+
+    def get_distribution_stats(self) -> list:
+        rows = self.db.query(
+            Source.id,
+            Source.name,
+            Appeal.operator_id,
+            Operator.name,
+            func.count(Appeal.id)
+        ).outerjoin(
+            Appeal, Appeal.source_id == Source.id
+        ).outerjoin(
+            Operator, Operator.id == Appeal.operator_id
+        ).group_by(
+            Source.id, Source.name, Appeal.operator_id, Operator.name
+        ).order_by(
+            Source.id, func.min(Appeal.id)
+        ).all()
+
+        return build_distribution_stats(rows)
+
+    def iter_export(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        source_id: Optional[int] = None,
+        status: Optional[str] = None,
+        chunk_size: int = 5000
+    ) -> Iterator[Sequence[Row]]:
+        """Appeals ordered by id with their lead, source and operator
+        names, in chunks of ``chunk_size`` rows.
+
+        Rows come from a server-side cursor (``yield_per``), so memory
+        depends on the chunk size only and the first chunk is available
+        as soon as the database returns its rows.
+        """
+        query = select(
+            Appeal.id.label("appeal_id"),
+            Appeal.created_at,
+            Appeal.status,
+            Appeal.source_id,
+            Source.name.label("source"),
+            Appeal.operator_id,
+            Operator.name.label("operator"),
+            Appeal.lead_id,
+            Lead.external_id.label("lead_external_id"),
+            Lead.name.label("lead_name"),
+            Lead.phone.label("lead_phone"),
+            Lead.email.label("lead_email"),
+            Appeal.message
+        ).join(
+            Lead, Lead.id == Appeal.lead_id
+        ).join(
+            Source, Source.id == Appeal.source_id
+        ).outerjoin(
+            Operator, Operator.id == Appeal.operator_id
+        ).where(
+            *appeal_filters(start, end, source_id, status)
+        ).order_by(Appeal.id)
 
-        return result
+        yield from self.db.execute(
+            query, execution_options={"yield_per": chunk_size}
+        ).partitions()
@@ -0,0 +1,551 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import (
+    DateTime, Table, delete, func, select, text, type_coerce, update
+)
+from sqlalchemy import insert as sa_insert
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.database import upsert_insert
+from app.models import (
+    Appeal,
+    ConfigVersion,
+    DailyDistributionCounter,
+    DistributionCounter,
+    HourlyDistributionCounter,
+    Operator,
+    Source,
+)
+from app.models.appeal import ACTIVE_STATUS
+from app.models.distribution_counter import UNASSIGNED_OPERATOR_ID
+from app.state.config_version import CONFIG_VERSION_ID, bump_config_version
+
+# (source_id, operator_id, status)
+CounterKey = Tuple[int, int, str]
+# (bucket_start, source_id, operator_id)
+HourlyCounterKey = Tuple[datetime, int, int]
+
+BUCKETS = ("hour", "day", "week")
+
+# Rollups of appeal counts by creation time, coarsest first
+ROLLUPS = (
+    ("day", DailyDistributionCounter),
+    ("hour", HourlyDistributionCounter),
+)
+
+# strftime arguments truncating a column to the start of a bucket;
+# 'weekday 1' moves forward to Monday, so step back six days first
+_SQLITE_TRUNCATE = {
+    "hour": lambda column: ("%Y-%m-%d %H:00:00.000000", column),
+    "day": lambda column: ("%Y-%m-%d 00:00:00.000000", column),
+    "week": lambda column: (
+        "%Y-%m-%d 00:00:00.000000", column, "-6 days", "weekday 1"
+    ),
+}
+
+
+def counter_key(
+    source_id: int, operator_id: Optional[int], status: str
+) -> CounterKey:
+    return source_id, operator_id or UNASSIGNED_OPERATOR_ID, status
+
+
+def hourly_counter_key(
+    created_at: datetime, source_id: int, operator_id: Optional[int]
+) -> HourlyCounterKey:
+    return (
+        truncate(created_at, "hour"),
+        source_id,
+        operator_id or UNASSIGNED_OPERATOR_ID
+    )
+
+
+def truncate(moment: datetime, bucket: str) -> datetime:
+    """Start of the hour, day or ISO week (Monday) containing ``moment``."""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if bucket == "hour":
+        return moment
+    moment = moment.replace(hour=0)
+    if bucket == "day":
+        return moment
+    return moment - timedelta(days=moment.weekday())
+
+
+def _ceil(moment: datetime, unit: str) -> datetime:
+    """Start of the first whole hour or day at or after ``moment``."""
+    start = truncate(moment, unit)
+    if start < moment:
+        start += timedelta(hours=1) if unit == "hour" else timedelta(days=1)
+    return start
+
+
+def build_distribution_stats(
+    rows: Iterable[Tuple[int, str, Optional[int], Optional[str], int]]
+) -> list:
+    """Assemble ``/stats/distribution`` from rows of
+    (source_id, source_name, operator_id, operator_name, count)."""
+    stats = {}
+    for source_id, source_name, operator_id, operator_name, count in rows:
+        source_stats = stats.setdefault(
+            source_id,
+            {
+                "source_id": source_id,
+                "source_name": source_name,
+                "total_appeals": 0,
+                "operators": []
+            }
+        )
+        if not count:
+            continue
+        source_stats["total_appeals"] += count
+        if operator_id and operator_name is not None:
+            source_stats["operators"].append(
+                {
+                    "operator_id": operator_id,
+                    "operator_name": operator_name,
+                    "appeals_count": count
+                }
+            )
+
+    return list(stats.values())
+
+
+class DistributionCounterRepository:
+    """Appeal counts per (source, operator, status), kept up to date in
+    the same transaction as the appeals themselves."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add(self, deltas: Dict[CounterKey, int]) -> None:
+        """Apply ``deltas`` without committing."""
+        self._upsert(
+            DistributionCounter.__table__,
+            ("source_id", "operator_id", "status"),
+            deltas
+        )
+
+    def add_hourly(self, deltas: Dict[HourlyCounterKey, int]) -> None:
+        """Apply ``deltas`` to the hourly counters and, summed by day, to
+        the daily counters, without committing."""
+        daily = Counter()
+        for (hour, source_id, operator_id), delta in deltas.items():
+            daily[truncate(hour, "day"), source_id, operator_id] += delta
+        for model, rollup in (
+            (HourlyDistributionCounter, deltas),
+            (DailyDistributionCounter, daily),
+        ):
+            self._upsert(
+                model.__table__,
+                ("bucket_start", "source_id", "operator_id"),
+                rollup
+            )
+
+    def _upsert(
+        self, table: Table, key_columns: Tuple[str, ...], deltas: dict
+    ) -> None:
+        rows = [
+            dict(zip(key_columns, key), count=delta)
+            for key, delta in deltas.items()
+            if delta
+        ]
+        if not rows:
+            return
+
+        insert = upsert_insert(self.db)
+        if insert is not None:
+            stmt = insert(table)
+            self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c[name] for name in key_columns],
+                    set_=self._increments(table, stmt.excluded["count"])
+                ),
+                rows
+            )
+            return
+
+        for row in rows:
+            updated = self.db.execute(
+                update(table).where(
+                    *(table.c[name] == row[name] for name in key_columns)
+                ).values(**self._increments(table, row["count"]))
+            )
+            if not updated.rowcount:
+                self.db.execute(sa_insert(table), [row])
+
+    @staticmethod
+    def _increments(table: Table, delta) -> dict:
+        values = {"count": table.c.count + delta}
+        if "version" in table.c:
+            values["version"] = table.c.version + 1
+        return values
+
+    def get_versions(self) -> Tuple[int, int]:
+        """The config version and the sum of counter row versions, in one
+        query. Together they change whenever anything read from the
+        counters, sources, operators or weights does."""
+        config_version = select(ConfigVersion.version).where(
+            ConfigVersion.id == CONFIG_VERSION_ID
+        ).scalar_subquery()
+        counters_version = select(
+            func.coalesce(func.sum(DistributionCounter.version), 0)
+        ).scalar_subquery()
+        config, counters = self.db.execute(
+            select(config_version, counters_version)
+        ).one()
+        return config or 0, counters
+
+    def get_distribution_stats(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> list:
+        """All-time stats, or stats for appeals created in
+        ``[start, end)`` when either bound is given."""
+        if start is not None or end is not None:
+            totals = Counter()
+            for (_, source_id, operator_id), count in \
+                    self._range_counts(start, end, None).items():
+                totals[source_id, operator_id] += count
+            return build_distribution_stats(
+                self._named_rows(totals, all_sources=True)
+            )
+
+        rows = self.db.query(
+            Source.id,
+            Source.name,
+            DistributionCounter.operator_id,
+            Operator.name,
+            func.coalesce(func.sum(DistributionCounter.count), 0)
+        ).outerjoin(
+            DistributionCounter, DistributionCounter.source_id == Source.id
+        ).outerjoin(
+            Operator, Operator.id == DistributionCounter.operator_id
+        ).group_by(
+            Source.id, Source.name, DistributionCounter.operator_id,
+            Operator.name
+        ).order_by(
+            Source.id, DistributionCounter.operator_id
+        ).all()
+
+        return build_distribution_stats(rows)
+
+    def get_bucketed_stats(
+        self,
+        bucket: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[dict]:
+        """Stats per hour, day or week for appeals created in
+        ``[start, end)``. Buckets without appeals are omitted."""
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+
+        buckets: Dict[datetime, Counter] = {}
+        for (bucket_start, source_id, operator_id), count in \
+                self._range_counts(start, end, bucket).items():
+            buckets.setdefault(bucket_start, Counter())[
+                source_id, operator_id
+            ] += count
+
+        names = self._names(
+            {source_id for totals in buckets.values()
+             for source_id, _ in totals},
+            {operator_id for totals in buckets.values()
+             for _, operator_id in totals}
+        )
+        return [
+            {
+                "bucket_start": bucket_start,
+                "sources": build_distribution_stats(
+                    self._named_rows(buckets[bucket_start], names=names)
+                )
+            }
+            for bucket_start in sorted(buckets)
+        ]
+
+    def _range_counts(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        bucket: Optional[str]
+    ) -> Counter:
+        """Appeals created in ``[start, end)`` per (bucket start, source,
+        operator); the bucket start is ``None`` without a ``bucket``.
+
+        Whole days are summed from the daily counters, the whole hours
+        left at the edges of the range from the hourly counters, and the
+        partial hours at the very edges are counted in ``appeals``
+        through the ``created_at`` index. Hour buckets skip the daily
+        counters.
+        """
+        counts = Counter()
+        rollups = ROLLUPS[1:] if bucket == "hour" else ROLLUPS
+        self._add_range_counts(counts, start, end, bucket, rollups)
+        return counts
+
+    def _add_range_counts(
+        self,
+        counts: Counter,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        bucket: Optional[str],
+        rollups
+    ) -> None:
+        if not rollups:
+            self._count_appeals(counts, start, end, bucket)
+            return
+
+        (unit, model), finer = rollups[0], rollups[1:]
+        first = None if start is None else _ceil(start, unit)
+        last = None if end is None else truncate(end, unit)
+        if first is not None and last is not None and first >= last:
+            self._add_range_counts(counts, start, end, bucket, finer)
+            return
+
+        group_by = [model.source_id, model.operator_id]
+        if bucket is not None:
+            group_by.insert(
+                0, model.bucket_start if bucket == unit
+                else self._truncate_column(model.bucket_start, bucket)
+            )
+        query = self.db.query(
+            *group_by, func.sum(model.count)
+        ).group_by(*group_by)
+        if first is not None:
+            query = query.filter(model.bucket_start >= first)
+        if last is not None:
+            query = query.filter(model.bucket_start < last)
+        for *key, count in query:
+            if bucket is None:
+                key.insert(0, None)
+            counts[tuple(key)] += count
+
+        if start is not None and start < first:
+            self._add_range_counts(counts, start, first, bucket, finer)
+        if end is not None and last < end:
+            self._add_range_counts(counts, last, end, bucket, finer)
+
+    def _count_appeals(
+        self,
+        counts: Counter,
+        start: datetime,
+        end: datetime,
+        bucket: Optional[str]
+    ) -> None:
+        # [start, end) lies within a single hour
+        bucket_start = None if bucket is None else truncate(start, bucket)
+        rows = self.db.query(
+            Appeal.source_id, Appeal.operator_id, func.count(Appeal.id)
+        ).filter(
+            Appeal.created_at >= start,
+            Appeal.created_at < end
+        ).group_by(Appeal.source_id, Appeal.operator_id)
+        for source_id, operator_id, count in rows:
+            counts[
+                bucket_start,
+                source_id,
+                operator_id or UNASSIGNED_OPERATOR_ID
+            ] += count
+
+    def _names(
+        self, source_ids: Optional[set], operator_ids: set
+    ) -> Tuple[Dict[int, str], Dict[int, str]]:
+        sources = self.db.query(Source.id, Source.name)
+        if source_ids is not None:
+            sources = sources.filter(Source.id.in_(source_ids))
+        operator_ids = operator_ids - {UNASSIGNED_OPERATOR_ID}
+        operators = []
+        if operator_ids:
+            operators = self.db.query(Operator.id, Operator.name).filter(
+                Operator.id.in_(operator_ids)
+            ).all()
+        return dict(sources.all()), dict(operators)
+
+    def _named_rows(
+        self,
+        totals: Dict[Tuple[int, int], int],
+        all_sources: bool = False,
+        names: Optional[Tuple[Dict[int, str], Dict[int, str]]] = None
+    ) -> list:
+        if names is None:
+            names = self._names(
+                None if all_sources else {s for s, _ in totals},
+                {operator_id for _, operator_id in totals}
+            )
+        source_names, operator_names = names
+
+        rows = []
+        if all_sources:
+            rows.extend(
+                (source_id, name, None, None, 0)
+                for source_id, name in source_names.items()
+            )
+        rows.extend(
+            (
+                source_id,
+                source_names.get(source_id),
+                operator_id,
+                operator_names.get(operator_id),
+                count
+            )
+            for (source_id, operator_id), count in totals.items()
+            if source_id in source_names
+        )
+        return sorted(rows, key=lambda row: (row[0], row[2] or 0))
+
+    def get_waiting_counts(self) -> Dict[int, int]:
+        """Active appeals without an operator, per source."""
+        rows = self.db.query(
+            DistributionCounter.source_id,
+            func.sum(DistributionCounter.count)
+        ).filter(
+            DistributionCounter.status == "active",
+            DistributionCounter.operator_id == UNASSIGNED_OPERATOR_ID
+        ).group_by(DistributionCounter.source_id).all()
+        return {source_id: count for source_id, count in rows}
+
+    def reconcile(self, repair: bool = False) -> List[dict]:
+        """Compare both counter tables and ``operators.active_load`` with
+        ``appeals`` and return the drift.
+
+        With ``repair`` the counters are rewritten from ``appeals`` and
+        committed. On PostgreSQL the counter tables are locked first, so
+        appeals created or closed meanwhile wait instead of being
+        reported as drift.
+        """
+        if repair and self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(
+                text(
+                    "LOCK TABLE distribution_counters, "
+                    "distribution_hourly_counters, "
+                    "distribution_daily_counters, operators "
+                    "IN SHARE ROW EXCLUSIVE MODE"
+                )
+            )
+
+        operator_id = func.coalesce(
+            Appeal.operator_id, UNASSIGNED_OPERATOR_ID
+        )
+        status = func.coalesce(Appeal.status, "active")
+        hour = self._truncate_column(Appeal.created_at, "hour")
+        day = self._truncate_column(Appeal.created_at, "day")
+
+        drift = self._reconcile(
+            DistributionCounter,
+            ("source_id", "operator_id", "status"),
+            select(
+                Appeal.source_id, operator_id, status, func.count()
+            ).group_by(Appeal.source_id, operator_id, status),
+            repair
+        )
+        drift += self._reconcile(
+            HourlyDistributionCounter,
+            ("bucket_start", "source_id", "operator_id"),
+            select(
+                hour, Appeal.source_id, operator_id, func.count()
+            ).where(
+                Appeal.created_at.is_not(None)
+            ).group_by(hour, Appeal.source_id, operator_id),
+            repair
+        )
+        drift += self._reconcile(
+            DailyDistributionCounter,
+            ("bucket_start", "source_id", "operator_id"),
+            select(
+                day, Appeal.source_id, operator_id, func.count()
+            ).where(
+                Appeal.created_at.is_not(None)
+            ).group_by(day, Appeal.source_id, operator_id),
+            repair
+        )
+        drift += self._reconcile_active_loads(repair)
+
+        if repair:
+            self.db.commit()
+        return drift
+
+    def _reconcile_active_loads(self, repair: bool) -> List[dict]:
+        expected = dict(
+            self.db.query(Appeal.operator_id, func.count(Appeal.id)).filter(
+                Appeal.operator_id.isnot(None),
+                Appeal.status == ACTIVE_STATUS
+            ).group_by(Appeal.operator_id).all()
+        )
+        drift = [
+            {
+                "table": Operator.__tablename__,
+                "operator_id": operator_id,
+                "expected": expected.get(operator_id, 0),
+                "actual": active_load
+            }
+            for operator_id, active_load in self.db.query(
+                Operator.id, Operator.active_load
+            ).order_by(Operator.id)
+            if active_load != expected.get(operator_id, 0)
+        ]
+
+        if repair:
+            for entry in drift:
+                self.db.execute(
+                    update(Operator).where(
+                        Operator.id == entry["operator_id"]
+                    ).values(active_load=entry["expected"]),
+                    execution_options={"synchronize_session": False}
+                )
+        return drift
+
+    def _reconcile(
+        self, model, key_columns: Tuple[str, ...], expected_query,
+        repair: bool
+    ) -> List[dict]:
+        expected = Counter(
+            {tuple(key): count for *key, count in self.db.execute(
+                expected_query
+            )}
+        )
+        actual = Counter(
+            {tuple(key): count for *key, count in self.db.execute(
+                select(
+                    *(getattr(model, name) for name in key_columns),
+                    model.count
+                )
+            )}
+        )
+
+        drift = [
+            dict(
+                zip(key_columns, key),
+                table=model.__tablename__,
+                expected=expected[key],
+                actual=actual[key]
+            )
+            for key in sorted(set(expected) | set(actual))
+            if expected[key] != actual[key]
+        ]
+
+        if repair and drift:
+            # Deleting emptied rows lowers the sum of counter versions;
+            # the config version keeps ETags from repeating.
+            bump_config_version(self.db)
+            self._upsert(
+                model.__table__,
+                key_columns,
+                {key: expected[key] - actual[key]
+                 for key in set(expected) | set(actual)}
+            )
+            self.db.execute(delete(model).where(model.count == 0))
+        return drift
+
+    def _truncate_column(self, column, bucket: str):
+        """SQL counterpart of ``truncate``."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return func.date_trunc(bucket, column)
+        if dialect == "sqlite":
+            return type_coerce(
+                func.strftime(*_SQLITE_TRUNCATE[bucket](column)), DateTime
+            )
+        raise NotImplementedError(
+            f"Time buckets are not supported on {dialect}"
+        )
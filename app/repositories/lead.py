@@ -1,6 +1,12 @@
+from sqlalchemy import func, select
+from sqlalchemy import insert as sa_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models import Lead, Appeal
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+from app.database import upsert_insert
+from app.models import Lead, Appeal, Operator, Source
+from app.repositories.appeal import appeal_filters
 
 
 class LeadRepository:
@@ -32,30 +38,204 @@ class LeadRepository:
 
         return lead
 
+    def get_or_insert(
+        self,
+        external_id: str,
+        name: Optional[str] = None,
+        phone: Optional[str] = None,
+        email: Optional[str] = None
+    ) -> Lead:
+        """Get or insert a lead without committing.
+
+        Existing leads, the common case, cost one SELECT and are returned
+        unchanged. New leads are inserted with ``ON CONFLICT DO NOTHING``
+        so a concurrent insert of the same ``external_id`` does not fail;
+        the winner is then read back.
+        """
+        lead = self.db.query(Lead).filter(
+            Lead.external_id == external_id
+        ).first()
+        if lead:
+            return lead
+
+        insert = upsert_insert(self.db)
+        if insert is None:
+            lead = Lead(
+                external_id=external_id,
+                name=name,
+                phone=phone,
+                email=email
+            )
+            self.db.add(lead)
+            self.db.flush()
+            return lead
+
+        lead = self.db.scalars(
+            insert(Lead).values(
+                external_id=external_id,
+                name=name,
+                phone=phone,
+                email=email
+            ).on_conflict_do_nothing(
+                index_elements=[Lead.external_id]
+            ).returning(Lead)
+        ).first()
+        if lead:
+            return lead
+
+        return self.db.query(Lead).filter(
+            Lead.external_id == external_id
+        ).one()
+
+    def get_or_create_many(self, leads: List[dict]) -> Dict[str, int]:
+        """Resolve lead ids by ``external_id`` with one SELECT and insert
+        the missing leads with one multi-row INSERT, without committing.
+
+        The first entry wins for duplicated ``external_id`` values.
+        """
+        by_external_id = {}
+        for lead_data in leads:
+            by_external_id.setdefault(lead_data["external_id"], lead_data)
+        if not by_external_id:
+            return {}
+
+        result = dict(
+            self.db.query(Lead.external_id, Lead.id).filter(
+                Lead.external_id.in_(list(by_external_id))
+            ).all()
+        )
+
+        missing = [
+            lead_data for external_id, lead_data in by_external_id.items()
+            if external_id not in result
+        ]
+        if not missing:
+            return result
+
+        table = Lead.__table__
+        insert = upsert_insert(self.db)
+        if insert is None:
+            stmt = sa_insert(table)
+        else:
+            stmt = insert(table).on_conflict_do_nothing(
+                index_elements=[table.c.external_id]
+            )
+        rows = self.db.execute(
+            stmt.returning(table.c.external_id, table.c.id), missing
+        ).all()
+        result.update(dict(rows))
+
+        # Leads inserted concurrently by another transaction.
+        conflicted = [
+            lead_data["external_id"] for lead_data in missing
+            if lead_data["external_id"] not in result
+        ]
+        if conflicted:
+            result.update(
+                self.db.query(Lead.external_id, Lead.id).filter(
+                    Lead.external_id.in_(conflicted)
+                ).all()
+            )
+        return result
+
     def get_by_id(self, lead_id: int) -> Optional[Lead]:
         return self.db.query(Lead).filter(Lead.id == lead_id).first()
 
     def get_all(self) -> List[Lead]:
         return self.db.query(Lead).all()
 
-    def get_all_with_appeals_count(self) -> List[dict]:
-        leads = self.get_all()
-        result = []
-        for lead in leads:
-            appeals_count = self.db.query(Appeal).filter(
-                Appeal.lead_id == lead.id
-            ).count()
-            result.append(
-                {
-                    "id": lead.id,
-                    "external_id": lead.external_id,
-                    "name": lead.name,
-                    "phone": lead.phone,
-                    "email": lead.email,
-                    "appeals_count": appeals_count
-                }
+    def get_all_with_appeals_count(
+        self, after: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        """Leads ordered by id, starting after the lead ``after``.
+
+        Appeal counts come from a correlated subquery, so the cost of a
+        page does not depend on how many leads precede it.
+        """
+        appeals_count = select(func.count(Appeal.id)).where(
+            Appeal.lead_id == Lead.id
+        ).correlate(Lead).scalar_subquery()
+        query = self.db.query(
+            Lead.id,
+            Lead.external_id,
+            Lead.name,
+            Lead.phone,
+            Lead.email,
+            appeals_count.label("appeals_count")
+        )
+        if after is not None:
+            query = query.filter(Lead.id > after)
+        query = query.order_by(Lead.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [row._asdict() for row in query]
+
+    def iter_export(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        source_id: Optional[int] = None,
+        status: Optional[str] = None,
+        chunk_size: int = 5000
+    ) -> Iterator[Sequence[Row]]:
+        """Leads ordered by id with the number of their appeals, in
+        chunks of ``chunk_size`` rows from a server-side cursor.
+
+        With any filter only leads with matching appeals are returned,
+        and only those appeals are counted.
+        """
+        conditions = appeal_filters(start, end, source_id, status)
+        matching = (Appeal.lead_id == Lead.id, *conditions)
+        appeals_count = select(func.count(Appeal.id)).where(
+            *matching
+        ).correlate(Lead).scalar_subquery()
+        query = select(
+            Lead.id.label("lead_id"),
+            Lead.external_id,
+            Lead.name,
+            Lead.phone,
+            Lead.email,
+            appeals_count.label("appeals_count")
+        )
+        if conditions:
+            query = query.where(
+                select(Appeal.id).where(*matching).correlate(Lead).exists()
             )
-        return result
+        query = query.order_by(Lead.id)
+
+        yield from self.db.execute(
+            query, execution_options={"yield_per": chunk_size}
+        ).partitions()
+
+    def get_lead_appeals(
+        self,
+        lead_id: int,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> List[dict]:
+        """Appeals of a lead ordered by id, starting after the appeal
+        ``after``, with source and operator names joined in the same
+        query.
+        """
+        query = self.db.query(
+            Appeal.id,
+            Source.name.label("source"),
+            Operator.name.label("operator"),
+            Appeal.status,
+            Appeal.created_at
+        ).join(
+            Source, Source.id == Appeal.source_id
+        ).outerjoin(
+            Operator, Operator.id == Appeal.operator_id
+        ).filter(Appeal.lead_id == lead_id)
+        if status is not None:
+            query = query.filter(Appeal.status == status)
+        if after is not None:
+            query = query.filter(Appeal.id > after)
+        query = query.order_by(Appeal.id)
+        if limit is not None:
+            query = query.limit(limit)
 
-    def get_lead_appeals(self, lead_id: int) -> List[Appeal]:
-        return self.db.query(Appeal).filter(Appeal.lead_id == lead_id).all()
+        return [row._asdict() for row in query]
@@ -1,7 +1,11 @@
+from sqlalchemy import case, func, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.models import Operator, Appeal
+from app.models import Operator, Appeal, DistributionCounter
+from app.models.appeal import ACTIVE_STATUS
 from app.schemas.operator import OperatorCreate, OperatorUpdate
+from app.state.config_cache import config_cache, freeze, thaw
+from app.state.samplers import operator_samplers
 
 
 class OperatorRepository:
@@ -12,49 +16,134 @@ class OperatorRepository:
     def create(self, operator_data: OperatorCreate) -> Operator:
         operator = Operator(**operator_data.model_dump())
         self.db.add(operator)
+        self.db.flush()
+        config_cache.invalidate(self.db, ("operator", operator.id))
         self.db.commit()
         self.db.refresh(operator)
         return operator
 
     def get_by_id(self, operator_id: int) -> Optional[Operator]:
-        return self.db.query(Operator).filter(
-            Operator.id == operator_id
-        ).first()
+        """Read through ``config_cache``. ``active_load`` changes with
+        every appeal and is not cached; it is read on first access."""
+        def load():
+            operator = self.db.query(Operator).filter(
+                Operator.id == operator_id
+            ).first()
+            return freeze(operator, exclude=("active_load",)) \
+                if operator else None
+
+        values = config_cache.get(self.db, ("operator", operator_id), load)
+        return thaw(self.db, Operator, values) if values else None
 
     def get_all(self) -> List[Operator]:
         return self.db.query(Operator).all()
 
     def update(self, operator_id: int, operator_data: OperatorUpdate) -> \
             Optional[Operator]:
-        operator = self.get_by_id(operator_id)
+        # Not from the cache: the old state decides whether waiting
+        # appeals are assigned.
+        operator = self.db.query(Operator).filter(
+            Operator.id == operator_id
+        ).populate_existing().first()
         if not operator:
             return None
 
+        was_open = operator.is_active
+        old_max_load = operator.max_load
         update_data = operator_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(operator, field, value)
 
+        operator_samplers.invalidate_operator(self.db, operator_id)
+        config_cache.invalidate(self.db, ("operator", operator_id))
+        if operator.is_active and (
+            not was_open or operator.max_load > old_max_load
+        ):
+            # Re-activated or given more capacity: take waiting appeals
+            from app.repositories.appeal import AppealRepository
+            self.db.flush()
+            AppealRepository(self.db).assign_waiting(
+                operator_id, operator.max_load - operator.active_load
+            )
         self.db.commit()
         self.db.refresh(operator)
         return operator
 
+    def reserve(self, operator_id: int, count: int = 1) -> bool:
+        """Take ``count`` appeal slots on an active operator, without
+        committing.
+
+        A single conditional UPDATE, so concurrent reservations cannot
+        push ``active_load`` above ``max_load``. Only the operator's row
+        is locked, until the surrounding transaction ends.
+        """
+        result = self.db.execute(
+            update(Operator).where(
+                Operator.id == operator_id,
+                Operator.is_active.is_(True),
+                Operator.active_load + count <= Operator.max_load
+            ).values(active_load=Operator.active_load + count),
+            execution_options={"synchronize_session": False}
+        )
+        return result.rowcount == 1
+
+    def release(self, operator_id: int, count: int = 1) -> None:
+        """Give back ``count`` appeal slots, without committing."""
+        self.db.execute(
+            update(Operator).where(
+                Operator.id == operator_id
+            ).values(
+                active_load=case(
+                    (
+                        Operator.active_load > count,
+                        Operator.active_load - count
+                    ),
+                    else_=0
+                )
+            ),
+            execution_options={"synchronize_session": False}
+        )
+
     def get_current_load(self, operator_id: int) -> int:
         return self.db.query(Appeal).filter(
             Appeal.operator_id == operator_id,
-            Appeal.status == "active"
+            Appeal.status == ACTIVE_STATUS
         ).count()
 
-    def get_all_with_load(self) -> List[dict]:
-        operators = self.get_all()
-        result = []
-        for op in operators:
-            result.append(
-                {
-                    "id": op.id,
-                    "name": op.name,
-                    "is_active": op.is_active,
-                    "max_load": op.max_load,
-                    "current_load": self.get_current_load(op.id)
-                }
-            )
-        return result
+    def get_all_with_load(
+        self,
+        is_active: Optional[bool] = None,
+        has_capacity: Optional[bool] = None,
+        after: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """Operators ordered by id with their active appeal counts,
+        read from the distribution counters in the same query."""
+        loads = select(
+            DistributionCounter.operator_id,
+            func.sum(DistributionCounter.count).label("current_load")
+        ).where(
+            DistributionCounter.status == "active"
+        ).group_by(DistributionCounter.operator_id).subquery()
+        current_load = func.coalesce(loads.c.current_load, 0)
+
+        query = self.db.query(
+            Operator.id,
+            Operator.name,
+            Operator.is_active,
+            Operator.max_load,
+            current_load.label("current_load")
+        ).outerjoin(loads, loads.c.operator_id == Operator.id)
+        if is_active is not None:
+            query = query.filter(Operator.is_active == is_active)
+        if has_capacity is True:
+            query = query.filter(current_load < Operator.max_load)
+        elif has_capacity is False:
+            query = query.filter(current_load >= Operator.max_load)
+        if after is not None:
+            query = query.filter(Operator.id > after)
+        query = query.order_by(Operator.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [row._asdict() for row in query]
@@ -1,7 +1,12 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.models import Source, OperatorWeight, Operator
+from app.models import Appeal, Source, OperatorWeight, Operator
+from app.models.appeal import ACTIVE_STATUS
+from app.repositories.appeal import AppealRepository
 from app.schemas.source import SourceCreate, WeightConfig
+from app.state.config_cache import config_cache, freeze, thaw
+from app.state.samplers import operator_samplers
 
 
 class SourceRepository:
@@ -12,12 +17,40 @@ class SourceRepository:
     def create(self, source_data: SourceCreate) -> Source:
         source = Source(**source_data.model_dump())
         self.db.add(source)
+        self.db.flush()
+        config_cache.invalidate(self.db, ("source", source.id))
         self.db.commit()
         self.db.refresh(source)
         return source
 
     def get_by_id(self, source_id: int) -> Optional[Source]:
-        return self.db.query(Source).filter(Source.id == source_id).first()
+        """Read through ``config_cache``."""
+        def load():
+            source = self.db.query(Source).filter(
+                Source.id == source_id
+            ).first()
+            return freeze(source) if source else None
+
+        values = config_cache.get(self.db, ("source", source_id), load)
+        return thaw(self.db, Source, values) if values else None
+
+    def get_by_ids(self, source_ids: List[int]) -> List[Source]:
+        """Read through ``config_cache``; misses are read with one
+        query."""
+        if not source_ids:
+            return []
+
+        def load(keys):
+            sources = self.db.query(Source).filter(
+                Source.id.in_([source_id for _, source_id in keys])
+            ).all()
+            return {("source", source.id): freeze(source) for source in sources}
+
+        found = config_cache.get_many(
+            self.db, [("source", source_id) for source_id in source_ids],
+            load
+        )
+        return [thaw(self.db, Source, values) for values in found.values()]
 
     def get_all(self) -> List[Source]:
         return self.db.query(Source).all()
@@ -33,27 +66,81 @@ class SourceRepository:
             OperatorWeight.source_id == source_id
         ).delete()
 
+        operator_ids = {w.operator_id for w in weights}
+        existing = {
+            operator_id for operator_id, in self.db.query(Operator.id).filter(
+                Operator.id.in_(operator_ids)
+            )
+        } if operator_ids else set()
         for weight_config in weights:
-            operator = self.db.query(Operator).filter(
-                Operator.id == weight_config.operator_id
-            ).first()
-            if not operator:
+            if weight_config.operator_id not in existing:
                 self.db.rollback()
                 raise ValueError(
                     f"Operator {weight_config.operator_id} not found"
                 )
 
-            weight = OperatorWeight(
-                operator_id=weight_config.operator_id,
-                source_id=source_id,
-                weight=weight_config.weight
+        if weights:
+            self.db.execute(
+                insert(OperatorWeight),
+                [
+                    {
+                        "operator_id": weight_config.operator_id,
+                        "source_id": source_id,
+                        "weight": weight_config.weight
+                    }
+                    for weight_config in weights
+                ]
             )
-            self.db.add(weight)
 
+        operator_samplers.invalidate_source(self.db, source_id)
+        config_cache.invalidate(self.db, ("weights", source_id))
+        self._drain_waiting(source_id)
         self.db.commit()
         return True
 
-    def get_weights(self, source_id: int) -> List[OperatorWeight]:
-        return self.db.query(OperatorWeight).filter(
-            OperatorWeight.source_id == source_id
+    def _drain_waiting(self, source_id: int) -> None:
+        """Give the source's waiting appeals to its operators with free
+        slots, so they are not overtaken by new appeals. Costs one query
+        when nothing waits."""
+        waiting = self.db.scalar(
+            select(Appeal.id).where(
+                Appeal.source_id == source_id,
+                Appeal.operator_id.is_(None),
+                Appeal.status == ACTIVE_STATUS
+            ).limit(1)
+        )
+        if waiting is None:
+            return
+
+        free = self.db.execute(
+            select(
+                Operator.id, Operator.max_load - Operator.active_load
+            ).join(
+                OperatorWeight, OperatorWeight.operator_id == Operator.id
+            ).where(
+                OperatorWeight.source_id == source_id,
+                OperatorWeight.weight > 0,
+                Operator.is_active.is_(True),
+                Operator.active_load < Operator.max_load
+            ).order_by(OperatorWeight.weight.desc(), Operator.id)
         ).all()
+        appeals = AppealRepository(self.db)
+        for operator_id, slots in free:
+            appeals.assign_waiting(operator_id, slots)
+
+    def get_weights(self, source_id: int) -> List[OperatorWeight]:
+        """Read through ``config_cache``."""
+        def load():
+            return [
+                freeze(weight)
+                for weight in self.db.query(OperatorWeight).filter(
+                    OperatorWeight.source_id == source_id
+                ).order_by(OperatorWeight.id)
+            ]
+
+        return [
+            thaw(self.db, OperatorWeight, values)
+            for values in config_cache.get(
+                self.db, ("weights", source_id), load
+            )
+        ]
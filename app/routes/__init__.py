@@ -1,3 +1,5 @@
-from app.routes import operators, sources, appeals, stats
+from app.routes import operators, sources, appeals, stats, metrics, export
 
-__all__ = ["operators", "sources", "appeals", "stats"]
+__all__ = [
+    "operators", "sources", "appeals", "stats", "metrics", "export"
+]
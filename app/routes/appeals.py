@@ -1,60 +1,138 @@
-from fastapi import APIRouter, Depends
+import json
+
+from fastapi import (
+    APIRouter, Body, Depends, HTTPException, Query, Request, Response
+)
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Literal, Optional
 
+from app.config import settings
+from app.database import run_db, sync_session
 from app.dependencies import get_db
+from app.responses import RequestStreamingResponse, fast_json, project
 from app.services.appeal import AppealService
+from app.services.appeal_import import AppealImporter, iter_ndjson_chunks
 from app.repositories.lead import LeadRepository
 from app.schemas.appeal import (
     AppealCreate,
     AppealResponse,
+    AppealBatchItemResult,
+    LeadPage,
+    LeadAppealPage,
     LeadResponse,
-    LeadAppealResponse
 )
 
 router = APIRouter(prefix="/appeals", tags=["appeals"])
 
 
 @router.post("/", response_model=AppealResponse, status_code=201)
-def create_appeal(
+async def create_appeal(
     appeal_data: AppealCreate,
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
+):
+    def create(db: Session) -> AppealResponse:
+        service = AppealService(db)
+        return service.create_appeal(appeal_data)
+
+    return await run_db(db, create)
+
+
+@router.post("/batch", response_model=List[AppealBatchItemResult])
+async def create_appeals_batch(
+    items: Annotated[
+        List[AppealCreate],
+        Body(min_length=1, max_length=settings.APPEAL_BATCH_MAX_SIZE)
+    ],
+    db=Depends(get_db)
+):
+    def create(db: Session) -> List[AppealBatchItemResult]:
+        service = AppealService(db)
+        return service.create_appeals(items)
+
+    return await run_db(db, create)
+
+
+@router.post("/import")
+async def import_appeals(
+    request: Request,
+    chunk_size: int = Query(500, ge=1, le=5000),
+    db=Depends(get_db)
 ):
-    service = AppealService(db)
-    return service.create_appeal(appeal_data)
+    """Import newline-delimited AppealCreate records from the request body.
+
+    Progress, per-line errors and the final counts are streamed back as
+    NDJSON; each chunk is committed separately.
+    """
+    importer = AppealImporter(sync_session(db), chunk_size)
+
+    async def events():
+        async for chunk in iter_ndjson_chunks(request.stream(), chunk_size):
+            for event in await run_db(
+                db, lambda _, chunk=chunk: importer.process_chunk(chunk)
+            ):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        yield json.dumps(importer.progress("summary")) + "\n"
+
+    return RequestStreamingResponse(
+        events(), media_type="application/x-ndjson"
+    )
 
 
 @router.patch("/{appeal_id}/close")
-def close_appeal(appeal_id: int, db: Session = Depends(get_db)):
-    service = AppealService(db)
-    service.close_appeal(appeal_id)
+async def close_appeal(appeal_id: int, db=Depends(get_db)):
+    def close(db: Session) -> None:
+        service = AppealService(db)
+        service.close_appeal(appeal_id)
+
+    await run_db(db, close)
     return {"message": "Appeal closed successfully"}
 
 
-@router.get("/leads", response_model=List[LeadResponse])
-def list_leads(db: Session = Depends(get_db)):
-    repo = LeadRepository(db)
-    return repo.get_all_with_appeals_count()
+@router.get("/leads", response_model=LeadPage)
+async def list_leads(
+    response: Response,
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db=Depends(get_db)
+):
+    def list_(db: Session) -> List[dict]:
+        repo = LeadRepository(db)
+        return repo.get_all_with_appeals_count(after=after, limit=limit + 1)
 
+    leads = await run_db(db, list_)
+    next_cursor = leads[limit - 1]["id"] if len(leads) > limit else None
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json(
+            {
+                "items": project(LeadResponse, leads[:limit]),
+                "next_cursor": next_cursor
+            },
+            response
+        )
+    return LeadPage(items=leads[:limit], next_cursor=next_cursor)
 
-@router.get("/leads/{lead_id}/appeals", response_model=List[LeadAppealResponse])
-def get_lead_appeals(lead_id: int, db: Session = Depends(get_db)):
-    from fastapi import HTTPException
-    repo = LeadRepository(db)
 
-    lead = repo.get_by_id(lead_id)
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
+@router.get("/leads/{lead_id}/appeals", response_model=LeadAppealPage)
+async def get_lead_appeals(
+    lead_id: int,
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[Literal["active", "closed"]] = Query(None),
+    db=Depends(get_db)
+):
+    """Appeals of a lead ordered by id; two statements per page however
+    many appeals it holds."""
+    def get(db: Session) -> List[dict]:
+        repo = LeadRepository(db)
 
-    appeals = repo.get_lead_appeals(lead_id)
+        lead = repo.get_by_id(lead_id)
+        if not lead:
+            raise HTTPException(status_code=404, detail="Lead not found")
 
-    return [
-        LeadAppealResponse(
-            id=appeal.id,
-            source=appeal.source.name,
-            operator=appeal.operator.name if appeal.operator else None,
-            status=appeal.status,
-            created_at=appeal.created_at
+        return repo.get_lead_appeals(
+            lead_id, after=after, limit=limit + 1, status=status
         )
-        for appeal in appeals
-    ]
\ No newline at end of file
+
+    appeals = await run_db(db, get)
+    next_cursor = appeals[limit - 1]["id"] if len(appeals) > limit else None
+    return LeadAppealPage(items=appeals[:limit], next_cursor=next_cursor)
\ No newline at end of file
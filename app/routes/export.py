@@ -0,0 +1,103 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+
+from app.database import run_db
+from app.dependencies import get_db
+from app.repositories.appeal import AppealRepository
+from app.repositories.lead import LeadRepository
+from app.routes.stats import to_utc
+from app.services.export import (
+    APPEAL_COLUMNS,
+    EXPORT_WRITERS,
+    LEAD_COLUMNS,
+    parquet_available,
+)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+Format = Literal["csv", "parquet"]
+
+
+def _export(
+    name: str, columns, repository, format: Format, db, filters: dict,
+    chunk_size: int
+) -> StreamingResponse:
+    start, end = to_utc(filters["start"]), to_utc(filters["end"])
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=422, detail="'from' must be earlier than 'to'"
+        )
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=501, detail="Parquet export requires pyarrow"
+        )
+    filters = dict(filters, start=start, end=end)
+    writer = EXPORT_WRITERS[format](columns)
+
+    async def body():
+        # The header goes out before the query runs
+        yield writer.start()
+        chunks = await run_db(
+            db,
+            lambda db: repository(db).iter_export(
+                chunk_size=chunk_size, **filters
+            )
+        )
+        while True:
+            rows = await run_db(db, lambda _: next(chunks, None))
+            if rows is None:
+                break
+            yield writer.write(rows)
+        yield writer.finish()
+
+    return StreamingResponse(
+        body(),
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{name}.{writer.extension}"'
+        }
+    )
+
+
+@router.get("/appeals")
+async def export_appeals(
+    format: Format = Query("csv"),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = Query(None),
+    source_id: Optional[int] = Query(None),
+    status: Optional[Literal["active", "closed"]] = Query(None),
+    chunk_size: int = Query(5000, ge=1, le=50000),
+    db=Depends(get_db)
+):
+    """Appeals with lead, source and operator names, ordered by id and
+    streamed in chunks from a server-side cursor."""
+    return _export(
+        "appeals", APPEAL_COLUMNS, AppealRepository, format, db,
+        {"start": from_, "end": to, "source_id": source_id,
+         "status": status},
+        chunk_size
+    )
+
+
+@router.get("/leads")
+async def export_leads(
+    format: Format = Query("csv"),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = Query(None),
+    source_id: Optional[int] = Query(None),
+    status: Optional[Literal["active", "closed"]] = Query(None),
+    chunk_size: int = Query(5000, ge=1, le=50000),
+    db=Depends(get_db)
+):
+    """Leads with their appeal counts, ordered by id. With filters only
+    leads with matching appeals are exported and only those appeals are
+    counted."""
+    return _export(
+        "leads", LEAD_COLUMNS, LeadRepository, format, db,
+        {"start": from_, "end": to, "source_id": source_id,
+         "status": status},
+        chunk_size
+    )
@@ -0,0 +1,176 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import List
+
+from app import database
+from app.database import pool_status, run_db
+from app.dependencies import get_db
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
+from app.repositories.operator import OperatorRepository
+from app.state import metrics
+from app.state.metrics import Gauge, render_family, sample_line
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+operator_active_load = Gauge(
+    "crm_operator_active_load",
+    "Active appeals assigned to the operator",
+    ("operator_id", "operator")
+)
+operator_max_load = Gauge(
+    "crm_operator_max_load",
+    "Maximum active appeals of the operator",
+    ("operator_id", "operator")
+)
+operator_utilization = Gauge(
+    "crm_operator_utilization",
+    "Active load divided by max load",
+    ("operator_id", "operator")
+)
+operator_active = Gauge(
+    "crm_operator_active",
+    "1 if the operator takes new appeals",
+    ("operator_id", "operator")
+)
+appeals_waiting = Gauge(
+    "crm_appeals_waiting",
+    "Active appeals waiting for an operator, by source",
+    ("source_id",)
+)
+pool_size = Gauge("crm_db_pool_size", "Configured pool size", ("pool",))
+pool_checked_out = Gauge(
+    "crm_db_pool_checked_out", "Connections in use", ("pool",)
+)
+pool_overflow = Gauge(
+    "crm_db_pool_overflow", "Overflow connections open", ("pool",)
+)
+pool_checkouts = Gauge(
+    "crm_db_pool_checkouts_total", "Connection checkouts", ("pool",)
+)
+pool_timeouts = Gauge(
+    "crm_db_pool_timeouts_total",
+    "Checkouts that timed out waiting for a connection",
+    ("pool",)
+)
+pool_wait_seconds = Gauge(
+    "crm_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ("pool",)
+)
+
+
+def _operator_and_queue_lines(db: Session) -> List[str]:
+    operators = OperatorRepository(db).get_all()
+    waiting = DistributionCounterRepository(db).get_waiting_counts()
+
+    def samples(value):
+        return [
+            ((operator.id, operator.name), value(operator))
+            for operator in sorted(operators, key=lambda o: o.id)
+        ]
+
+    return [
+        *render_family(
+            operator_active_load,
+            operator_active_load.render_samples(
+                samples(lambda operator: operator.active_load)
+            )
+        ),
+        *render_family(
+            operator_max_load,
+            operator_max_load.render_samples(
+                samples(lambda operator: operator.max_load)
+            )
+        ),
+        *render_family(
+            operator_utilization,
+            operator_utilization.render_samples(
+                samples(
+                    lambda operator: operator.active_load / operator.max_load
+                    if operator.max_load else 0.0
+                )
+            )
+        ),
+        *render_family(
+            operator_active,
+            operator_active.render_samples(
+                samples(lambda operator: int(operator.is_active))
+            )
+        ),
+        *render_family(
+            appeals_waiting,
+            appeals_waiting.render_samples(
+                ((source_id,), count)
+                for source_id, count in sorted(waiting.items())
+            )
+        ),
+    ]
+
+
+def _pool_lines() -> List[str]:
+    pools = {"sync": pool_status(database.engine.pool)}
+    if database.async_engine is not None:
+        pools["async"] = pool_status(database.async_engine.pool)
+
+    lines = []
+    for gauge, key, type_ in (
+        (pool_size, "size", None),
+        (pool_checked_out, "checked_out", None),
+        (pool_overflow, "overflow", None),
+        (pool_checkouts, "checkouts", "counter"),
+        (pool_timeouts, "timeouts", "counter"),
+    ):
+        lines += render_family(
+            gauge,
+            gauge.render_samples(
+                ((name,), status[key])
+                for name, status in pools.items() if key in status
+            ),
+            type_
+        )
+
+    wait = pool_wait_seconds
+    wait_lines = []
+    for name, status in pools.items():
+        if "wait_ms_histogram" not in status:
+            continue
+        for bound, count in status["wait_ms_histogram"].items():
+            le = bound if bound == "+Inf" else repr(int(bound) / 1000)
+            wait_lines.append(
+                sample_line(
+                    f"{wait.name}_bucket", ("pool", "le"), (name, le), count
+                )
+            )
+        wait_lines.append(
+            sample_line(
+                f"{wait.name}_sum", ("pool",), (name,),
+                status["wait_ms_total"] / 1000
+            )
+        )
+        wait_lines.append(
+            sample_line(
+                f"{wait.name}_count", ("pool",), (name,), status["checkouts"]
+            )
+        )
+    return lines + render_family(wait, wait_lines, "histogram")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(db=Depends(get_db)):
+    """Prometheus metrics of this worker process.
+
+    Counters and histograms are kept in memory by the request path;
+    operator loads and waiting appeals are read with two queries per
+    scrape.
+    """
+    lines = []
+    for metric in metrics.REQUEST_METRICS:
+        lines += render_family(metric, metric.render())
+    lines += await run_db(db, _operator_and_queue_lines)
+    lines += _pool_lines()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=CONTENT_TYPE)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.dependencies import get_db
+from app.config import settings
+from app.database import run_db
+from app.dependencies import data_etag, get_db
 from app.repositories.operator import OperatorRepository
+from app.responses import fast_json, project
+from app.services.distribution import DistributionService
 from app.schemas.operator import (
     OperatorCreate,
     OperatorUpdate,
@@ -15,38 +19,74 @@ router = APIRouter(prefix="/operators", tags=["operators"])
 
 
 @router.post("/", response_model=OperatorResponse, status_code=201)
-def create_operator(
+async def create_operator(
     operator_data: OperatorCreate,
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
-    repo = OperatorRepository(db)
-    operator = repo.create(operator_data)
-    return operator
+    def create(db: Session) -> OperatorResponse:
+        repo = OperatorRepository(db)
+        return OperatorResponse.model_validate(repo.create(operator_data))
 
+    return await run_db(db, create)
 
-@router.get("/", response_model=List[OperatorWithLoad])
-def list_operators(db: Session = Depends(get_db)):
-    repo = OperatorRepository(db)
-    return repo.get_all_with_load()
+
+@router.get(
+    "/", response_model=List[OperatorWithLoad],
+    dependencies=[Depends(data_etag)]
+)
+async def list_operators(
+    response: Response,
+    is_active: Optional[bool] = Query(None),
+    has_capacity: Optional[bool] = Query(None),
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db=Depends(get_db)
+):
+    def list_(db: Session) -> List[dict]:
+        repo = OperatorRepository(db)
+        return repo.get_all_with_load(
+            is_active=is_active,
+            has_capacity=has_capacity,
+            after=after,
+            limit=limit
+        )
+
+    operators = await run_db(db, list_)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json(project(OperatorWithLoad, operators), response)
+    return operators
 
 
 @router.get("/{operator_id}", response_model=OperatorResponse)
-def get_operator(operator_id: int, db: Session = Depends(get_db)):
-    repo = OperatorRepository(db)
-    operator = repo.get_by_id(operator_id)
-    if not operator:
-        raise HTTPException(status_code=404, detail="Operator not found")
-    return operator
+async def get_operator(operator_id: int, db=Depends(get_db)):
+    def get(db: Session) -> OperatorResponse:
+        repo = OperatorRepository(db)
+        operator = repo.get_by_id(operator_id)
+        if not operator:
+            raise HTTPException(status_code=404, detail="Operator not found")
+        return OperatorResponse.model_validate(operator)
+
+    return await run_db(db, get)
 
 
 @router.patch("/{operator_id}", response_model=OperatorResponse)
-def update_operator(
+async def update_operator(
     operator_id: int,
     operator_data: OperatorUpdate,
-    db: Session = Depends(get_db)
+    reassign: bool = Query(
+        False,
+        description="Move active appeals the operator can no longer hold "
+                    "(deactivated or max_load lowered) to other operators"
+    ),
+    db=Depends(get_db)
 ):
-    repo = OperatorRepository(db)
-    operator = repo.update(operator_id, operator_data)
-    if not operator:
-        raise HTTPException(status_code=404, detail="Operator not found")
-    return operator
+    def update(db: Session) -> OperatorResponse:
+        repo = OperatorRepository(db)
+        operator = repo.update(operator_id, operator_data)
+        if not operator:
+            raise HTTPException(status_code=404, detail="Operator not found")
+        if reassign:
+            DistributionService(db).reassign_appeals(operator_id)
+        return OperatorResponse.model_validate(operator)
+
+    return await run_db(db, update)
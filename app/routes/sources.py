@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.dependencies import get_db
+from app.database import run_db
+from app.dependencies import config_etag, get_db
 from app.repositories.source import SourceRepository
 from app.schemas.source import (
     SourceCreate,
@@ -14,61 +15,85 @@ router = APIRouter(prefix="/sources", tags=["sources"])
 
 
 @router.post("/", response_model=SourceResponse, status_code=201)
-def create_source(
+async def create_source(
     source_data: SourceCreate,
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
-    repo = SourceRepository(db)
-    source = repo.create(source_data)
-    return source
+    def create(db: Session) -> SourceResponse:
+        repo = SourceRepository(db)
+        return SourceResponse.model_validate(repo.create(source_data))
 
+    return await run_db(db, create)
 
-@router.get("/", response_model=List[SourceResponse])
-def list_sources(db: Session = Depends(get_db)):
-    repo = SourceRepository(db)
-    return repo.get_all()
+
+@router.get(
+    "/", response_model=List[SourceResponse],
+    dependencies=[Depends(config_etag)]
+)
+async def list_sources(db=Depends(get_db)):
+    def list_(db: Session) -> List[SourceResponse]:
+        repo = SourceRepository(db)
+        return [SourceResponse.model_validate(s) for s in repo.get_all()]
+
+    return await run_db(db, list_)
 
 
 @router.get("/{source_id}", response_model=SourceResponse)
-def get_source(source_id: int, db: Session = Depends(get_db)):
-    repo = SourceRepository(db)
-    source = repo.get_by_id(source_id)
-    if not source:
-        raise HTTPException(status_code=404, detail="Source not found")
-    return source
+async def get_source(source_id: int, db=Depends(get_db)):
+    def get(db: Session) -> SourceResponse:
+        repo = SourceRepository(db)
+        source = repo.get_by_id(source_id)
+        if not source:
+            raise HTTPException(status_code=404, detail="Source not found")
+        return SourceResponse.model_validate(source)
+
+    return await run_db(db, get)
 
 
 @router.post("/{source_id}/weights", status_code=200)
-def configure_weights(
+async def configure_weights(
     source_id: int,
     weights: List[WeightConfig],
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
-    repo = SourceRepository(db)
+    operator_ids = [w.operator_id for w in weights]
+    if len(set(operator_ids)) != len(operator_ids):
+        raise HTTPException(
+            status_code=422, detail="Duplicate operator_id in weights"
+        )
 
-    try:
-        success = repo.configure_weights(source_id, weights)
-        if not success:
-            raise HTTPException(status_code=404, detail="Source not found")
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    def configure(db: Session) -> None:
+        repo = SourceRepository(db)
+
+        try:
+            success = repo.configure_weights(source_id, weights)
+            if not success:
+                raise HTTPException(
+                    status_code=404, detail="Source not found"
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
 
+    await run_db(db, configure)
     return {"message": "Weights configured successfully"}
 
 
-@router.get("/{source_id}/weights")
-def get_weights(source_id: int, db: Session = Depends(get_db)):
-    repo = SourceRepository(db)
-    source = repo.get_by_id(source_id)
-    if not source:
-        raise HTTPException(status_code=404, detail="Source not found")
-
-    weights = repo.get_weights(source_id)
-    return [
-        {
-            "operator_id": w.operator_id,
-            "operator_name": w.operator.name,
-            "weight": w.weight
-        }
-        for w in weights
-    ]
+@router.get("/{source_id}/weights", dependencies=[Depends(config_etag)])
+async def get_weights(source_id: int, db=Depends(get_db)):
+    def get(db: Session) -> List[dict]:
+        repo = SourceRepository(db)
+        source = repo.get_by_id(source_id)
+        if not source:
+            raise HTTPException(status_code=404, detail="Source not found")
+
+        weights = repo.get_weights(source_id)
+        return [
+            {
+                "operator_id": w.operator_id,
+                "operator_name": w.operator.name,
+                "weight": w.weight
+            }
+            for w in weights
+        ]
+
+    return await run_db(db, get)
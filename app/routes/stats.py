@@ -1,20 +1,71 @@
-from fastapi import APIRouter, Depends
+import os
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import Literal, Optional
 
-from app.dependencies import get_db
-from app.repositories.appeal import AppealRepository
+from app import database
+from app.database import pool_status, run_db
+from app.dependencies import data_etag, get_db
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
 from app.services.distribution import DistributionService
+from app.state.query_stats import route_query_stats
 
 router = APIRouter(prefix="/stats", tags=["statistics"])
 
 
-@router.get("/distribution")
-def get_distribution_stats(db: Session = Depends(get_db)):
-    repo = AppealRepository(db)
-    return repo.get_distribution_stats()
+def to_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    # created_at is stored as naive UTC
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/distribution", dependencies=[Depends(data_etag)])
+async def get_distribution_stats(
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = Query(None),
+    bucket: Optional[Literal["hour", "day", "week"]] = Query(None),
+    db=Depends(get_db)
+):
+    start, end = to_utc(from_), to_utc(to)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=422, detail="'from' must be earlier than 'to'"
+        )
+
+    def get(db: Session):
+        repo = DistributionCounterRepository(db)
+        if bucket is not None:
+            return repo.get_bucketed_stats(bucket, start, end)
+        return repo.get_distribution_stats(start, end)
+
+    return await run_db(db, get)
 
 
 @router.get("/sources/{source_id}/operators")
-def get_available_operators(source_id: int, db: Session = Depends(get_db)):
-    service = DistributionService(db)
-    return service.get_available_operators_info(source_id)
+async def get_available_operators(source_id: int, db=Depends(get_db)):
+    def get(db: Session):
+        service = DistributionService(db)
+        return service.get_available_operators_info(source_id)
+
+    return await run_db(db, get)
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    """Connection pool occupancy and checkout waits of this worker
+    process; every uvicorn worker has its own pools."""
+    pools = {"sync": pool_status(database.engine.pool)}
+    if database.async_engine is not None:
+        pools["async"] = pool_status(database.async_engine.pool)
+    return {"pid": os.getpid(), "pools": pools}
+
+
+@router.get("/queries")
+async def get_query_stats():
+    """SQL statements and database time per route, heaviest first,
+    since this worker process started."""
+    return {"pid": os.getpid(), "routes": route_query_stats.snapshot()}
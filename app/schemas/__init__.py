@@ -12,8 +12,11 @@ from app.schemas.source import (
 from app.schemas.appeal import (
     AppealCreate,
     AppealResponse,
+    AppealBatchItemResult,
     LeadResponse,
+    LeadPage,
     LeadAppealResponse,
+    LeadAppealPage,
 )
 
 __all__ = [
@@ -26,6 +29,9 @@ __all__ = [
     "WeightConfig",
     "AppealCreate",
     "AppealResponse",
+    "AppealBatchItemResult",
     "LeadResponse",
+    "LeadPage",
     "LeadAppealResponse",
+    "LeadAppealPage",
 ]
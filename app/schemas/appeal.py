@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -23,6 +23,13 @@ class AppealResponse(BaseModel):
     created_at: datetime
 
 
+class AppealBatchItemResult(BaseModel):
+    index: int
+    status: str  # created, error
+    appeal: Optional[AppealResponse] = None
+    error: Optional[str] = None
+
+
 class LeadResponse(BaseModel):
     id: int
     external_id: str
@@ -32,9 +39,19 @@ class LeadResponse(BaseModel):
     appeals_count: int
 
 
+class LeadPage(BaseModel):
+    items: List[LeadResponse]
+    next_cursor: Optional[int] = None
+
+
 class LeadAppealResponse(BaseModel):
     id: int
     source: str
     operator: Optional[str] = None
     status: str
     created_at: datetime
+
+
+class LeadAppealPage(BaseModel):
+    items: List[LeadAppealResponse]
+    next_cursor: Optional[int] = None
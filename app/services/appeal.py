@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
+from typing import List
 from app.repositories.lead import LeadRepository
 from app.repositories.source import SourceRepository
 from app.repositories.appeal import AppealRepository
 from app.services.distribution import DistributionService
-from app.schemas.appeal import AppealCreate, AppealResponse
+from app.schemas.appeal import (
+    AppealCreate,
+    AppealResponse,
+    AppealBatchItemResult,
+)
 from fastapi import HTTPException
 
 
@@ -17,14 +22,16 @@ class AppealService:
         self.distribution_service = DistributionService(db)
 
     def create_appeal(self, appeal_data: AppealCreate) -> AppealResponse:
+        """Create an appeal in a single transaction with one commit."""
+        try:
+            response = self._create_appeal(appeal_data)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return response
 
-        lead = self.lead_repo.get_or_create(
-            external_id=appeal_data.lead_external_id,
-            name=appeal_data.lead_name,
-            phone=appeal_data.lead_phone,
-            email=appeal_data.lead_email
-        )
-
+    def _create_appeal(self, appeal_data: AppealCreate) -> AppealResponse:
         source = self.source_repo.get_by_id(appeal_data.source_id)
         if not source:
             raise HTTPException(
@@ -32,27 +39,31 @@ class AppealService:
                 detail=f"Source with id {appeal_data.source_id} not found"
             )
 
-        operator_id = self.distribution_service.select_operator(
-            appeal_data.source_id
+        lead = self.lead_repo.get_or_insert(
+            external_id=appeal_data.lead_external_id,
+            name=appeal_data.lead_name,
+            phone=appeal_data.lead_phone,
+            email=appeal_data.lead_email
         )
 
+        operator_id = self.distribution_service.assign_operator(source.id)
+
         appeal = self.appeal_repo.create(
             lead_id=lead.id,
-            source_id=appeal_data.source_id,
+            source_id=source.id,
             operator_id=operator_id,
-            message=appeal_data.message
+            message=appeal_data.message,
+            commit=False
         )
 
         operator_info = None
         if operator_id:
-            from app.repositories.operator import OperatorRepository
-            operator_repo = OperatorRepository(self.db)
-            operator = operator_repo.get_by_id(operator_id)
-            if operator:
-                operator_info = {
-                    "id": operator.id,
-                    "name": operator.name
-                }
+            operator_info = {
+                "id": operator_id,
+                "name": self.distribution_service.get_operator_name(
+                    source.id, operator_id
+                )
+            }
 
         return AppealResponse(
             appeal_id=appeal.id,
@@ -65,6 +76,102 @@ class AppealService:
             created_at=appeal.created_at
         )
 
+    def create_appeals(
+        self, items: List[AppealCreate]
+    ) -> List[AppealBatchItemResult]:
+        """Create a batch of appeals in one transaction.
+
+        Leads, sources and operators are resolved once for the whole
+        batch and appeals are written with a single multi-row INSERT.
+        Results are returned in input order.
+        """
+        try:
+            results = self._create_appeals(items)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return results
+
+    def _create_appeals(
+        self, items: List[AppealCreate]
+    ) -> List[AppealBatchItemResult]:
+        sources = {
+            source.id: source
+            for source in self.source_repo.get_by_ids(
+                list({item.source_id for item in items})
+            )
+        }
+        results = [
+            AppealBatchItemResult(
+                index=index,
+                status="error",
+                error=f"Source with id {item.source_id} not found"
+            )
+            for index, item in enumerate(items)
+        ]
+        valid = [
+            (index, item) for index, item in enumerate(items)
+            if item.source_id in sources
+        ]
+        if not valid:
+            return results
+
+        leads = self.lead_repo.get_or_create_many(
+            [
+                {
+                    "external_id": item.lead_external_id,
+                    "name": item.lead_name,
+                    "phone": item.lead_phone,
+                    "email": item.lead_email
+                }
+                for _, item in valid
+            ]
+        )
+
+        operator_ids = self.distribution_service.assign_operators(
+            [item.source_id for _, item in valid]
+        )
+
+        appeals = self.appeal_repo.create_many(
+            [
+                {
+                    "lead_id": leads[item.lead_external_id],
+                    "source_id": item.source_id,
+                    "operator_id": operator_id,
+                    "message": item.message
+                }
+                for (_, item), operator_id in zip(valid, operator_ids)
+            ]
+        )
+
+        for (index, item), appeal in zip(valid, appeals):
+            source = sources[item.source_id]
+            operator_info = None
+            if appeal.operator_id:
+                operator_info = {
+                    "id": appeal.operator_id,
+                    "name": self.distribution_service.get_operator_name(
+                        source.id, appeal.operator_id
+                    )
+                }
+            results[index] = AppealBatchItemResult(
+                index=index,
+                status="created",
+                appeal=AppealResponse(
+                    appeal_id=appeal.id,
+                    lead_id=appeal.lead_id,
+                    lead_external_id=item.lead_external_id,
+                    source_id=source.id,
+                    source_name=source.name,
+                    operator=operator_info,
+                    status=appeal.status,
+                    created_at=appeal.created_at
+                )
+            )
+
+        return results
+
     def close_appeal(self, appeal_id: int) -> bool:
         success = self.appeal_repo.close(appeal_id)
         if not success:
@@ -0,0 +1,174 @@
+import logging
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.schemas.appeal import AppealCreate
+from app.services.appeal import AppealService
+
+logger = logging.getLogger("app.import")
+
+MAX_LINE_BYTES = 64 * 1024
+
+CHUNK_FAILED = "Internal error, the chunk was not imported"
+
+# (line number, text); text is None for lines over MAX_LINE_BYTES
+Line = Tuple[int, Optional[str]]
+
+
+class AppealImporter:
+    """Imports newline-delimited ``AppealCreate`` records chunk by chunk.
+
+    Every chunk goes through ``AppealService.create_appeals`` and is
+    committed on its own, so memory use depends only on the chunk size.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = 500):
+        self.chunk_size = chunk_size
+        self.service = AppealService(db)
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+
+    def process_chunk(self, lines: List[Line]) -> List[dict]:
+        events = []
+        items = []
+        item_lines = []
+
+        for line_no, raw in lines:
+            if raw is not None and not raw.strip():
+                continue
+            self.processed += 1
+            if raw is None:
+                events.append(self._error(line_no, "Line is too long"))
+                continue
+            try:
+                items.append(AppealCreate.model_validate_json(raw))
+                item_lines.append(line_no)
+            except ValidationError as e:
+                events.append(
+                    self._error(
+                        line_no,
+                        e.errors(
+                            include_url=False,
+                            include_context=False,
+                            include_input=False
+                        )
+                    )
+                )
+
+        if items:
+            try:
+                results = self.service.create_appeals(items)
+            except Exception:
+                # The text of database errors holds SQL and parameters;
+                # it goes to the log, the client gets a generic error.
+                logger.exception(
+                    "Import of lines %d-%d failed", item_lines[0],
+                    item_lines[-1]
+                )
+                results = None
+                for line_no in item_lines:
+                    events.append(self._error(line_no, CHUNK_FAILED))
+
+            for line_no, result in zip(item_lines, results or []):
+                if result.status == "created":
+                    self.created += 1
+                else:
+                    events.append(self._error(line_no, result.error))
+
+        events.append(self.progress("progress"))
+        return events
+
+    def run(self, stream: BinaryIO) -> Iterator[dict]:
+        for chunk in iter_line_chunks(stream, self.chunk_size):
+            yield from self.process_chunk(chunk)
+        yield self.progress("summary")
+
+    def progress(self, event_type: str) -> dict:
+        return {
+            "type": event_type,
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+        }
+
+    def _error(self, line_no: int, error) -> dict:
+        self.failed += 1
+        return {"type": "error", "line": line_no, "error": error}
+
+
+def iter_line_chunks(
+    stream: BinaryIO, chunk_size: int
+) -> Iterator[List[Line]]:
+    """Read numbered lines from a binary stream in chunks.
+
+    At most ``MAX_LINE_BYTES + 1`` bytes are read at a time; the rest of
+    an over-long line is skipped and the line is reported as ``None``.
+    """
+    line_no = 0
+    chunk = []
+
+    while True:
+        raw = stream.readline(MAX_LINE_BYTES + 1)
+        if not raw:
+            break
+        line_no += 1
+        if len(raw) > MAX_LINE_BYTES and not raw.endswith(b"\n"):
+            while raw and not raw.endswith(b"\n"):
+                raw = stream.readline(MAX_LINE_BYTES + 1)
+            chunk.append((line_no, None))
+        else:
+            chunk.append(
+                (line_no, raw.rstrip(b"\r\n").decode("utf-8", "replace"))
+            )
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+async def iter_ndjson_chunks(
+    stream: AsyncIterator[bytes], chunk_size: int
+) -> AsyncIterator[List[Line]]:
+    """Split a byte stream into chunks of numbered lines.
+
+    Lines longer than ``MAX_LINE_BYTES`` are dropped while they are read
+    and reported as ``None``, so a single huge line cannot grow the
+    buffer without bound.
+    """
+    buffer = b""
+    skipping = False
+    line_no = 0
+    chunk = []
+
+    async for data in stream:
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                chunk.append((line_no, None))
+            elif len(line) > MAX_LINE_BYTES:
+                chunk.append((line_no, None))
+            else:
+                chunk.append((line_no, line.decode("utf-8", "replace")))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer = b""
+            skipping = True
+
+    if buffer or skipping:
+        line_no += 1
+        if skipping:
+            chunk.append((line_no, None))
+        else:
+            chunk.append((line_no, buffer.decode("utf-8", "replace")))
+    if chunk:
+        yield chunk
@@ -1,59 +1,173 @@
-from sqlalchemy.orm import Session
-from typing import Optional
-import random
-from app.models import OperatorWeight, Operator, Appeal
+import time
+from collections import Counter
+from sqlalchemy.orm import Session, joinedload
+from typing import Collection, Dict, List, Optional
+from app.config import settings
+from app.models import OperatorWeight
+from app.repositories.appeal import AppealRepository
+from app.repositories.operator import OperatorRepository
+from app.state.load_ledger import load_ledger
+from app.state.metrics import selection_seconds
+from app.state.samplers import operator_samplers
 
 
 class DistributionService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.operator_repo = OperatorRepository(db)
 
-    def select_operator(self, source_id: int) -> Optional[int]:
-        weights = self.db.query(OperatorWeight).filter(
-            OperatorWeight.source_id == source_id
-        ).all()
-
-        if not weights:
+    def select_operator(
+        self, source_id: int, exclude: Collection[int] = ()
+    ) -> Optional[int]:
+        sampler = operator_samplers.get(self.db, source_id)
+        if not sampler:
             return None
 
-        available_operators = []
-        operator_weights = []
-
-        for weight in weights:
-            operator = weight.operator
-
-            if not operator.is_active:
-                continue
+        return sampler.draw(
+            lambda operator_id: operator_id not in exclude
+            and load_ledger.get_load(self.db, operator_id)
+            < sampler.max_loads[operator_id]
+        )
+
+    def assign_operator(
+        self, source_id: int, exclude: Collection[int] = ()
+    ) -> Optional[int]:
+        """Select an operator and reserve a slot on it for one appeal.
+
+        The load ledger is only a hint; the reservation is the conditional
+        UPDATE on the operator row. When it fails because another worker
+        took the last slot, the next sampled candidate is tried.
+        """
+        started_at = time.perf_counter()
+        try:
+            tried = set(exclude)
+            while True:
+                operator_id = self.select_operator(source_id, exclude=tried)
+                if operator_id is None:
+                    return None
+                if self.operator_repo.reserve(operator_id):
+                    return operator_id
+                tried.add(operator_id)
+        finally:
+            selection_seconds.observe(time.perf_counter() - started_at)
+
+    def select_operators(
+        self,
+        source_ids: List[int],
+        exclude: Collection[int] = (),
+        loads: Optional[Dict[int, int]] = None
+    ) -> List[Optional[int]]:
+        """Select an operator for every source id against one load snapshot.
+
+        Capacity is consumed as operators are assigned, so a batch never
+        pushes an operator above ``max_load``. Pass ``loads`` to carry the
+        snapshot over several batches; it is updated in place.
+        """
+        if loads is None:
+            loads = load_ledger.snapshot(self.db)
+        result = []
+
+        for source_id in source_ids:
+            sampler = operator_samplers.get(self.db, source_id)
+            operator_id = sampler.draw(
+                lambda op_id: op_id not in exclude
+                and loads.get(op_id, 0) < sampler.max_loads[op_id]
+            )
+            if operator_id:
+                loads[operator_id] = loads.get(operator_id, 0) + 1
+            result.append(operator_id)
 
-            current_load = self._get_operator_load(operator.id)
-            if current_load >= operator.max_load:
-                continue
+        return result
 
-            available_operators.append(operator.id)
-            operator_weights.append(weight.weight)
+    def assign_operators(
+        self,
+        source_ids: List[int],
+        exclude: Collection[int] = (),
+        loads: Optional[Dict[int, int]] = None
+    ) -> List[Optional[int]]:
+        """Batch counterpart of ``assign_operator``.
+
+        Slots are reserved with one UPDATE per selected operator; items
+        whose operator could not take all of them are reassigned one by
+        one.
+        """
+        operator_ids = self.select_operators(source_ids, exclude, loads)
+        counts = Counter(
+            operator_id for operator_id in operator_ids if operator_id
+        )
+        refused = {
+            operator_id for operator_id, count in counts.items()
+            if not self.operator_repo.reserve(operator_id, count)
+        }
 
-        if not available_operators:
-            return None
+        for index, operator_id in enumerate(operator_ids):
+            if operator_id in refused:
+                operator_ids[index] = self.assign_operator(
+                    source_ids[index], exclude
+                )
+        return operator_ids
+
+    def reassign_appeals(
+        self, operator_id: int, chunk_size: Optional[int] = None
+    ) -> int:
+        """Move the active appeals an operator can no longer hold to
+        other operators of the same sources.
+
+        All of them when the operator is inactive, otherwise the newest
+        ones above its ``max_load``. Targets are chosen with the same
+        weighted selection as new appeals, against one load snapshot
+        carried across chunks; appeals nobody can take go back to the
+        waiting queue. Every chunk of ``chunk_size`` appeals is moved with
+        bulk UPDATEs and committed separately, so rows of ``appeals`` stay
+        locked only for one chunk at a time. Returns the number of
+        appeals moved.
+        """
+        chunk_size = chunk_size or settings.REASSIGN_CHUNK_SIZE
+        appeal_repo = AppealRepository(self.db)
+        operator = self.operator_repo.get_by_id(operator_id)
+        if operator is None:
+            return 0
+
+        loads = load_ledger.snapshot(self.db)
+        moved = 0
+        while True:
+            self.db.refresh(operator)
+            limit = chunk_size
+            if operator.is_active:
+                limit = min(limit, operator.active_load - operator.max_load)
+            if limit <= 0:
+                break
+
+            appeals = appeal_repo.get_active_for_operator(
+                operator_id, limit, newest_first=operator.is_active
+            )
+            if not appeals:
+                break
 
-        total_weight = sum(operator_weights)
-        probabilities = [w / total_weight for w in operator_weights]
+            targets = self.assign_operators(
+                [appeal.source_id for appeal in appeals],
+                exclude={operator_id},
+                loads=loads
+            )
+            appeal_repo.reassign(appeals, operator_id, targets)
+            self.db.commit()
+            moved += len(appeals)
 
-        selected_operator_id = random.choices(
-            available_operators,
-            weights=probabilities
-        )[0]
+        return moved
 
-        return selected_operator_id
+    def get_operator_name(
+        self, source_id: int, operator_id: int
+    ) -> Optional[str]:
+        return operator_samplers.get(self.db, source_id).names.get(operator_id)
 
     def _get_operator_load(self, operator_id: int) -> int:
-        return self.db.query(Appeal).filter(
-            Appeal.operator_id == operator_id,
-            Appeal.status == "active"
-        ).count()
+        return load_ledger.get_load(self.db, operator_id)
 
     def get_available_operators_info(self, source_id: int) -> dict:
-        weights = self.db.query(OperatorWeight).filter(
+        weights = self.db.query(OperatorWeight).options(
+            joinedload(OperatorWeight.operator)
+        ).filter(
             OperatorWeight.source_id == source_id
         ).all()
 
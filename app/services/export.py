@@ -0,0 +1,152 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterable, List, Sequence, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+# (column, type); types are "int", "str" and "datetime"
+Columns = Sequence[Tuple[str, str]]
+
+APPEAL_COLUMNS: Columns = (
+    ("appeal_id", "int"),
+    ("created_at", "datetime"),
+    ("status", "str"),
+    ("source_id", "int"),
+    ("source", "str"),
+    ("operator_id", "int"),
+    ("operator", "str"),
+    ("lead_id", "int"),
+    ("lead_external_id", "str"),
+    ("lead_name", "str"),
+    ("lead_phone", "str"),
+    ("lead_email", "str"),
+    ("message", "str"),
+)
+
+LEAD_COLUMNS: Columns = (
+    ("lead_id", "int"),
+    ("external_id", "str"),
+    ("name", "str"),
+    ("phone", "str"),
+    ("email", "str"),
+    ("appeals_count", "int"),
+)
+
+
+class CSVExportWriter:
+    """Encodes row chunks as CSV with a header line; nulls are empty
+    fields and timestamps ISO 8601."""
+
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, columns: Columns):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self) -> bytes:
+        self._writer.writerow([name for name, _ in self.columns])
+        return self._drain()
+
+    def write(self, rows: Iterable[Sequence]) -> bytes:
+        self._writer.writerows(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ]
+            for row in rows
+        )
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream whose contents are taken out after every row
+    group."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetExportWriter:
+    """Encodes every row chunk as one Parquet row group; the bytes of a
+    row group are sent as soon as it is written. Needs pyarrow."""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    TYPES = {"int": "int64", "str": "string", "datetime": "timestamp[us]"}
+
+    def __init__(self, columns: Columns):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires pyarrow")
+        self.columns = columns
+        self.schema = pyarrow.schema(
+            [
+                (name, pyarrow.type_for_alias(self.TYPES[type_]))
+                for name, type_ in columns
+            ]
+        )
+        self._sink = _Sink()
+        self._writer = None
+
+    def start(self) -> bytes:
+        self._writer = pyarrow.parquet.ParquetWriter(
+            self._sink, self.schema, compression="snappy"
+        )
+        return self._sink.drain()
+
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        self._writer.write_table(
+            pyarrow.Table.from_arrays(
+                [
+                    pyarrow.array([row[i] for row in rows], type=field.type)
+                    for i, field in enumerate(self.schema)
+                ],
+                schema=self.schema
+            )
+        )
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+EXPORT_WRITERS = {"csv": CSVExportWriter, "parquet": ParquetExportWriter}
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
@@ -0,0 +1,35 @@
+from app.state.config_cache import ConfigCache, config_cache
+from app.state.load_ledger import OperatorLoadLedger, load_ledger
+from app.state.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    reset_metrics,
+    track_appeals_created,
+)
+from app.state.query_stats import (
+    RequestQueryStats,
+    RouteQueryStats,
+    current_request_stats,
+    route_query_stats,
+)
+from app.state.samplers import AliasSampler, SamplerRegistry, operator_samplers
+
+__all__ = [
+    "ConfigCache",
+    "config_cache",
+    "OperatorLoadLedger",
+    "load_ledger",
+    "AliasSampler",
+    "SamplerRegistry",
+    "operator_samplers",
+    "RequestQueryStats",
+    "RouteQueryStats",
+    "current_request_stats",
+    "route_query_stats",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "reset_metrics",
+    "track_appeals_created",
+]
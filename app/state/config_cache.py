@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.database import on_commit
+from app.state.config_version import ConfigVersionPoller, bump_config_version
+
+T = TypeVar("T")
+
+
+class ConfigCache:
+    """Read-through LRU cache of configuration rows: sources, operators
+    and the weights of a source, keyed by entity.
+
+    Changes made in this worker drop the affected keys on commit and bump
+    the shared config version; other workers notice the new version, read
+    at most once per ``poll_interval`` seconds, and drop everything.
+    Misses (``None``) are not cached.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        self.max_size = (
+            settings.CONFIG_CACHE_SIZE if max_size is None else max_size
+        )
+        self._poller = ConfigVersionPoller(poll_interval)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _check_config_version(self, db: Session) -> None:
+        if self._poller.changed(db):
+            self._clear()
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _store(self, generation: int, values: Dict[Hashable, Any]) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            for key, value in values.items():
+                if value is None:
+                    continue
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Session, key: Hashable, load: Callable[[], T]) -> T:
+        """Cached value of ``key``, loaded with ``load()`` on a miss."""
+        self._check_config_version(db)
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        generation = self._generation
+        value = load()
+        self._store(generation, {key: value})
+        return value
+
+    def get_many(
+        self,
+        db: Session,
+        keys: Iterable[Hashable],
+        load: Callable[[List[Hashable]], Dict[Hashable, T]]
+    ) -> Dict[Hashable, T]:
+        """Cached values of ``keys``; all misses are loaded with one
+        ``load(missing_keys)`` call. Keys it does not return are absent
+        from the result."""
+        self._check_config_version(db)
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._lookup(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            generation = self._generation
+            loaded = load(missing)
+            self._store(generation, loaded)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, db: Session, *keys: Hashable) -> None:
+        """Bump the config version and drop ``keys`` once ``db``
+        commits."""
+        bump_config_version(db)
+        on_commit(db, lambda: self._drop(keys))
+
+    def _drop(self, keys: Sequence[Hashable]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset(self) -> None:
+        self._clear()
+        self._poller.reset()
+        self.hits = 0
+        self.misses = 0
+
+
+def freeze(instance, exclude: Sequence[str] = ()) -> Dict[str, Any]:
+    """Column values of an ORM instance, safe to share between
+    sessions."""
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in inspect(instance).mapper.column_attrs
+        if attr.key not in exclude
+    }
+
+
+def thaw(db: Session, model: Type[T], values: Dict[str, Any]) -> T:
+    """Attach frozen column values to ``db`` as a persistent ``model``
+    instance without a query. Columns left out of ``values`` are loaded
+    on first access."""
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+config_cache = ConfigCache()
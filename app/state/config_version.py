@@ -0,0 +1,78 @@
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import ConfigVersion
+
+CONFIG_VERSION_ID = 1
+
+_BUMPED_KEY = "config_version_bumped"
+
+
+def get_config_version(db: Session) -> int:
+    version = db.query(ConfigVersion.version).filter(
+        ConfigVersion.id == CONFIG_VERSION_ID
+    ).scalar()
+    return version or 0
+
+
+def bump_config_version(db: Session) -> None:
+    """Bump the shared config version in the current transaction.
+
+    Every worker compares it against the version its caches were built
+    from, so changes made by one worker reach the others. The version is
+    bumped at most once per transaction.
+    """
+    if db.info.get(_BUMPED_KEY):
+        return
+    updated = db.query(ConfigVersion).filter(
+        ConfigVersion.id == CONFIG_VERSION_ID
+    ).update(
+        {ConfigVersion.version: ConfigVersion.version + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(ConfigVersion(id=CONFIG_VERSION_ID, version=1))
+    db.info[_BUMPED_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_bumped_flag(db: Session, transaction) -> None:
+    if transaction.parent is None:
+        db.info.pop(_BUMPED_KEY, None)
+
+
+class ConfigVersionPoller:
+    """Notices changes of the shared config version, reading it at most
+    once per ``poll_interval`` seconds."""
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = (
+            settings.CONFIG_VERSION_POLL_SECONDS
+            if poll_interval is None else poll_interval
+        )
+        self._version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+
+    def changed(self, db: Session) -> bool:
+        """True when the version differs from the one seen last time."""
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.poll_interval
+        ):
+            return False
+
+        version = get_config_version(db)
+        self._checked_at = now
+        if version == self._version:
+            return False
+        self._version = version
+        return True
+
+    def reset(self) -> None:
+        self._version = None
+        self._checked_at = None
@@ -0,0 +1,145 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import on_commit
+from app.models import Appeal
+from app.models.appeal import ACTIVE_STATUS
+
+
+class OperatorLoadLedger:
+    """Process-local count of active appeals per operator.
+
+    Warmed with a single GROUP BY on first use and then kept up to date
+    by the repositories, so operator selection does not touch `appeals`.
+
+    The ledger is per worker: appeals created or closed by other workers,
+    or changed outside the repositories, are only picked up by the next
+    re-warm, which happens every ``LOAD_LEDGER_TTL_SECONDS`` or on
+    ``invalidate()``.
+
+    No lock is held while the warm query runs: under ``DATABASE_ASYNC``
+    the query yields to the event loop, and a request blocking the loop
+    thread on a lock would never let it resume. While one re-warm is in
+    flight other readers use the stale loads; only a cold or invalidated
+    ledger is warmed by every reader that finds it so, and the result of
+    the most recently started warm wins.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.LOAD_LEDGER_TTL_SECONDS if ttl is None else ttl
+        self._loads: Dict[int, int] = {}
+        self._warmed_at: Optional[float] = None
+        # Committed deltas are numbered; those committed while a warm
+        # query is running are logged and applied on top of its result
+        # so they are not lost.
+        self._applied = 0
+        self._log: List[Tuple[int, int, int]] = []
+        self._warms_in_flight = 0
+        # ``_applied`` at the start of the warm whose loads are installed
+        self._installed_from = -1
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._warmed_at is not None
+            and time.monotonic() - self._warmed_at < self.ttl
+        )
+
+    def warm(self, db: Session) -> None:
+        with self._lock:
+            token = self._begin_warm()
+        self._run_warm(db, token)
+
+    def _begin_warm(self) -> Tuple[int, int]:
+        self._warms_in_flight += 1
+        return self._generation, self._applied
+
+    def _end_warm(self) -> None:
+        self._warms_in_flight -= 1
+        if not self._warms_in_flight:
+            self._log = []
+
+    def _run_warm(self, db: Session, token: Tuple[int, int]) -> None:
+        generation, started_from = token
+        try:
+            rows = db.query(
+                Appeal.operator_id, func.count(Appeal.id)
+            ).filter(
+                Appeal.operator_id.isnot(None),
+                Appeal.status == ACTIVE_STATUS
+            ).group_by(Appeal.operator_id).all()
+        except Exception:
+            with self._lock:
+                self._end_warm()
+            raise
+
+        loads = {operator_id: count for operator_id, count in rows}
+        with self._lock:
+            if (
+                generation == self._generation
+                and started_from >= self._installed_from
+            ):
+                for number, operator_id, delta in self._log:
+                    if number > started_from:
+                        loads[operator_id] = max(
+                            loads.get(operator_id, 0) + delta, 0
+                        )
+                self._loads = loads
+                self._warmed_at = time.monotonic()
+                self._installed_from = started_from
+            self._end_warm()
+
+    def _ensure_fresh(self, db: Session) -> None:
+        if self._is_fresh():
+            return
+        with self._lock:
+            if self._is_fresh() or (
+                self._warms_in_flight and self._warmed_at is not None
+            ):
+                return
+            token = self._begin_warm()
+        self._run_warm(db, token)
+
+    def get_load(self, db: Session, operator_id: int) -> int:
+        self._ensure_fresh(db)
+        return self._loads.get(operator_id, 0)
+
+    def snapshot(self, db: Session) -> Dict[int, int]:
+        self._ensure_fresh(db)
+        with self._lock:
+            return dict(self._loads)
+
+    def track(self, db: Session, operator_id: int, delta: int) -> None:
+        on_commit(db, lambda: self._apply(operator_id, delta))
+
+    def _apply(self, operator_id: int, delta: int) -> None:
+        with self._lock:
+            self._applied += 1
+            if self._warms_in_flight:
+                self._log.append((self._applied, operator_id, delta))
+            if self._warmed_at is None:
+                return
+            self._loads[operator_id] = max(
+                self._loads.get(operator_id, 0) + delta, 0
+            )
+
+    def invalidate(self) -> None:
+        """Force a re-warm on the next read."""
+        with self._lock:
+            self._warmed_at = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loads = {}
+            self._warmed_at = None
+            self._installed_from = -1
+            self._generation += 1
+
+
+load_ledger = OperatorLoadLedger()
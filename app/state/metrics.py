@@ -0,0 +1,244 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import on_commit
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def sample_line(
+    name: str, names: Sequence[str], values: Sequence, value: float
+) -> str:
+    return f"{name}{_format_labels(names, values)} {_format_value(value)}"
+
+
+class Counter:
+    """Monotonic counter with labels, updated in process memory."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(tuple(str(v) for v in label_values), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            sample_line(self.name, self.labels, key, value)
+            for key, value in values
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {}
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels; ``observe`` is a bisect
+    and three additions under a lock."""
+
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+        1.0, 2.5, 5.0, 10.0,
+    )
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        key = tuple(str(v) for v in label_values)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = (
+                    [0] * (len(self.buckets) + 1), [0.0]
+                )
+            counts, total = series
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(tuple(str(v) for v in label_values))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._series.items()
+            )
+        lines = []
+        names = self.labels + ("le",)
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(
+                    sample_line(
+                        f"{self.name}_bucket", names,
+                        key + (_format_value(bound),), cumulative
+                    )
+                )
+            lines.append(
+                sample_line(f"{self.name}_sum", self.labels, key, total)
+            )
+            lines.append(
+                sample_line(
+                    f"{self.name}_count", self.labels, key, cumulative
+                )
+            )
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series = {}
+
+
+class Gauge:
+    """Gauge whose samples are supplied at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def render_samples(
+        self, samples: Iterable[Tuple[Sequence, float]]
+    ) -> List[str]:
+        return [
+            sample_line(self.name, self.labels, values, value)
+            for values, value in samples
+        ]
+
+
+def render_family(metric, lines: List[str], type_: Optional[str] = None):
+    return [
+        f"# HELP {metric.name} {metric.help}",
+        f"# TYPE {metric.name} {type_ or metric.type}",
+        *lines,
+    ]
+
+
+appeals_created = Counter(
+    "crm_appeals_created_total",
+    "Appeals created, by source",
+    ("source_id",)
+)
+appeals_unassigned = Counter(
+    "crm_appeals_unassigned_total",
+    "Appeals created without an operator, by source",
+    ("source_id",)
+)
+selection_seconds = Histogram(
+    "crm_operator_selection_seconds",
+    "Time to select an operator and reserve a slot for one appeal"
+)
+http_requests = Counter(
+    "crm_http_requests_total",
+    "HTTP requests, by route and status",
+    ("method", "route", "status")
+)
+http_request_seconds = Histogram(
+    "crm_http_request_duration_seconds",
+    "HTTP request latency, by route",
+    ("method", "route")
+)
+db_statements = Counter(
+    "crm_db_statements_total",
+    "SQL statements issued, by route",
+    ("method", "route")
+)
+db_seconds = Counter(
+    "crm_db_seconds_total",
+    "Time spent in SQL statements, by route",
+    ("method", "route")
+)
+
+REQUEST_METRICS = (
+    appeals_created,
+    appeals_unassigned,
+    selection_seconds,
+    http_requests,
+    http_request_seconds,
+    db_statements,
+    db_seconds,
+)
+
+
+def track_appeals_created(
+    db: Session, counts: Dict[Tuple[int, bool], int]
+) -> None:
+    """Count created appeals once the transaction of ``db`` commits.
+
+    ``counts`` maps (source_id, assigned) to the number of appeals.
+    """
+    on_commit(db, lambda: _record_appeals_created(counts))
+
+
+def _record_appeals_created(counts: Dict[Tuple[int, bool], int]) -> None:
+    for (source_id, assigned), count in counts.items():
+        appeals_created.inc(source_id, amount=count)
+        if not assigned:
+            appeals_unassigned.inc(source_id, amount=count)
+
+
+def reset_metrics() -> None:
+    for metric in REQUEST_METRICS:
+        metric.reset()
@@ -0,0 +1,98 @@
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+class RequestQueryStats:
+    """SQL statements issued while serving one request."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        return route_name(self.scope)
+
+    def record(self, statement: str, seconds: float) -> None:
+        # Statements of one request may run on several threads (the
+        # streaming import hands every chunk to the threadpool).
+        with self._lock:
+            self.statements += 1
+            self.db_seconds += seconds
+            if seconds > self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_statement = statement
+
+
+def route_name(scope: Optional[dict]) -> str:
+    """``"METHOD /path/{param}"`` of the matched route, so requests to
+    different ids aggregate together."""
+    if not scope:
+        return "-"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{scope.get('method', '-')} {path}"
+
+
+current_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+class RouteQueryStats:
+    """Process-local totals of SQL statements and database time per
+    route."""
+
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, request: RequestQueryStats, seconds: float) -> None:
+        with self._lock:
+            route = self._routes.setdefault(
+                request.route,
+                {
+                    "requests": 0,
+                    "statements": 0,
+                    "max_statements": 0,
+                    "db_seconds": 0.0,
+                    "seconds": 0.0,
+                    "slowest_seconds": 0.0,
+                    "slowest_statement": None,
+                }
+            )
+            route["requests"] += 1
+            route["statements"] += request.statements
+            route["max_statements"] = max(
+                route["max_statements"], request.statements
+            )
+            route["db_seconds"] += request.db_seconds
+            route["seconds"] += seconds
+            if request.slowest_seconds > route["slowest_seconds"]:
+                route["slowest_seconds"] = request.slowest_seconds
+                route["slowest_statement"] = request.slowest_statement
+
+    def snapshot(self) -> List[dict]:
+        """Routes ordered by total database time, heaviest first."""
+        with self._lock:
+            routes = [
+                dict(stats, route=name)
+                for name, stats in self._routes.items()
+            ]
+        for route in routes:
+            route["statements_per_request"] = (
+                route["statements"] / route["requests"]
+            )
+        return sorted(routes, key=lambda r: r["db_seconds"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes = {}
+
+
+route_query_stats = RouteQueryStats()
@@ -0,0 +1,182 @@
+import random
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import on_commit
+from app.models import Operator, OperatorWeight
+from app.state.config_version import (
+    ConfigVersionPoller,
+    bump_config_version,
+)
+
+
+class AliasSampler:
+    """Weighted sampler over operators built with Vose's alias method.
+
+    Construction is O(n), every draw is O(1). Operators that are at
+    capacity are skipped by rejection, so load changes never require a
+    rebuild.
+    """
+
+    MAX_REJECTIONS = 16
+
+    def __init__(
+        self,
+        entries: List[Tuple[int, int, int]],
+        names: Optional[Dict[int, str]] = None
+    ):
+        # entries: (operator_id, weight, max_load)
+        self.names = names or {}
+        self.operator_ids = [operator_id for operator_id, _, _ in entries]
+        self.max_loads = {
+            operator_id: max_load for operator_id, _, max_load in entries
+        }
+        self._weights = [weight for _, weight, _ in entries]
+        self._prob, self._alias = self._build(self._weights)
+
+    @staticmethod
+    def _build(weights: List[int]) -> Tuple[List[float], List[int]]:
+        n = len(weights)
+        if n == 0:
+            return [], []
+
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        for i in large + small:
+            prob[i] = 1.0
+
+        return prob, alias
+
+    def __len__(self) -> int:
+        return len(self.operator_ids)
+
+    def _draw_index(self) -> int:
+        i = int(random.random() * len(self._prob))
+        return i if random.random() < self._prob[i] else self._alias[i]
+
+    def draw(self, has_capacity: Callable[[int], bool]) -> Optional[int]:
+        if not self.operator_ids:
+            return None
+
+        for _ in range(self.MAX_REJECTIONS):
+            operator_id = self.operator_ids[self._draw_index()]
+            if has_capacity(operator_id):
+                return operator_id
+
+        # Most of the weight is at capacity: fall back to an exact pass
+        # over the remaining operators.
+        available = []
+        weights = []
+        for operator_id, weight in zip(self.operator_ids, self._weights):
+            if has_capacity(operator_id):
+                available.append(operator_id)
+                weights.append(weight)
+
+        if not available:
+            return None
+        return random.choices(available, weights=weights)[0]
+
+
+class SamplerRegistry:
+    """Compiled samplers per source, rebuilt only when weights or
+    operators change.
+
+    Changes made in this worker drop the affected samplers on commit.
+    Changes made by other workers are noticed through the shared config
+    version, read at most once per ``poll_interval`` seconds.
+    """
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self._poller = ConfigVersionPoller(poll_interval)
+        self._samplers: Dict[int, AliasSampler] = {}
+        self._sources_by_operator: Dict[int, Set[int]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, source_id: int) -> AliasSampler:
+        if self._poller.changed(db):
+            with self._lock:
+                self._generation += 1
+                self._samplers = {}
+                self._sources_by_operator = {}
+        sampler = self._samplers.get(source_id)
+        if sampler is not None:
+            return sampler
+
+        generation = self._generation
+        rows = db.query(
+            OperatorWeight.operator_id,
+            OperatorWeight.weight,
+            Operator.max_load,
+            Operator.is_active,
+            Operator.name,
+        ).join(
+            Operator, Operator.id == OperatorWeight.operator_id
+        ).filter(
+            OperatorWeight.source_id == source_id
+        ).order_by(OperatorWeight.id).all()
+
+        sampler = AliasSampler(
+            [
+                (operator_id, weight, max_load)
+                for operator_id, weight, max_load, is_active, _ in rows
+                if is_active and weight and weight > 0
+            ],
+            names={operator_id: name for operator_id, *_, name in rows}
+        )
+
+        with self._lock:
+            if generation == self._generation:
+                self._samplers[source_id] = sampler
+                for operator_id, *_ in rows:
+                    self._sources_by_operator.setdefault(
+                        operator_id, set()
+                    ).add(source_id)
+
+        return sampler
+
+    def invalidate_source(self, db: Session, source_id: int) -> None:
+        bump_config_version(db)
+        on_commit(db, lambda: self._drop_sources({source_id}))
+
+    def invalidate_operator(self, db: Session, operator_id: int) -> None:
+        bump_config_version(db)
+        on_commit(
+            db, lambda: self._drop_sources(
+                self._sources_by_operator.get(operator_id, set())
+            )
+        )
+
+    def _drop_sources(self, source_ids: Set[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for source_id in list(source_ids):
+                self._samplers.pop(source_id, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._samplers = {}
+            self._sources_by_operator = {}
+        self._poller.reset()
+
+
+operator_samplers = SamplerRegistry()
@@ -0,0 +1,188 @@
+"""Throughput and latency of the API with ``Session`` handlers on the
+threadpool vs. ``AsyncSession`` handlers on the event loop, under many
+concurrent clients. A file SQLite database stands in for PostgreSQL:
+pysqlite for the sync stack, aiosqlite for the async one.
+
+    DATABASE_URL=sqlite:// python -m benchmarks.async_stack --clients 1000
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import async_database_url
+from app.dependencies import get_db
+from app.main import app
+from app.models import Base, Operator, OperatorWeight, Source
+from app.state import load_ledger, operator_samplers
+
+SCENARIOS = {
+    "read": lambda i: ("GET", "/operators/?limit=50", None),
+    "stats": lambda i: ("GET", "/stats/distribution", None),
+    "write": lambda i: (
+        "POST", "/appeals/",
+        {"lead_external_id": f"lead_{i}", "source_id": 1 + i % 5}
+    ),
+}
+
+
+def seed(url: str, operators: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        conn.execute(
+            insert(Source), [{"name": f"Source {i}"} for i in range(5)]
+        )
+        conn.execute(
+            insert(Operator),
+            [
+                {"name": f"Operator {i}", "max_load": 1_000_000}
+                for i in range(operators)
+            ]
+        )
+        conn.execute(
+            insert(OperatorWeight),
+            [
+                {"source_id": s, "operator_id": o, "weight": 1 + o % 3}
+                for s in range(1, 6) for o in range(1, operators + 1)
+            ]
+        )
+    engine.dispose()
+
+
+# Both stacks get the same number of connections; the sync one is also
+# capped by the 40 threads of Starlette's threadpool.
+POOL = {"pool_size": 40, "max_overflow": 0, "pool_timeout": 300}
+
+
+def sync_stack(url: str):
+    # check_same_thread: sessions are closed on a different worker
+    # thread than the one that opened them.
+    engine = create_engine(
+        url, connect_args={"timeout": 60, "check_same_thread": False},
+        **POOL
+    )
+    sessions = sessionmaker(bind=engine, autoflush=False)
+
+    def get_sync_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return get_sync_db, engine.dispose
+
+
+def async_stack(url: str):
+    engine = create_async_engine(
+        async_database_url(url), connect_args={"timeout": 60}, **POOL
+    )
+    sessions = async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def get_async_db():
+        async with sessions() as db:
+            yield db
+
+    return get_async_db, engine.dispose
+
+
+async def run(scenario: str, clients: int, requests: int):
+    make_request = SCENARIOS[scenario]
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                method, path, body = make_request(i)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return (
+        requests / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        errors,
+    )
+
+
+def bench(stack: str, scenario: str, clients: int, requests: int,
+          operators: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url, operators)
+        load_ledger.reset()
+        operator_samplers.reset()
+
+        make = sync_stack if stack == "sync" else async_stack
+        dependency, dispose = make(url)
+        app.dependency_overrides[get_db] = dependency
+        try:
+            result = asyncio.run(run(scenario, clients, requests))
+            if stack == "async":
+                asyncio.run(dispose())
+            else:
+                dispose()
+        finally:
+            app.dependency_overrides.clear()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--operators", type=int, default=50)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=sorted(SCENARIOS),
+        default=sorted(SCENARIOS)
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':>9} {'stack':>6} {'req/s':>9} {'p50 ms':>9} "
+        f"{'p99 ms':>9} {'errors':>7}",
+        flush=True
+    )
+    for scenario in args.scenarios:
+        for stack in ("sync", "async"):
+            rps, p50, p99, errors = bench(
+                stack, scenario, args.clients, args.requests,
+                args.operators
+            )
+            print(
+                f"{scenario:>9} {stack:>6} {rps:>9.0f} {p50:>9.1f} "
+                f"{p99:>9.1f} {errors:>7}",
+                flush=True
+            )
+
+
+if __name__ == "__main__":
+    main()
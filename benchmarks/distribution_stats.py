@@ -0,0 +1,167 @@
+"""Statements and latency of ``/stats/distribution`` as the number of
+appeals grows: the all-time ``GROUP BY`` over ``appeals`` vs. the
+``distribution_counters`` rollup, and a 90-day range (not aligned to
+hours) counted per hour, day and week: a ``GROUP BY`` over ``appeals``
+vs. the daily and hourly counters (the counts only, without building
+the response).
+
+Appeals are spread over 90 days; every source is served by a few
+operators, as with real weights, so the rollups are as dense as in
+production.
+
+    python -m benchmarks.distribution_stats --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Appeal, Base, Lead, Operator, Source
+from app.repositories.appeal import AppealRepository
+from app.repositories.distribution_counter import (
+    DistributionCounterRepository,
+)
+
+DAYS = 90
+START = datetime(2026, 1, 1)
+RANGE = (
+    START - timedelta(days=DAYS, minutes=30),
+    START - timedelta(minutes=30),
+)
+BUCKETS = ("hour", "day", "week")
+
+
+def seed(
+    db, appeals: int, sources: int, operators: int, per_source: int
+) -> None:
+    db.execute(
+        insert(Source),
+        [{"name": f"Source {i}"} for i in range(sources)]
+    )
+    db.execute(
+        insert(Operator),
+        [
+            {"name": f"Operator {i}", "is_active": True, "max_load": 10}
+            for i in range(operators)
+        ]
+    )
+    db.execute(insert(Lead), [{"external_id": "bench_lead"}])
+    served_by = {
+        source_id: random.sample(range(1, operators + 1), per_source)
+        for source_id in range(1, sources + 1)
+    }
+    rows = []
+    for _ in range(appeals):
+        source_id = random.randint(1, sources)
+        rows.append(
+            {
+                "lead_id": 1,
+                "source_id": source_id,
+                "operator_id": random.choice(served_by[source_id]),
+                "status": "active",
+                "created_at": START - timedelta(
+                    seconds=random.randint(0, DAYS * 24 * 3600)
+                ),
+            }
+        )
+        if len(rows) == 100000:
+            db.execute(insert(Appeal), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Appeal), rows)
+    db.commit()
+    DistributionCounterRepository(db).reconcile(repair=True)
+
+
+def group_by_appeals(db, counters, bucket: str):
+    """The range split by ``bucket`` straight from ``appeals``."""
+    bucket_start = counters._truncate_column(Appeal.created_at, bucket)
+    return db.execute(
+        select(
+            bucket_start, Appeal.source_id, Appeal.operator_id,
+            func.count()
+        ).where(
+            Appeal.created_at >= RANGE[0], Appeal.created_at < RANGE[1]
+        ).group_by(bucket_start, Appeal.source_id, Appeal.operator_id)
+    ).all()
+
+
+def timed(db, get_stats, repeat: int):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        get_stats()
+    elapsed = (time.perf_counter() - start) / repeat
+    event.remove(engine, "before_cursor_execute", count)
+    return len(statements) // repeat, elapsed
+
+
+def bench(appeals: int, args):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, appeals, args.sources, args.operators, args.per_source)
+
+    counters = DistributionCounterRepository(db)
+    results = {
+        "all time": (
+            timed(db, AppealRepository(db).get_distribution_stats,
+                  args.repeat),
+            timed(db, counters.get_distribution_stats, args.repeat),
+        ),
+    }
+    for bucket in BUCKETS:
+        results[f"90 days by {bucket}"] = (
+            timed(
+                db, lambda: group_by_appeals(db, counters, bucket),
+                args.repeat
+            ),
+            timed(
+                db, lambda: counters._range_counts(*RANGE, bucket),
+                args.repeat
+            ),
+        )
+
+    db.close()
+    engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--sources", type=int, default=20)
+    parser.add_argument("--operators", type=int, default=50)
+    parser.add_argument(
+        "--per-source", type=int, default=5,
+        help="operators with a weight for each source"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'appeals':>10} {'query':<17} {'group by ms':>12} "
+        f"{'rollups ms':>11} {'statements':>11}"
+    )
+    for size in args.sizes:
+        for name, ((_, group_by), (statements, rollups)) in \
+                bench(size, args).items():
+            print(
+                f"{size:>10} {name:<17} {group_by * 1000:>12.2f} "
+                f"{rollups * 1000:>11.2f} {statements:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
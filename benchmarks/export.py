@@ -0,0 +1,151 @@
+"""Time to the first byte and to the first data chunk, throughput and
+peak Python memory of ``GET /export/appeals`` over a file SQLite
+database. The ASGI app is driven directly, so chunks are timed as the
+app sends them.
+
+    DATABASE_URL=sqlite:// python -m benchmarks.export --appeals 1000000
+    DATABASE_URL=sqlite:// python -m benchmarks.export --format parquet
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.dependencies import get_db
+from app.main import app
+from app.models import Appeal, Base, Lead, Operator, Source
+
+BATCH = 50_000
+
+
+def seed(url: str, appeals: int, rng: random.Random) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    leads = max(appeals // 10, 1)
+    start = datetime.utcnow() - timedelta(days=365)
+    with engine.begin() as conn:
+        conn.execute(insert(Source), [{"name": f"Source {i}"} for i in range(10)])
+        conn.execute(
+            insert(Operator), [{"name": f"Operator {i}"} for i in range(50)]
+        )
+        conn.execute(
+            insert(Lead),
+            [{"external_id": f"lead_{i}", "name": f"Lead {i}"}
+             for i in range(leads)]
+        )
+        for offset in range(0, appeals, BATCH):
+            conn.execute(
+                insert(Appeal),
+                [
+                    {
+                        "lead_id": rng.randint(1, leads),
+                        "source_id": rng.randint(1, 10),
+                        "operator_id": rng.choice((None, rng.randint(1, 50))),
+                        "status": rng.choice(("active", "closed")),
+                        "created_at": start + timedelta(
+                            seconds=rng.randrange(365 * 24 * 3600)
+                        ),
+                    }
+                    for _ in range(min(BATCH, appeals - offset))
+                ]
+            )
+    engine.dispose()
+
+
+async def stream(path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path.split("?")[0], "raw_path": path.split("?")[0].encode(),
+        "query_string": path.partition("?")[2].encode(),
+        "headers": [], "server": ("bench", 80), "client": ("bench", 1),
+        "root_path": "",
+    }
+    timings = {"bytes": 0, "chunks": 0}
+    start = time.perf_counter()
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] != "http.response.body":
+            return
+        body = message.get("body", b"")
+        if body:
+            now = time.perf_counter() - start
+            timings.setdefault("first_byte", now)
+            if timings["chunks"] == 1:
+                timings["first_chunk"] = now
+            timings["chunks"] += 1
+            timings["bytes"] += len(body)
+
+    await app(scope, receive, send)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appeals", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="report peak Python memory (tracemalloc slows the run down)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'export.db'}"
+        seed(url, args.appeals, random.Random(0))
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        sessions = sessionmaker(bind=engine, autoflush=False)
+
+        def get_export_db():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = get_export_db
+        if args.trace_memory:
+            tracemalloc.start()
+        try:
+            # builds the middleware stack and warms the connection pool
+            asyncio.run(stream("/export/appeals?source_id=0"))
+            timings = asyncio.run(
+                stream(
+                    f"/export/appeals?format={args.format}"
+                    f"&chunk_size={args.chunk_size}"
+                )
+            )
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+        peak = None
+        if args.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    print(
+        f"{args.appeals:,} appeals as {args.format}: "
+        f"first byte {timings['first_byte'] * 1000:.1f} ms, "
+        f"first chunk {timings.get('first_chunk', 0) * 1000:.1f} ms, "
+        f"{args.appeals / timings['total']:,.0f} rows/s, "
+        f"{timings['bytes'] / 2 ** 20:.1f} MiB in {timings['chunks']} "
+        f"chunks"
+        + (f", peak Python memory {peak / 2 ** 20:.1f} MiB" if peak else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Rows per second of encoding a large list response through the
+validated ``response_model`` path vs. the opt-in fast path
+(``FAST_JSON_RESPONSES``), and a check that both give the same bytes.
+
+    python -m benchmarks.json_responses --rows 100000
+
+API pages stop at 1000 rows, so the 100k-row payload is encoded
+directly, the way FastAPI and ``app.responses.fast_json`` do it for one
+response.
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import responses
+from app.responses import dumps, project
+from app.schemas.appeal import LeadResponse
+from app.schemas.operator import OperatorWithLoad
+
+
+def lead_rows(rows: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "external_id": f"lead_{i}",
+            "name": f"Лид {i}" if i % 3 else None,
+            "phone": f"+7 700 {i:07d}" if i % 2 else None,
+            "email": f"lead{i}@example.com" if i % 5 else None,
+            "appeals_count": rng.randrange(20),
+        }
+        for i in range(1, rows + 1)
+    ]
+
+
+def operator_rows(rows: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Оператор {i}",
+            "is_active": i % 7 != 0,
+            "max_load": 50,
+            "current_load": rng.randrange(51),
+        }
+        for i in range(1, rows + 1)
+    ]
+
+
+def timed(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return body, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    encoder = "orjson" if responses.orjson is not None else "json"
+    print(
+        f"{'schema':>16} {'path':>10} {'rows/s':>12} {'ms':>8}  "
+        f"(fast encoder: {encoder})"
+    )
+    for model, rows in (
+        (LeadResponse, lead_rows(args.rows, rng)),
+        (OperatorWithLoad, operator_rows(args.rows, rng)),
+    ):
+        adapter = TypeAdapter(List[model])
+        validated, validated_s = timed(
+            lambda: adapter.dump_json(adapter.validate_python(rows)),
+            args.repeat
+        )
+        fast, fast_s = timed(lambda: dumps(project(model, rows)), args.repeat)
+        assert fast == validated, f"{model.__name__}: bodies differ"
+
+        for path, seconds in (("validated", validated_s), ("fast", fast_s)):
+            print(
+                f"{model.__name__:>16} {path:>10} {args.rows / seconds:>12,.0f} "
+                f"{seconds * 1000:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Draws per second of the compiled alias sampler vs. the old
+per-request ``random.choices`` selection.
+
+    python -m benchmarks.sampler --draws 200000
+"""
+import argparse
+import random
+import time
+
+from app.state.samplers import AliasSampler
+
+
+def bench_alias(entries, draws: int) -> float:
+    sampler = AliasSampler(entries)
+    loads = {operator_id: 0 for operator_id, _, _ in entries}
+    has_capacity = (
+        lambda operator_id: loads[operator_id] < sampler.max_loads[operator_id]
+    )
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler.draw(has_capacity)
+    return draws / (time.perf_counter() - start)
+
+
+def bench_choices(entries, draws: int) -> float:
+    loads = {operator_id: 0 for operator_id, _, _ in entries}
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        available = []
+        weights = []
+        for operator_id, weight, max_load in entries:
+            if loads[operator_id] >= max_load:
+                continue
+            available.append(operator_id)
+            weights.append(weight)
+        total = sum(weights)
+        random.choices(available, weights=[w / total for w in weights])
+    return draws / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--draws", type=int, default=100_000)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'operators':>10} {'alias draws/s':>15} {'choices draws/s':>16}")
+    for size in args.sizes:
+        entries = [
+            (i, random.randint(1, 100), 10) for i in range(1, size + 1)
+        ]
+        # The old path is O(n) per draw, keep its runtime bounded.
+        choices_draws = max(args.draws * 10 // size, 100)
+        print(
+            f"{size:>10} {bench_alias(entries, args.draws):>15,.0f} "
+            f"{bench_choices(entries, choices_draws):>16,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Replay an arrival/close stream through the real ``AppealService`` on
+an in-memory SQLite database and report throughput, latency, queries per
+appeal and the achieved vs. configured weight share of every operator.
+
+    python -m benchmarks.simulate --operators 50 --sources 10 --appeals 20000
+    python -m benchmarks.simulate --record stream.jsonl --appeals 5000
+    python -m benchmarks.simulate --replay stream.jsonl --max-p99-ms 5
+
+A stream is NDJSON, one event per line:
+
+    {"type": "create", "id": "a1", "source_id": 3, "lead_external_id": "l7"}
+    {"type": "close", "id": "a1"}
+
+``close`` refers to the ``id`` of an earlier ``create``. With
+``--max-*`` thresholds the run exits with status 1 when one is exceeded,
+so it can gate changes to distribution.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Operator, OperatorWeight, Source
+from app.schemas.appeal import AppealCreate
+from app.services.appeal import AppealService
+from app.state import load_ledger, operator_samplers
+
+
+def seed(db, operators: int, sources: int, max_load: int,
+         weights_per_source: int, rng: random.Random) -> Dict[int, dict]:
+    """Create operators, sources and random weights; returns the weights
+    as ``{source_id: {operator_id: weight}}``."""
+    db.execute(
+        insert(Operator),
+        [
+            {"name": f"Operator {i}", "is_active": True, "max_load": max_load}
+            for i in range(operators)
+        ]
+    )
+    db.execute(
+        insert(Source), [{"name": f"Source {i}"} for i in range(sources)]
+    )
+    weights = {}
+    for source_id in range(1, sources + 1):
+        chosen = rng.sample(
+            range(1, operators + 1), min(weights_per_source, operators)
+        )
+        weights[source_id] = {
+            operator_id: rng.randint(1, 100) for operator_id in chosen
+        }
+    db.execute(
+        insert(OperatorWeight),
+        [
+            {"source_id": source_id, "operator_id": operator_id,
+             "weight": weight}
+            for source_id, by_operator in weights.items()
+            for operator_id, weight in by_operator.items()
+        ]
+    )
+    db.commit()
+    return weights
+
+
+def synthetic_stream(appeals: int, sources: int, leads: int,
+                     close_ratio: float, rng: random.Random) -> Iterator[dict]:
+    """Arrivals with a random share of them closed later on."""
+    open_ids: List[str] = []
+    for i in range(appeals):
+        event_id = f"a{i}"
+        yield {
+            "type": "create",
+            "id": event_id,
+            "source_id": rng.randint(1, sources),
+            "lead_external_id": f"lead_{rng.randrange(leads)}",
+        }
+        open_ids.append(event_id)
+        if rng.random() < close_ratio:
+            index = rng.randrange(len(open_ids))
+            open_ids[index], open_ids[-1] = open_ids[-1], open_ids[index]
+            yield {"type": "close", "id": open_ids.pop()}
+
+
+def read_stream(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def simulate(events: Iterable[dict], operators: int = 20, sources: int = 5,
+             max_load: int = 1_000_000, weights_per_source: int = 5,
+             seed_value: int = 0) -> dict:
+    rng = random.Random(seed_value)
+    random.seed(seed_value)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    load_ledger.reset()
+    operator_samplers.reset()
+    weights = seed(db, operators, sources, max_load, weights_per_source, rng)
+
+    statements = 0
+
+    def count(conn, cursor, statement, *args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    service = AppealService(db)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statement_counts: Dict[str, int] = Counter()
+    appeal_ids: Dict[str, int] = {}
+    assigned: Dict[int, Counter] = defaultdict(Counter)
+    unassigned = 0
+
+    start = time.perf_counter()
+    for item in events:
+        kind = item["type"]
+        before = statements
+        began = time.perf_counter()
+        if kind == "create":
+            response = service.create_appeal(
+                AppealCreate(
+                    source_id=item["source_id"],
+                    lead_external_id=item["lead_external_id"]
+                )
+            )
+            appeal_ids[item["id"]] = response.appeal_id
+            if response.operator:
+                assigned[item["source_id"]][response.operator["id"]] += 1
+            else:
+                unassigned += 1
+        elif kind == "close":
+            service.close_appeal(appeal_ids.pop(item["id"]))
+        else:
+            raise ValueError(f"Unknown event type: {kind}")
+        latencies[kind].append(time.perf_counter() - began)
+        statement_counts[kind] += statements - before
+    elapsed = time.perf_counter() - start
+
+    event.remove(engine, "before_cursor_execute", count)
+    db.close()
+    engine.dispose()
+
+    creates = len(latencies["create"])
+    events_total = sum(len(values) for values in latencies.values())
+    return {
+        "events": events_total,
+        "appeals": creates,
+        "unassigned": unassigned,
+        "events_per_second": events_total / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            kind: {
+                "p50": statistics.median(values) * 1000,
+                "p99": percentile(values, 0.99) * 1000,
+            }
+            for kind, values in latencies.items()
+        },
+        "queries_per_appeal": (
+            statement_counts["create"] / creates if creates else 0.0
+        ),
+        "queries_per_close": (
+            statement_counts["close"] / len(latencies["close"])
+            if latencies["close"] else 0.0
+        ),
+        "shares": share_report(weights, assigned),
+    }
+
+
+def share_report(weights: Dict[int, dict],
+                 assigned: Dict[int, Counter]) -> List[dict]:
+    """Configured vs. achieved share of every weighted operator, per
+    source."""
+    report = []
+    for source_id, by_operator in sorted(weights.items()):
+        total_weight = sum(by_operator.values())
+        total_assigned = sum(assigned[source_id].values())
+        for operator_id, weight in sorted(by_operator.items()):
+            achieved = (
+                assigned[source_id][operator_id] / total_assigned
+                if total_assigned else 0.0
+            )
+            report.append(
+                {
+                    "source_id": source_id,
+                    "operator_id": operator_id,
+                    "configured": weight / total_weight,
+                    "achieved": achieved,
+                    "appeals": assigned[source_id][operator_id],
+                }
+            )
+    return report
+
+
+def check_gates(result: dict, max_p99_ms: Optional[float],
+                max_queries: Optional[float],
+                max_share_error: Optional[float]) -> List[str]:
+    failures = []
+    p99 = result["latency_ms"].get("create", {}).get("p99", 0.0)
+    if max_p99_ms is not None and p99 > max_p99_ms:
+        failures.append(f"create p99 {p99:.2f} ms > {max_p99_ms} ms")
+    queries = result["queries_per_appeal"]
+    if max_queries is not None and queries > max_queries:
+        failures.append(f"{queries:.2f} queries per appeal > {max_queries}")
+    if max_share_error is not None:
+        error = max(
+            (abs(s["achieved"] - s["configured"]) for s in result["shares"]),
+            default=0.0
+        )
+        if error > max_share_error:
+            failures.append(
+                f"share error {error:.3f} > {max_share_error}"
+            )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--weights-per-source", type=int, default=5)
+    parser.add_argument("--max-load", type=int, default=1_000_000)
+    parser.add_argument("--appeals", type=int, default=10000)
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--close-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="NDJSON stream to replay")
+    parser.add_argument(
+        "--record", help="write the synthetic stream here and exit"
+    )
+    parser.add_argument("--json", action="store_true",
+                        help="print the full result as JSON")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-queries-per-appeal", type=float)
+    parser.add_argument("--max-share-error", type=float)
+    args = parser.parse_args()
+
+    if args.replay:
+        events = read_stream(args.replay)
+    else:
+        events = synthetic_stream(
+            args.appeals, args.sources, args.leads, args.close_ratio,
+            random.Random(args.seed)
+        )
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as stream:
+            for item in events:
+                stream.write(json.dumps(item) + "\n")
+        return
+
+    result = simulate(
+        events, args.operators, args.sources, args.max_load,
+        args.weights_per_source, args.seed
+    )
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"{result['events']} events ({result['appeals']} appeals, "
+            f"{result['unassigned']} unassigned): "
+            f"{result['events_per_second']:,.0f} events/s"
+        )
+        for kind, latency in result["latency_ms"].items():
+            print(
+                f"  {kind:<6} p50 {latency['p50']:.2f} ms  "
+                f"p99 {latency['p99']:.2f} ms"
+            )
+        print(
+            f"  queries per appeal {result['queries_per_appeal']:.2f}, "
+            f"per close {result['queries_per_close']:.2f}"
+        )
+        print(
+            f"\n{'source':>7} {'operator':>9} {'configured':>11} "
+            f"{'achieved':>9} {'appeals':>8}"
+        )
+        for share in result["shares"]:
+            print(
+                f"{share['source_id']:>7} {share['operator_id']:>9} "
+                f"{share['configured']:>11.3f} {share['achieved']:>9.3f} "
+                f"{share['appeals']:>8}"
+            )
+
+    failures = check_gates(
+        result, args.max_p99_ms, args.max_queries_per_appeal,
+        args.max_share_error
+    )
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""create table distribution_daily_counters
+
+Revision ID: 4c7a2e9f1b36
+Revises: 9d3e5b17c8a2
+Create Date: 2026-10-19 10:12:44.301587
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7a2e9f1b36'
+down_revision: Union[str, Sequence[str], None] = '9d3e5b17c8a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DAY_EXPRESSIONS = {
+    'postgresql': "date_trunc('day', bucket_start)",
+    'sqlite': "strftime('%Y-%m-%d 00:00:00.000000', bucket_start)",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('distribution_daily_counters',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ),
+    sa.PrimaryKeyConstraint('bucket_start', 'source_id', 'operator_id')
+    )
+
+    day = DAY_EXPRESSIONS[op.get_bind().dialect.name]
+    op.execute(
+        "INSERT INTO distribution_daily_counters "
+        "(bucket_start, source_id, operator_id, count) "
+        f"SELECT {day}, source_id, operator_id, SUM(count) "
+        "FROM distribution_hourly_counters "
+        f"GROUP BY {day}, source_id, operator_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('distribution_daily_counters')
@@ -0,0 +1,32 @@
+"""add distribution_counters.version
+
+Revision ID: 9d3e5b17c8a2
+Revises: f2a6c81d4b57
+Create Date: 2026-10-18 21:04:12.550913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e5b17c8a2'
+down_revision: Union[str, Sequence[str], None] = 'f2a6c81d4b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'distribution_counters',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('distribution_counters') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,44 @@
+"""create table distribution_counters
+
+Revision ID: a3f19c6d2e84
+Revises: 7c4e2a91f3b5
+Create Date: 2026-10-18 14:05:17.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f19c6d2e84'
+down_revision: Union[str, Sequence[str], None] = '7c4e2a91f3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('distribution_counters',
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ),
+    sa.PrimaryKeyConstraint('source_id', 'operator_id', 'status')
+    )
+    op.execute(
+        "INSERT INTO distribution_counters "
+        "(source_id, operator_id, status, count) "
+        "SELECT source_id, COALESCE(operator_id, 0), "
+        "COALESCE(status, 'active'), COUNT(*) "
+        "FROM appeals "
+        "GROUP BY source_id, COALESCE(operator_id, 0), "
+        "COALESCE(status, 'active')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('distribution_counters')
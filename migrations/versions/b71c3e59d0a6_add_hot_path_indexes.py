@@ -0,0 +1,57 @@
+"""add hot path indexes
+
+Revision ID: b71c3e59d0a6
+Revises: e5b8d04a7c21
+Create Date: 2026-10-18 17:48:26.904517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71c3e59d0a6'
+down_revision: Union[str, Sequence[str], None] = 'e5b8d04a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_appeals_operator_id_active', 'appeals', ['operator_id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'"),
+        sqlite_where=sa.text("status = 'active'")
+    )
+    op.create_index(
+        'ix_appeals_lead_id_id', 'appeals', ['lead_id', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_appeals_source_id_operator_id', 'appeals',
+        ['source_id', 'operator_id'], unique=False
+    )
+
+    # Keep the latest weight of duplicated (source, operator) pairs
+    op.execute(
+        "DELETE FROM operator_weights WHERE id NOT IN ("
+        "SELECT MAX(id) FROM operator_weights "
+        "GROUP BY source_id, operator_id)"
+    )
+    op.create_index(
+        'ix_operator_weights_source_id_operator_id', 'operator_weights',
+        ['source_id', 'operator_id'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_operator_weights_source_id_operator_id',
+        table_name='operator_weights'
+    )
+    op.drop_index('ix_appeals_source_id_operator_id', table_name='appeals')
+    op.drop_index('ix_appeals_lead_id_id', table_name='appeals')
+    op.drop_index('ix_appeals_operator_id_active', table_name='appeals')
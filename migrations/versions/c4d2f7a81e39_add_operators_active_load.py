@@ -0,0 +1,40 @@
+"""add operators.active_load
+
+Revision ID: c4d2f7a81e39
+Revises: b71c3e59d0a6
+Create Date: 2026-10-18 19:21:53.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2f7a81e39'
+down_revision: Union[str, Sequence[str], None] = 'b71c3e59d0a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'operators',
+        sa.Column(
+            'active_load', sa.Integer(), nullable=False, server_default='0'
+        )
+    )
+    op.execute(
+        "UPDATE operators SET active_load = ("
+        "SELECT COUNT(*) FROM appeals "
+        "WHERE appeals.operator_id = operators.id "
+        "AND appeals.status = 'active')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('operators') as batch_op:
+        batch_op.drop_column('active_load')
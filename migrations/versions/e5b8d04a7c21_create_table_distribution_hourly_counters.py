@@ -0,0 +1,54 @@
+"""create table distribution_hourly_counters
+
+Revision ID: e5b8d04a7c21
+Revises: a3f19c6d2e84
+Create Date: 2026-10-18 15:32:08.116402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8d04a7c21'
+down_revision: Union[str, Sequence[str], None] = 'a3f19c6d2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HOUR_EXPRESSIONS = {
+    'postgresql': "date_trunc('hour', created_at)",
+    'sqlite': "strftime('%Y-%m-%d %H:00:00.000000', created_at)",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_appeals_created_at_source_operator', 'appeals',
+        ['created_at', 'source_id', 'operator_id'], unique=False
+    )
+    op.create_table('distribution_hourly_counters',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('operator_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ),
+    sa.PrimaryKeyConstraint('bucket_start', 'source_id', 'operator_id')
+    )
+
+    hour = HOUR_EXPRESSIONS[op.get_bind().dialect.name]
+    op.execute(
+        "INSERT INTO distribution_hourly_counters "
+        "(bucket_start, source_id, operator_id, count) "
+        f"SELECT {hour}, source_id, COALESCE(operator_id, 0), COUNT(*) "
+        "FROM appeals WHERE created_at IS NOT NULL "
+        f"GROUP BY {hour}, source_id, COALESCE(operator_id, 0)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('distribution_hourly_counters')
+    op.drop_index('ix_appeals_created_at_source_operator', table_name='appeals')
@@ -0,0 +1,37 @@
+"""extend appeals source index for the waiting queue
+
+Revision ID: f2a6c81d4b57
+Revises: c4d2f7a81e39
+Create Date: 2026-10-18 19:12:40.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c81d4b57'
+down_revision: Union[str, Sequence[str], None] = 'c4d2f7a81e39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_appeals_source_operator_status_id', 'appeals',
+        ['source_id', 'operator_id', 'status', 'id'], unique=False
+    )
+    op.drop_index('ix_appeals_source_id_operator_id', table_name='appeals')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_appeals_source_id_operator_id', 'appeals',
+        ['source_id', 'operator_id'], unique=False
+    )
+    op.drop_index(
+        'ix_appeals_source_operator_status_id', table_name='appeals'
+    )
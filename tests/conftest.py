@@ -1,15 +1,33 @@
+import os
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.database import async_database_url
 from app.dependencies import get_db
 from app.models import Base, Operator, Source, Lead, OperatorWeight
+from app.state import (
+    config_cache,
+    load_ledger,
+    operator_samplers,
+    reset_metrics,
+    route_query_stats,
+)
 
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-statement-baseline",
+        action="store_true",
+        help="rewrite tests/benchmark_baseline.json from this run"
+    )
+
+
 @pytest.fixture(scope="session")
 def test_engine():
     engine = create_engine(
@@ -38,6 +56,88 @@ def test_db(test_engine):
         connection.close()
 
 
+@pytest.fixture(scope="function")
+def postgres_db():
+    """Session on the PostgreSQL database in ``TEST_POSTGRES_URL``;
+    the test is skipped when it is not set."""
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    engine = create_engine(url)
+    connection = engine.connect()
+    transaction = connection.begin()
+    Base.metadata.create_all(bind=connection)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=connection)()
+
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    """Client whose routes get an ``AsyncSession`` on aiosqlite, as with
+    ``DATABASE_ASYNC=true``; skipped without the asyncio extras."""
+    pytest.importorskip("greenlet")
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import (
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    engine = create_async_engine(async_database_url(url))
+    sessions = async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+        test_client.portal.call(engine.dispose)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    load_ledger.reset()
+    operator_samplers.reset()
+    route_query_stats.reset()
+    reset_metrics()
+    config_cache.reset()
+    yield
+    load_ledger.reset()
+    operator_samplers.reset()
+    route_query_stats.reset()
+    reset_metrics()
+    config_cache.reset()
+
+
+@pytest.fixture
+def query_counter(test_engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="function")
 def client(test_db):
     def override_get_db():
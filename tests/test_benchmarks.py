@@ -0,0 +1,215 @@
+"""Hot-path benchmarks at several data sizes.
+
+Every hot path runs once to warm process-local caches, once more with
+its SQL statements counted, and then under pytest-benchmark. The count
+must not exceed the ceiling in ``benchmark_baseline.json``; since the
+same ceiling applies at every size, an N+1 query fails here with the
+offending statements listed.
+
+    pytest tests/test_benchmarks.py --benchmark-autosave
+    pytest tests/test_benchmarks.py --benchmark-compare \\
+        --benchmark-compare-fail=mean:25%
+    pytest tests/test_benchmarks.py --update-statement-baseline
+
+``BENCH_SIZES`` (comma separated) overrides the appeal counts.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Appeal, Lead, Operator, OperatorWeight, Source
+from app.repositories import (
+    DistributionCounterRepository,
+    LeadRepository,
+    OperatorRepository,
+    SourceRepository,
+)
+from app.schemas.appeal import AppealCreate
+from app.schemas.source import WeightConfig
+from app.services import AppealService, DistributionService
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.perf
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+BASELINE = json.loads(BASELINE_PATH.read_text())
+SIZES = [
+    int(size)
+    for size in os.environ.get("BENCH_SIZES", "100,1000,10000,100000")
+    .split(",")
+]
+OPERATORS = 50
+SOURCES = 10
+WEIGHTS_PER_SOURCE = 10
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}")
+def seeded_db(request, test_engine):
+    """Session over ``size`` appeals, rolled back when the size is done."""
+    size = request.param
+    rng = random.Random(size)
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    db = sessionmaker(autocommit=False, autoflush=False, bind=connection)()
+
+    db.execute(
+        insert(Operator),
+        [
+            {"name": f"Bench {i}", "is_active": True, "max_load": 10 ** 9}
+            for i in range(OPERATORS)
+        ]
+    )
+    db.execute(
+        insert(Source),
+        [{"name": f"Bench source {i}"} for i in range(SOURCES)]
+    )
+    db.execute(
+        insert(OperatorWeight),
+        [
+            {
+                "source_id": source_id,
+                "operator_id": operator_id,
+                "weight": rng.randint(1, 100),
+            }
+            for source_id in range(1, SOURCES + 1)
+            for operator_id in rng.sample(
+                range(1, OPERATORS + 1), WEIGHTS_PER_SOURCE
+            )
+        ]
+    )
+    leads = max(size // 10, 1)
+    db.execute(
+        insert(Lead), [{"external_id": f"bench_{i}"} for i in range(leads)]
+    )
+    start = datetime.utcnow() - timedelta(days=30)
+    db.execute(
+        insert(Appeal),
+        [
+            {
+                "lead_id": rng.randint(1, leads),
+                "source_id": rng.randint(1, SOURCES),
+                "operator_id": rng.randint(1, OPERATORS),
+                "status": rng.choice(("active", "closed")),
+                "created_at": start + timedelta(
+                    seconds=rng.randrange(30 * 24 * 3600)
+                ),
+            }
+            for _ in range(size)
+        ]
+    )
+    db.commit()
+    DistributionCounterRepository(db).reconcile(repair=True)
+
+    yield db
+
+    db.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session")
+def measured_statements(request):
+    measured = {}
+    yield measured
+    if request.config.getoption("--update-statement-baseline"):
+        BASELINE_PATH.write_text(
+            json.dumps(
+                {name: max(counts.values())
+                 for name, counts in sorted(measured.items())},
+                indent=2
+            ) + "\n"
+        )
+
+
+@pytest.fixture
+def run_hot_path(
+    benchmark, seeded_db, query_counter, measured_statements, request
+):
+    def run(name, call):
+        call()
+        query_counter.clear()
+        call()
+        statements = list(query_counter)
+        size = request.node.callspec.params["seeded_db"]
+        measured_statements.setdefault(name, {})[size] = len(statements)
+
+        if not request.config.getoption("--update-statement-baseline"):
+            ceiling = BASELINE.get(name)
+            assert ceiling is not None, (
+                f"No statement baseline for {name}; run with "
+                f"--update-statement-baseline"
+            )
+            assert len(statements) <= ceiling, (
+                f"{name} at {size} appeals: {len(statements)} statements, "
+                f"baseline {ceiling}\n" + "\n---\n".join(statements)
+            )
+
+        benchmark(call)
+
+    return run
+
+
+def test_select_operator(seeded_db, run_hot_path):
+    service = DistributionService(seeded_db)
+    run_hot_path("select_operator", lambda: service.select_operator(1))
+
+
+def test_create_appeal(seeded_db, run_hot_path):
+    service = AppealService(seeded_db)
+    counter = iter(range(10 ** 9))
+    run_hot_path(
+        "create_appeal",
+        lambda: service.create_appeal(
+            AppealCreate(
+                lead_external_id=f"bench_new_{next(counter)}",
+                source_id=1
+            )
+        )
+    )
+
+
+def test_get_distribution_stats(seeded_db, run_hot_path):
+    repo = DistributionCounterRepository(seeded_db)
+    run_hot_path("get_distribution_stats", repo.get_distribution_stats)
+
+
+def test_get_distribution_stats_by_day(seeded_db, run_hot_path):
+    repo = DistributionCounterRepository(seeded_db)
+    end = datetime.utcnow()
+    run_hot_path(
+        "get_bucketed_stats_day",
+        lambda: repo.get_bucketed_stats(
+            "day", end - timedelta(days=90), end
+        )
+    )
+
+
+def test_get_all_with_load(seeded_db, run_hot_path):
+    repo = OperatorRepository(seeded_db)
+    run_hot_path("get_all_with_load", lambda: repo.get_all_with_load())
+
+
+def test_get_all_with_appeals_count(seeded_db, run_hot_path):
+    repo = LeadRepository(seeded_db)
+    run_hot_path(
+        "get_all_with_appeals_count",
+        lambda: repo.get_all_with_appeals_count(after=0, limit=100)
+    )
+
+
+def test_configure_weights(seeded_db, run_hot_path):
+    repo = SourceRepository(seeded_db)
+    weights = [
+        WeightConfig(operator_id=operator_id, weight=operator_id)
+        for operator_id in range(1, WEIGHTS_PER_SOURCE + 1)
+    ]
+    run_hot_path(
+        "configure_weights", lambda: repo.configure_weights(1, weights)
+    )
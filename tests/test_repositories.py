@@ -1,9 +1,11 @@
 import pytest
+from sqlalchemy import event, text
 from app.repositories import (
     OperatorRepository,
     SourceRepository,
     LeadRepository,
     AppealRepository,
+    DistributionCounterRepository,
 )
 from app.schemas.operator import OperatorCreate, OperatorUpdate
 from app.schemas.source import SourceCreate, WeightConfig
@@ -63,6 +65,41 @@ class TestOperatorRepository:
         assert updated.max_load == 20
         assert updated.name == test_operator.name
 
+    def test_reserve_and_release(self, test_db, test_operators):
+        repo = OperatorRepository(test_db)
+        operator, inactive = test_operators[0], test_operators[2]
+
+        reserved = [repo.reserve(operator.id) for _ in range(6)]
+        too_many = repo.reserve(operator.id, operator.max_load)
+        repo.release(operator.id, 2)
+        after_release = repo.reserve(operator.id, 2)
+
+        assert reserved == [True] * 5 + [False]
+        assert too_many is False
+        assert after_release is True
+        assert repo.reserve(inactive.id) is False
+        repo.release(inactive.id)
+        test_db.expire_all()
+        assert operator.active_load == operator.max_load
+        assert inactive.active_load == 0
+
+    def test_close_releases_reservation(
+        self, test_db, test_operator, test_lead, test_source
+    ):
+        repo = OperatorRepository(test_db)
+        appeal_repo = AppealRepository(test_db)
+        repo.reserve(test_operator.id)
+        appeal = appeal_repo.create(
+            lead_id=test_lead.id,
+            source_id=test_source.id,
+            operator_id=test_operator.id
+        )
+
+        appeal_repo.close(appeal.id)
+
+        test_db.refresh(test_operator)
+        assert test_operator.active_load == 0
+
     def test_get_current_load(
         self, test_db, test_operator, test_lead, test_source
     ):
@@ -94,16 +131,14 @@ class TestOperatorRepository:
         self, test_db, test_operators, test_lead, test_source
     ):
         repo = OperatorRepository(test_db)
+        appeal_repo = AppealRepository(test_db)
 
         for i in range(2):
-            appeal = Appeal(
+            appeal_repo.create(
                 lead_id=test_lead.id,
                 source_id=test_source.id,
-                operator_id=test_operators[0].id,
-                status="active"
+                operator_id=test_operators[0].id
             )
-            test_db.add(appeal)
-        test_db.commit()
 
         operators_with_load = repo.get_all_with_load()
 
@@ -111,6 +146,32 @@ class TestOperatorRepository:
         assert operators_with_load[0]["current_load"] == 2
         assert operators_with_load[1]["current_load"] == 0
 
+    def test_get_all_with_load_filters(
+        self, test_db, test_operators, test_lead, test_source, query_counter
+    ):
+        repo = OperatorRepository(test_db)
+        appeal_repo = AppealRepository(test_db)
+        for i in range(test_operators[0].max_load):
+            appeal_repo.create(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=test_operators[0].id
+            )
+        ids = [op.id for op in test_operators]
+        query_counter.clear()
+
+        full = repo.get_all_with_load(has_capacity=False)
+        free_active = repo.get_all_with_load(
+            is_active=True, has_capacity=True
+        )
+        page = repo.get_all_with_load(after=ids[0], limit=1)
+
+        assert [op["id"] for op in full] == [ids[0]]
+        assert full[0]["current_load"] == test_operators[0].max_load
+        assert [op["id"] for op in free_active] == [ids[1]]
+        assert [op["id"] for op in page] == [ids[1]]
+        assert len(query_counter) == 3
+
 
 class TestSourceRepository:
 
@@ -189,6 +250,111 @@ class TestSourceRepository:
             repo.configure_weights(test_source.id, weights)
 
 
+class TestConfigCache:
+
+    def test_steady_state_intake_reads_no_config(
+        self, test_db, test_source_with_weights, query_counter
+    ):
+        from app.schemas.appeal import AppealCreate
+        from app.services import AppealService
+        service = AppealService(test_db)
+        source_id = test_source_with_weights.id
+        service.create_appeal(
+            AppealCreate(lead_external_id="warm_up", source_id=source_id)
+        )
+        query_counter.clear()
+
+        for i in range(5):
+            service.create_appeal(
+                AppealCreate(lead_external_id=f"lead_{i}", source_id=source_id)
+            )
+
+        config_reads = [
+            statement for statement in query_counter
+            if statement.lstrip().startswith("SELECT") and any(
+                f"FROM {table}" in statement
+                for table in (
+                    "sources", "operators", "operator_weights",
+                    "config_version"
+                )
+            )
+        ]
+        assert config_reads == []
+
+    def test_get_by_id_served_from_cache(
+        self, test_db, test_source, test_operator, query_counter
+    ):
+        SourceRepository(test_db).get_by_id(test_source.id)
+        OperatorRepository(test_db).get_by_id(test_operator.id)
+        test_db.expunge_all()
+        query_counter.clear()
+
+        source = SourceRepository(test_db).get_by_id(test_source.id)
+        operator = OperatorRepository(test_db).get_by_id(test_operator.id)
+
+        assert source.name == test_source.name
+        assert operator.max_load == test_operator.max_load
+        assert query_counter == []
+
+    def test_operator_load_is_not_cached(self, test_db, test_operator):
+        repo = OperatorRepository(test_db)
+        operator_id = test_operator.id
+        repo.get_by_id(operator_id)
+        repo.reserve(operator_id, 2)
+        test_db.commit()
+        test_db.expunge_all()
+
+        assert repo.get_by_id(operator_id).active_load == 2
+
+    def test_update_invalidates_operator(self, test_db, test_operator):
+        repo = OperatorRepository(test_db)
+        operator_id = test_operator.id
+        repo.get_by_id(operator_id)
+
+        repo.update(operator_id, OperatorUpdate(max_load=42))
+        test_db.expunge_all()
+
+        assert repo.get_by_id(operator_id).max_load == 42
+
+    def test_change_from_another_worker_clears_cache(
+        self, test_db, test_source
+    ):
+        from sqlalchemy.orm import Session
+        from app.state import ConfigCache
+        from app.state.config_version import bump_config_version
+        cache = ConfigCache(poll_interval=0)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return {"name": "cached"}
+
+        cache.get(test_db, ("source", test_source.id), load)
+        cache.get(test_db, ("source", test_source.id), load)
+        assert len(loads) == 1
+
+        other = Session(bind=test_db.get_bind())
+        bump_config_version(other)
+        other.commit()
+        other.close()
+
+        cache.get(test_db, ("source", test_source.id), load)
+        assert len(loads) == 2
+
+    def test_least_recently_used_entry_is_evicted(self, test_db):
+        from app.state import ConfigCache
+        cache = ConfigCache(max_size=2)
+        cache.get(test_db, "a", lambda: 1)
+        cache.get(test_db, "b", lambda: 2)
+        cache.get(test_db, "a", lambda: None)
+
+        cache.get(test_db, "c", lambda: 3)
+
+        assert len(cache) == 2
+        assert cache.get(test_db, "a", lambda: "reloaded") == 1
+        assert cache.get(test_db, "b", lambda: "reloaded") == "reloaded"
+
+
 class TestLeadRepository:
 
     def test_get_or_create_new_lead(self, test_db):
@@ -215,6 +381,33 @@ class TestLeadRepository:
         assert lead.id == test_lead.id
         assert lead.name == test_lead.name
 
+    def test_get_or_insert_new_lead(self, test_db):
+        repo = LeadRepository(test_db)
+
+        lead = repo.get_or_insert(
+            external_id="upsert_user", name="Upsert User"
+        )
+
+        assert lead.id is not None
+        assert lead.name == "Upsert User"
+
+    def test_get_or_insert_existing_lead(
+        self, test_db, test_lead, query_counter
+    ):
+        repo = LeadRepository(test_db)
+        external_id = test_lead.external_id
+        query_counter.clear()
+
+        lead = repo.get_or_insert(
+            external_id=external_id,
+            name="Different Name"
+        )
+
+        assert lead.id == test_lead.id
+        assert lead.name == "Test Lead"
+        assert len(query_counter) == 1
+        assert query_counter[0].startswith("SELECT")
+
     def test_get_by_id(self, test_db, test_lead):
         repo = LeadRepository(test_db)
 
@@ -243,8 +436,27 @@ class TestLeadRepository:
         assert leads[0]["id"] == test_lead.id
         assert leads[0]["appeals_count"] == 3
 
+    def test_get_all_with_appeals_count_keyset(
+        self, test_db, test_source, query_counter
+    ):
+        from app.models import Lead
+        leads = [Lead(external_id=f"keyset_{i}") for i in range(4)]
+        test_db.add_all(leads)
+        test_db.flush()
+        test_db.add(Appeal(lead_id=leads[2].id, source_id=test_source.id))
+        test_db.commit()
+        ids = [lead.id for lead in leads]
+        repo = LeadRepository(test_db)
+        query_counter.clear()
+
+        page = repo.get_all_with_appeals_count(after=ids[0], limit=2)
+
+        assert [lead["id"] for lead in page] == ids[1:3]
+        assert [lead["appeals_count"] for lead in page] == [0, 1]
+        assert len(query_counter) == 1
+
     def test_get_lead_appeals(
-        self, test_db, test_lead, test_source, test_operator
+        self, test_db, test_lead, test_source, test_operator, query_counter
     ):
         repo = LeadRepository(test_db)
 
@@ -257,10 +469,14 @@ class TestLeadRepository:
             test_db.add(appeal)
         test_db.commit()
 
-        appeals = repo.get_lead_appeals(test_lead.id)
+        lead_id = test_lead.id
+        query_counter.clear()
+        appeals = repo.get_lead_appeals(lead_id)
 
+        assert len(query_counter) == 1
         assert len(appeals) == 2
-        assert all(a.lead_id == test_lead.id for a in appeals)
+        assert appeals[0]["source"] == "Test Source"
+        assert appeals[0]["operator"] == "Test Operator"
 
 
 class TestAppealRepository:
@@ -330,6 +546,38 @@ class TestAppealRepository:
         closed = repo.get_by_id(appeal.id)
         assert closed.status == "closed"
 
+    def test_concurrent_close_releases_once(
+        self, test_db, test_lead, test_source, test_operator
+    ):
+        from sqlalchemy.orm import Session
+        from app.models import DistributionCounter, Operator
+        repo = AppealRepository(test_db)
+        OperatorRepository(test_db).reserve(test_operator.id, 2)
+        appeals = [
+            repo.create(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=test_operator.id
+            )
+            for _ in range(2)
+        ]
+        other = Session(bind=test_db.connection())
+        # the other worker has already read the appeal as active
+        stale = other.get(Appeal, appeals[0].id)
+        assert stale.status == "active"
+
+        assert repo.close(appeals[0].id) is True
+        assert AppealRepository(other).close(appeals[0].id) is True
+
+        other.close()
+        test_db.expire_all()
+        assert test_db.get(Operator, test_operator.id).active_load == 1
+        counts = {
+            row.status: row.count
+            for row in test_db.query(DistributionCounter)
+        }
+        assert counts == {"active": 1, "closed": 1}
+
     def test_close_nonexistent_appeal(self, test_db):
         repo = AppealRepository(test_db)
 
@@ -365,3 +613,566 @@ class TestAppealRepository:
         assert stats[0]["source_id"] == test_source.id
         assert stats[0]["total_appeals"] == 5
         assert len(stats[0]["operators"]) == 2
+
+    def test_get_distribution_stats_includes_unassigned_and_empty(
+        self, test_db, test_source, test_operators, test_lead
+    ):
+        from app.models import Source
+        empty_source = Source(name="Empty Source")
+        test_db.add(empty_source)
+        test_db.add_all(
+            [
+                Appeal(
+                    lead_id=test_lead.id,
+                    source_id=test_source.id,
+                    operator_id=test_operators[1].id
+                ),
+                Appeal(
+                    lead_id=test_lead.id,
+                    source_id=test_source.id,
+                    operator_id=None
+                ),
+                Appeal(
+                    lead_id=test_lead.id,
+                    source_id=test_source.id,
+                    operator_id=test_operators[0].id
+                ),
+            ]
+        )
+        test_db.commit()
+
+        stats = AppealRepository(test_db).get_distribution_stats()
+
+        assert stats == [
+            {
+                "source_id": test_source.id,
+                "source_name": test_source.name,
+                "total_appeals": 3,
+                "operators": [
+                    {
+                        "operator_id": test_operators[1].id,
+                        "operator_name": test_operators[1].name,
+                        "appeals_count": 1
+                    },
+                    {
+                        "operator_id": test_operators[0].id,
+                        "operator_name": test_operators[0].name,
+                        "appeals_count": 1
+                    },
+                ]
+            },
+            {
+                "source_id": empty_source.id,
+                "source_name": "Empty Source",
+                "total_appeals": 0,
+                "operators": []
+            },
+        ]
+
+    def test_get_distribution_stats_statement_count(
+        self, test_db, test_source, test_operators, test_lead, query_counter
+    ):
+        repo = AppealRepository(test_db)
+        test_db.add_all(
+            [
+                Appeal(
+                    lead_id=test_lead.id,
+                    source_id=test_source.id,
+                    operator_id=operator.id
+                )
+                for operator in test_operators
+            ]
+        )
+        test_db.commit()
+        query_counter.clear()
+
+        repo.get_distribution_stats()
+
+        assert len(query_counter) == 1
+
+    def test_iter_export_yields_chunks(self, test_db, test_lead, test_source):
+        repo = AppealRepository(test_db)
+        for _ in range(5):
+            repo.create(
+                lead_id=test_lead.id, source_id=test_source.id,
+                operator_id=None
+            )
+
+        chunks = list(repo.iter_export(chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        row = chunks[0][0]
+        assert row.source == test_source.name
+        assert row.operator is None
+        assert row.lead_external_id == test_lead.external_id
+
+
+class TestWaitingQueue:
+
+    def _setup(self, test_db, test_lead, max_load, is_active=True):
+        operator = OperatorRepository(test_db).create(
+            OperatorCreate(name="Queue", max_load=max_load, is_active=is_active)
+        )
+        sources = SourceRepository(test_db)
+        source = sources.create(SourceCreate(name="Weighted"))
+        second = sources.create(SourceCreate(name="Weighted too"))
+        other = sources.create(SourceCreate(name="Unweighted"))
+        for source_id in (source.id, second.id):
+            sources.configure_weights(
+                source_id, [WeightConfig(operator_id=operator.id, weight=1)]
+            )
+        appeals = AppealRepository(test_db)
+        # Oldest first: the queue is FIFO across the operator's sources
+        waiting = [
+            appeals.create(
+                lead_id=test_lead.id,
+                source_id=source_id,
+                operator_id=None
+            ).id
+            for source_id in (other.id, source.id, second.id, source.id)
+        ]
+        return operator, appeals, waiting
+
+    def test_close_assigns_oldest_waiting_appeal(self, test_db, test_lead):
+        operator, appeals, waiting = self._setup(test_db, test_lead, 1)
+        OperatorRepository(test_db).reserve(operator.id)
+        busy = appeals.create(
+            lead_id=test_lead.id,
+            source_id=appeals.get_by_id(waiting[1]).source_id,
+            operator_id=operator.id
+        )
+
+        appeals.close(busy.id)
+
+        assigned = [
+            appeals.get_by_id(appeal_id).operator_id for appeal_id in waiting
+        ]
+        assert assigned == [None, operator.id, None, None]
+        test_db.refresh(operator)
+        assert operator.active_load == 1
+        assert DistributionCounterRepository(test_db).reconcile() == []
+
+    def test_new_weights_drain_the_queue(self, test_db, test_lead):
+        operator, appeals, waiting = self._setup(test_db, test_lead, 2)
+        # Nothing was assigned yet: the weights came before the appeals
+        other_id = appeals.get_by_id(waiting[0]).source_id
+
+        SourceRepository(test_db).configure_weights(
+            other_id, [WeightConfig(operator_id=operator.id, weight=1)]
+        )
+
+        assigned = [
+            appeals.get_by_id(appeal_id).operator_id for appeal_id in waiting
+        ]
+        assert assigned == [operator.id, operator.id, None, None]
+        test_db.refresh(operator)
+        assert operator.active_load == 2
+        assert DistributionCounterRepository(test_db).reconcile() == []
+
+    def test_close_of_waiting_appeal_assigns_nothing(
+        self, test_db, test_lead
+    ):
+        operator, appeals, waiting = self._setup(test_db, test_lead, 1)
+
+        appeals.close(waiting[1])
+
+        assert all(
+            appeals.get_by_id(appeal_id).operator_id is None
+            for appeal_id in waiting
+        )
+
+    def test_reactivated_operator_takes_waiting_appeals(
+        self, test_db, test_lead
+    ):
+        operator, appeals, waiting = self._setup(
+            test_db, test_lead, 2, is_active=False
+        )
+
+        OperatorRepository(test_db).update(
+            operator.id, OperatorUpdate(is_active=True)
+        )
+
+        assigned = [
+            appeals.get_by_id(appeal_id).operator_id for appeal_id in waiting
+        ]
+        assert assigned == [None, operator.id, operator.id, None]
+        assert operator.active_load == 2
+        assert DistributionCounterRepository(test_db).reconcile() == []
+
+    def test_raised_max_load_takes_waiting_appeals(self, test_db, test_lead):
+        operator, appeals, waiting = self._setup(test_db, test_lead, 0)
+
+        OperatorRepository(test_db).update(
+            operator.id, OperatorUpdate(max_load=5)
+        )
+
+        assert [
+            appeals.get_by_id(appeal_id).operator_id for appeal_id in waiting
+        ] == [None, operator.id, operator.id, operator.id]
+
+
+class TestDistributionCounterRepository:
+
+    @staticmethod
+    def _sorted(stats):
+        for source_stats in stats:
+            source_stats["operators"].sort(key=lambda op: op["operator_id"])
+        return stats
+
+    def test_counters_follow_appeals(
+        self, test_db, test_source, test_operators, test_lead
+    ):
+        appeal_repo = AppealRepository(test_db)
+        repo = DistributionCounterRepository(test_db)
+        # Slots the distribution service would have reserved
+        OperatorRepository(test_db).reserve(test_operators[0].id)
+        OperatorRepository(test_db).reserve(test_operators[1].id, 3)
+
+        first = appeal_repo.create(
+            lead_id=test_lead.id,
+            source_id=test_source.id,
+            operator_id=test_operators[0].id
+        )
+        appeal_repo.create(
+            lead_id=test_lead.id,
+            source_id=test_source.id,
+            operator_id=None
+        )
+        appeal_repo.create_many(
+            [
+                {
+                    "lead_id": test_lead.id,
+                    "source_id": test_source.id,
+                    "operator_id": test_operators[1].id,
+                    "message": None
+                }
+                for _ in range(3)
+            ]
+        )
+        test_db.commit()
+        appeal_repo.close(first.id)
+        appeal_repo.close(first.id)
+
+        assert self._sorted(repo.get_distribution_stats()) == \
+            self._sorted(appeal_repo.get_distribution_stats())
+        assert repo.reconcile() == []
+
+    def test_reconcile_repairs_drift(
+        self, test_db, test_source, test_operator, test_lead
+    ):
+        repo = DistributionCounterRepository(test_db)
+        OperatorRepository(test_db).reserve(test_operator.id)
+        appeal = AppealRepository(test_db).create(
+            lead_id=test_lead.id,
+            source_id=test_source.id,
+            operator_id=test_operator.id
+        )
+        # Written around the repository, so the counters miss it.
+        test_db.add(
+            Appeal(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=test_operator.id,
+                status="closed",
+                created_at=appeal.created_at
+            )
+        )
+        test_db.commit()
+
+        drift = repo.reconcile()
+
+        assert [
+            (
+                entry["table"], entry.get("status"),
+                entry["expected"], entry["actual"]
+            )
+            for entry in drift
+        ] == [
+            ("distribution_counters", "closed", 1, 0),
+            ("distribution_hourly_counters", None, 2, 1),
+            ("distribution_daily_counters", None, 2, 1),
+        ]
+        assert repo.reconcile(repair=True) == drift
+        assert repo.reconcile() == []
+        assert repo.get_distribution_stats()[0]["total_appeals"] == 2
+
+    def test_reconcile_repairs_active_load(self, test_db, test_operator):
+        from app.models import Operator
+        repo = DistributionCounterRepository(test_db)
+        test_db.query(Operator).filter(Operator.id == test_operator.id) \
+            .update({"active_load": 4})
+        test_db.commit()
+
+        drift = repo.reconcile(repair=True)
+
+        assert drift == [
+            {
+                "table": "operators",
+                "operator_id": test_operator.id,
+                "expected": 0,
+                "actual": 4
+            }
+        ]
+        test_db.refresh(test_operator)
+        assert test_operator.active_load == 0
+
+    def test_versions_change_with_every_counter_write(
+        self, test_db, test_source, test_operator, test_lead
+    ):
+        repo = DistributionCounterRepository(test_db)
+        appeals = AppealRepository(test_db)
+        versions = [repo.get_versions()]
+
+        appeal = appeals.create(
+            lead_id=test_lead.id, source_id=test_source.id,
+            operator_id=test_operator.id
+        )
+        versions.append(repo.get_versions())
+        appeals.close(appeal.id)
+        versions.append(repo.get_versions())
+        test_db.query(Appeal).delete()
+        test_db.commit()
+        repo.reconcile(repair=True)
+        versions.append(repo.get_versions())
+
+        assert len(set(versions)) == len(versions)
+        # the repair deletes emptied rows and bumps the config version
+        assert versions[-1][0] > versions[-2][0]
+
+    @staticmethod
+    def _seed_timeline(test_db, source, operators, lead):
+        from datetime import datetime
+        for created_at, operator in [
+            (datetime(2026, 1, 5, 10, 15), operators[0]),
+            (datetime(2026, 1, 5, 10, 45), operators[1]),
+            (datetime(2026, 1, 5, 11, 30), operators[0]),
+            (datetime(2026, 1, 6, 9, 0), None),
+        ]:
+            test_db.add(
+                Appeal(
+                    lead_id=lead.id,
+                    source_id=source.id,
+                    operator_id=operator.id if operator else None,
+                    created_at=created_at
+                )
+            )
+        test_db.commit()
+        DistributionCounterRepository(test_db).reconcile(repair=True)
+
+    def test_get_distribution_stats_for_range(
+        self, test_db, test_source, test_operators, test_lead
+    ):
+        from datetime import datetime
+        self._seed_timeline(test_db, test_source, test_operators, test_lead)
+        repo = DistributionCounterRepository(test_db)
+
+        partial = repo.get_distribution_stats(
+            datetime(2026, 1, 5, 10, 30), datetime(2026, 1, 5, 11, 45)
+        )
+        whole = repo.get_distribution_stats(
+            datetime(2026, 1, 5), datetime(2026, 1, 7)
+        )
+        inside_hour = repo.get_distribution_stats(
+            datetime(2026, 1, 5, 10, 10), datetime(2026, 1, 5, 10, 20)
+        )
+
+        assert partial[0]["total_appeals"] == 2
+        assert sorted(
+            (op["operator_id"], op["appeals_count"])
+            for op in partial[0]["operators"]
+        ) == [(test_operators[0].id, 1), (test_operators[1].id, 1)]
+        assert whole[0]["total_appeals"] == 4
+        assert inside_hour[0]["total_appeals"] == 1
+
+    def test_get_bucketed_stats(
+        self, test_db, test_source, test_operators, test_lead
+    ):
+        from datetime import datetime
+        self._seed_timeline(test_db, test_source, test_operators, test_lead)
+        repo = DistributionCounterRepository(test_db)
+
+        def totals(buckets):
+            return [
+                (b["bucket_start"], b["sources"][0]["total_appeals"])
+                for b in buckets
+            ]
+
+        assert totals(repo.get_bucketed_stats("day")) == [
+            (datetime(2026, 1, 5), 3),
+            (datetime(2026, 1, 6), 1),
+        ]
+        assert totals(repo.get_bucketed_stats("week")) == [
+            (datetime(2026, 1, 5), 4),
+        ]
+        assert totals(
+            repo.get_bucketed_stats(
+                "hour", start=datetime(2026, 1, 5, 10, 30)
+            )
+        ) == [
+            (datetime(2026, 1, 5, 10), 1),
+            (datetime(2026, 1, 5, 11), 1),
+            (datetime(2026, 1, 6, 9), 1),
+        ]
+
+    def test_range_stats_statement_count(
+        self, test_db, test_source, test_operators, test_lead, query_counter
+    ):
+        from datetime import datetime
+        self._seed_timeline(test_db, test_source, test_operators, test_lead)
+        repo = DistributionCounterRepository(test_db)
+        query_counter.clear()
+
+        repo.get_distribution_stats(
+            datetime(2026, 1, 5, 10, 30), datetime(2026, 1, 6, 9, 30)
+        )
+
+        # hourly counters, two partial-hour edges, source and operator names
+        assert len(query_counter) == 5
+
+    def test_range_stats_combine_days_hours_and_edges(
+        self, test_db, test_source, test_operators, test_lead, query_counter
+    ):
+        import random
+        from collections import Counter
+        from datetime import datetime, timedelta
+        from app.repositories.distribution_counter import truncate
+        rng = random.Random(7)
+        origin = datetime(2026, 1, 1)
+        created = [
+            origin + timedelta(minutes=rng.randrange(14 * 24 * 60))
+            for _ in range(300)
+        ]
+        for created_at in created:
+            test_db.add(
+                Appeal(
+                    lead_id=test_lead.id,
+                    source_id=test_source.id,
+                    operator_id=test_operators[0].id,
+                    created_at=created_at
+                )
+            )
+        test_db.commit()
+        repo = DistributionCounterRepository(test_db)
+        repo.reconcile(repair=True)
+
+        for _ in range(10):
+            start, end = sorted(
+                origin + timedelta(minutes=rng.randrange(14 * 24 * 60))
+                for _ in range(2)
+            )
+            for bucket in ("hour", "day", "week"):
+                expected = Counter(
+                    truncate(created_at, bucket) for created_at in created
+                    if start <= created_at < end
+                )
+                buckets = repo.get_bucketed_stats(bucket, start, end)
+                assert {
+                    b["bucket_start"]: b["sources"][0]["total_appeals"]
+                    for b in buckets
+                } == expected
+
+        query_counter.clear()
+        repo.get_distribution_stats(
+            datetime(2026, 1, 2, 10, 30), datetime(2026, 1, 9, 9, 30)
+        )
+        # daily counters, hourly counters and a partial hour at each
+        # edge, source and operator names
+        assert len(query_counter) == 7
+
+
+class TestQueryPlans:
+    """Hot-path queries must be answered from the indexes declared on the
+    models. Runs on SQLite, and on PostgreSQL when TEST_POSTGRES_URL is
+    set."""
+
+    @pytest.fixture(params=["test_db", "postgres_db"])
+    def plan_db(self, request):
+        from app.models import Lead, Operator, Source
+        db = request.getfixturevalue(request.param)
+        if db.get_bind().dialect.name == "postgresql":
+            # Tables are tiny here; make the planner show index usage
+            db.execute(text("SET enable_seqscan = off"))
+        db.add_all(
+            [
+                Lead(external_id="plan_lead"),
+                Operator(name="Plan Operator"),
+                Source(name="Plan Source"),
+            ]
+        )
+        db.flush()
+        return db
+
+    @staticmethod
+    def _plans(db, call):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, *args):
+            statements.append((statement, parameters))
+
+        engine = db.get_bind().engine
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            call()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        connection = db.connection()
+        explain = (
+            "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite"
+            else "EXPLAIN "
+        )
+        return " ".join(
+            str(row[-1])
+            for statement, parameters in statements
+            for row in connection.exec_driver_sql(
+                explain + statement, parameters
+            )
+        )
+
+    def test_load_ledger_warm_uses_active_index(self, plan_db):
+        from app.state import load_ledger
+        plan = self._plans(plan_db, lambda: load_ledger.warm(plan_db))
+
+        assert "ix_appeals_operator_id_active" in plan
+
+    def test_waiting_queue_uses_source_index(self, plan_db):
+        from app.models import OperatorWeight
+        plan_db.add(OperatorWeight(source_id=1, operator_id=1, weight=1))
+        plan_db.flush()
+        plan = self._plans(
+            plan_db, lambda: AppealRepository(plan_db).get_waiting(1, 1)
+        )
+
+        assert "ix_appeals_source_operator_status_id" in plan
+
+    def test_current_load_uses_active_index(self, plan_db):
+        plan = self._plans(
+            plan_db, lambda: OperatorRepository(plan_db).get_current_load(1)
+        )
+
+        assert "ix_appeals_operator_id_active" in plan
+
+    def test_lead_history_uses_lead_index(self, plan_db):
+        repo = LeadRepository(plan_db)
+        plan = self._plans(plan_db, lambda: repo.get_lead_appeals(1))
+        page_plan = self._plans(
+            plan_db, lambda: repo.get_all_with_appeals_count(limit=10)
+        )
+
+        assert "ix_appeals_lead_id_id" in plan
+        assert "ix_appeals_lead_id_id" in page_plan
+
+    def test_sampler_uses_weights_index(self, plan_db):
+        from app.state import operator_samplers
+        plan = self._plans(
+            plan_db, lambda: operator_samplers.get(plan_db, 1)
+        )
+
+        assert "ix_operator_weights_source_id_operator_id" in plan
+
+    def test_distribution_stats_uses_source_index(self, plan_db):
+        plan = self._plans(
+            plan_db, AppealRepository(plan_db).get_distribution_stats
+        )
+
+        assert "ix_appeals_source_operator_status_id" in plan
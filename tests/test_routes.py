@@ -1,3 +1,6 @@
+import pytest
+
+
 class TestOperatorRoutes:
 
     def test_create_operator(self, client):
@@ -36,6 +39,17 @@ class TestOperatorRoutes:
         assert len(data) >= 1
         assert "current_load" in data[0]
 
+    def test_list_operators_filters(self, client, test_operators):
+        inactive = client.get(
+            "/operators/", params={"is_active": False}
+        ).json()
+        page = client.get(
+            "/operators/", params={"after": test_operators[0].id, "limit": 1}
+        ).json()
+
+        assert [op["id"] for op in inactive] == [test_operators[2].id]
+        assert [op["id"] for op in page] == [test_operators[1].id]
+
     def test_get_operator(self, client, test_operator):
         response = client.get(f"/operators/{test_operator.id}")
 
@@ -74,6 +88,31 @@ class TestOperatorRoutes:
         assert data["max_load"] == 25
         assert data["is_active"] == test_operator.is_active
 
+    def test_deactivate_operator_with_reassign(
+        self, client, test_source_with_weights, test_operators
+    ):
+        for i in range(6):
+            client.post(
+                "/appeals/", json={
+                    "lead_external_id": f"reassign_{i}",
+                    "source_id": test_source_with_weights.id
+                }
+            )
+        # The other operator has room for all six appeals
+        operator_id = test_operators[0].id
+
+        response = client.patch(
+            f"/operators/{operator_id}?reassign=true",
+            json={"is_active": False}
+        )
+
+        assert response.status_code == 200
+        loads = {
+            o["id"]: o["current_load"] for o in client.get("/operators/").json()
+        }
+        assert loads[operator_id] == 0
+        assert sum(loads.values()) == 6
+
 
 class TestSourceRoutes:
 
@@ -125,6 +164,18 @@ class TestSourceRoutes:
 
         assert response.status_code == 404
 
+    def test_configure_weights_duplicate_operator(
+        self, client, test_source, test_operator
+    ):
+        response = client.post(
+            f"/sources/{test_source.id}/weights", json=[
+                {"operator_id": test_operator.id, "weight": 10},
+                {"operator_id": test_operator.id, "weight": 30}
+            ]
+        )
+
+        assert response.status_code == 422
+
     def test_get_weights(self, client, test_source_with_weights):
         response = client.get(
             f"/sources/{test_source_with_weights.id}/weights"
@@ -197,6 +248,72 @@ class TestAppealRoutes:
         data = response.json()
         assert data["operator"] is None
 
+    def test_create_appeals_batch(self, client, test_source_with_weights):
+        response = client.post(
+            "/appeals/batch", json=[
+                {
+                    "lead_external_id": "batch_lead_1",
+                    "source_id": test_source_with_weights.id
+                },
+                {"lead_external_id": "batch_lead_2", "source_id": 9999},
+                {
+                    "lead_external_id": "batch_lead_1",
+                    "source_id": test_source_with_weights.id,
+                    "message": "Again"
+                },
+            ]
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["status"] for item in data] == [
+            "created", "error", "created"
+        ]
+        assert data[0]["appeal"]["lead_id"] == data[2]["appeal"]["lead_id"]
+        assert "not found" in data[1]["error"]
+
+    def test_create_appeals_batch_too_large(
+        self, client, test_source_with_weights
+    ):
+        from app.config import settings
+        item = {
+            "lead_external_id": "batch_lead",
+            "source_id": test_source_with_weights.id
+        }
+
+        response = client.post(
+            "/appeals/batch",
+            json=[item] * (settings.APPEAL_BATCH_MAX_SIZE + 1)
+        )
+
+        assert response.status_code == 422
+
+    def test_import_appeals(self, client, test_source_with_weights):
+        import json
+        body = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "lead_external_id": f"import_{i}",
+                        "source_id": test_source_with_weights.id
+                    }
+                )
+                for i in range(3)
+            ] + ['{"lead_external_id": "broken"}']
+        )
+
+        response = client.post(
+            "/appeals/import?chunk_size=2", content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [e["line"] for e in events if e["type"] == "error"] == [4]
+        assert events[-1] == {
+            "type": "summary", "processed": 4, "created": 3, "failed": 1
+        }
+
     def test_close_appeal(self, client, test_lead, test_source, test_operator):
         create_response = client.post(
             "/appeals/", json={
@@ -222,9 +339,32 @@ class TestAppealRoutes:
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) >= 1
-        assert "appeals_count" in data[0]
+        assert isinstance(data["items"], list)
+        assert len(data["items"]) >= 1
+        assert "appeals_count" in data["items"][0]
+        assert data["next_cursor"] is None
+
+    def test_list_leads_pagination(self, client, test_db):
+        from app.models import Lead
+        test_db.add_all([Lead(external_id=f"page_{i}") for i in range(5)])
+        test_db.commit()
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor is not None:
+                params["after"] = cursor
+            data = client.get("/appeals/leads", params=params).json()
+            seen.extend(lead["external_id"] for lead in data["items"])
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [f"page_{i}" for i in range(5)]
+        assert pages == 3
 
     def test_get_lead_appeals(
         self, client, test_lead, test_source, test_operator
@@ -241,9 +381,55 @@ class TestAppealRoutes:
 
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
-        assert len(data) >= 1
-        assert "source" in data[0]
+        assert len(data["items"]) >= 1
+        assert "source" in data["items"][0]
+        assert data["next_cursor"] is None
+
+    def test_get_lead_appeals_pages_and_status(
+        self, client, test_lead, test_source_with_weights
+    ):
+        test_source = test_source_with_weights
+        ids = [
+            client.post(
+                "/appeals/", json={
+                    "lead_external_id": test_lead.external_id,
+                    "source_id": test_source.id
+                }
+            ).json()["appeal_id"]
+            for _ in range(5)
+        ]
+        client.patch(f"/appeals/{ids[0]}/close")
+        url = f"/appeals/leads/{test_lead.id}/appeals"
+
+        first = client.get(url, params={"limit": 2}).json()
+        second = client.get(
+            url, params={"limit": 2, "after": first["next_cursor"]}
+        ).json()
+        closed = client.get(url, params={"status": "closed"}).json()
+
+        assert [a["id"] for a in first["items"]] == ids[:2]
+        assert [a["id"] for a in second["items"]] == ids[2:4]
+        assert first["items"][0]["source"] == test_source.name
+        assert first["items"][0]["operator"] in ("Operator 1", "Operator 2")
+        assert [a["id"] for a in closed["items"]] == [ids[0]]
+
+    def test_get_lead_appeals_statement_count_is_constant(
+        self, client, test_lead, test_source, test_operators
+    ):
+        url = f"/appeals/leads/{test_lead.id}/appeals"
+        for count in (1, 50):
+            client.post(
+                "/appeals/batch", json=[
+                    {
+                        "lead_external_id": test_lead.external_id,
+                        "source_id": test_source.id
+                    }
+                ] * count
+            )
+            response = client.get(url)
+
+            # the lead and the page with source and operator names
+            assert 'desc="2 statements"' in response.headers["Server-Timing"]
 
     def test_get_lead_appeals_not_found(self, client):
         response = client.get("/appeals/leads/9999/appeals")
@@ -271,6 +457,40 @@ class TestStatsRoutes:
         data = response.json()
         assert isinstance(data, list)
 
+    def test_get_distribution_stats_bucketed(
+        self, client, test_source_with_weights
+    ):
+        client.post(
+            "/appeals/", json={
+                "lead_external_id": "bucketed_lead",
+                "source_id": test_source_with_weights.id
+            }
+        )
+
+        response = client.get(
+            "/stats/distribution",
+            params={"from": "2000-01-01T00:00:00Z", "bucket": "day"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["sources"][0]["source_id"] == \
+            test_source_with_weights.id
+        assert data[0]["sources"][0]["total_appeals"] == 1
+
+    def test_get_distribution_stats_invalid_range(self, client):
+        response = client.get(
+            "/stats/distribution",
+            params={"from": "2026-01-02T00:00:00", "to": "2026-01-01T00:00:00"}
+        )
+        invalid_bucket = client.get(
+            "/stats/distribution", params={"bucket": "month"}
+        )
+
+        assert response.status_code == 422
+        assert invalid_bucket.status_code == 422
+
     def test_get_available_operators(self, client, test_source_with_weights):
         response = client.get(
             f"/stats/sources/{test_source_with_weights.id}/operators"
@@ -290,6 +510,103 @@ class TestStatsRoutes:
             assert "is_available" in op
 
 
+    def test_get_pool_stats(self, client):
+        response = client.get("/stats/pool")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert isinstance(data["pid"], int)
+        assert "class" in data["pools"]["sync"]
+
+    def test_pool_stats_report_checkouts_and_timeouts(
+        self, client, tmp_path, monkeypatch
+    ):
+        import pytest
+        from sqlalchemy import create_engine, exc
+        from app import database
+
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=database.TimedQueuePool,
+            pool_size=1, max_overflow=0, pool_timeout=0.05
+        )
+        monkeypatch.setattr(database, "engine", engine)
+
+        held = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        pool = client.get("/stats/pool").json()["pools"]["sync"]
+        held.close()
+        engine.dispose()
+
+        assert pool["class"] == "TimedQueuePool"
+        assert pool["size"] == 1
+        assert pool["checked_out"] == 1
+        assert pool["checkouts"] == 1
+        assert pool["timeouts"] == 1
+        assert pool["wait_ms_histogram"]["+Inf"] == 1
+
+
+class TestQueryStats:
+
+    def test_server_timing_header(self, client, test_operators):
+        response = client.get("/operators/")
+
+        # the ETag versions and the list
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        assert 'desc="2 statements"' in timing
+        assert "db-slowest;dur=" in timing
+
+    def test_stats_aggregate_per_route(self, client, test_operators):
+        for operator in test_operators:
+            client.get(f"/operators/{operator.id}")
+        client.get("/operators/")
+
+        routes = {
+            r["route"]: r for r in client.get("/stats/queries").json()["routes"]
+        }
+
+        # one read per operator, plus the config version poll of the
+        # first request
+        by_id = routes["GET /operators/{operator_id}"]
+        assert by_id["requests"] == 3
+        assert by_id["statements"] == 4
+        assert by_id["max_statements"] == 2
+        assert by_id["slowest_statement"].startswith("SELECT")
+        assert routes["GET /operators/"]["requests"] == 1
+
+    def test_slow_queries_are_logged_with_route(
+        self, client, test_operator, monkeypatch, caplog
+    ):
+        from app.config import settings
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+
+        with caplog.at_level("WARNING", logger="app.sql"):
+            client.get(f"/operators/{test_operator.id}")
+
+        messages = [r.getMessage() for r in caplog.records]
+        assert any(
+            "GET /operators/{operator_id}" in m and "SELECT" in m
+            and f"({test_operator.id}," in m
+            for m in messages
+        )
+
+    def test_slow_executemany_logs_first_parameter_sets(self):
+        from app.middleware import _loggable_parameters
+
+        logged = _loggable_parameters([(i,) for i in range(1000)], True)
+
+        assert logged == "[(0,), (1,), (2,), ...] (1000 sets)"
+        assert _loggable_parameters((1, 2), False) == "(1, 2)"
+
+    def test_empty_slow_query_ms_disables_log(self, monkeypatch):
+        from app.config import Settings
+        monkeypatch.setenv("SLOW_QUERY_MS", "")
+
+        assert Settings().SLOW_QUERY_MS is None
+
+
 class TestRootRoutes:
 
     def test_root(self, client):
@@ -415,3 +732,479 @@ class TestEndToEndScenario:
 
         assert op1_count <= 2
         assert op2_count >= 8
+
+
+class TestAsyncDatabaseStack:
+
+    def test_appeal_flow(self, async_client):
+        operator = async_client.post(
+            "/operators/", json={"name": "Async", "max_load": 1}
+        ).json()
+        source = async_client.post(
+            "/sources/", json={"name": "Async Source"}
+        ).json()
+        response = async_client.post(
+            f"/sources/{source['id']}/weights",
+            json=[{"operator_id": operator["id"], "weight": 1}]
+        )
+        assert response.status_code == 200
+
+        first = async_client.post(
+            "/appeals/", json={
+                "lead_external_id": "async_lead",
+                "source_id": source["id"]
+            }
+        )
+        second = async_client.post(
+            "/appeals/", json={
+                "lead_external_id": "async_lead",
+                "source_id": source["id"]
+            }
+        )
+
+        assert first.status_code == 201
+        assert first.json()["operator"]["id"] == operator["id"]
+        assert second.json()["operator"] is None
+
+        appeals = async_client.get(
+            f"/appeals/leads/{first.json()['lead_id']}/appeals"
+        ).json()["items"]
+        assert [a["operator"] for a in appeals] == ["Async", None]
+
+        operators = async_client.get("/operators/").json()
+        assert operators[0]["current_load"] == 1
+
+        stats = async_client.get("/stats/distribution").json()
+        assert stats[0]["total_appeals"] == 2
+
+        response = async_client.patch(
+            f"/appeals/{first.json()['appeal_id']}/close"
+        )
+        assert response.status_code == 200
+        # The freed slot went to the waiting second appeal
+        assert async_client.get("/operators/").json()[0]["current_load"] == 1
+
+    def test_concurrent_requests_warm_the_ledger(
+        self, async_client, monkeypatch
+    ):
+        import asyncio
+        import httpx
+        from app.state import load_ledger
+
+        operator = async_client.post(
+            "/operators/", json={"name": "Async", "max_load": 100}
+        ).json()
+        source = async_client.post(
+            "/sources/", json={"name": "Async Source"}
+        ).json()
+        async_client.post(
+            f"/sources/{source['id']}/weights",
+            json=[{"operator_id": operator["id"], "weight": 1}]
+        )
+
+        async def create_concurrently(count):
+            transport = httpx.ASGITransport(app=async_client.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(*(
+                    client.post(
+                        "/appeals/", json={
+                            "lead_external_id": f"lead_{i}",
+                            "source_id": source["id"]
+                        }
+                    )
+                    for i in range(count)
+                ))
+
+        def run(count):
+            # A blocked event loop would hang the portal call itself
+            future = async_client.portal.start_task_soon(
+                create_concurrently, count
+            )
+            return future.result(timeout=10)
+
+        load_ledger.reset()
+        cold = run(5)
+        # Every read is stale; readers overlap a re-warm in flight
+        monkeypatch.setattr(load_ledger, "ttl", 0)
+        stale = run(5)
+
+        assert [r.status_code for r in cold + stale] == [201] * 10
+        assert async_client.get(
+            "/operators/"
+        ).json()[0]["current_load"] == 10
+
+    def test_not_found(self, async_client):
+        assert async_client.get("/operators/999").status_code == 404
+        assert async_client.get("/sources/999/weights").status_code == 404
+        assert async_client.patch("/appeals/999/close").status_code == 404
+
+    def test_import(self, async_client):
+        source = async_client.post(
+            "/sources/", json={"name": "Async Import"}
+        ).json()
+        body = "\n".join(
+            f'{{"lead_external_id": "l{i}", "source_id": {source["id"]}}}'
+            for i in range(5)
+        )
+
+        response = async_client.post(
+            "/appeals/import?chunk_size=2", content=body
+        )
+
+        summary = [
+            line for line in response.text.splitlines() if "summary" in line
+        ]
+        assert '"created": 5' in summary[0]
+
+
+class TestMetrics:
+
+    def test_metrics_count_created_appeals(
+        self, client, test_source_with_weights, test_source
+    ):
+        source_id = test_source_with_weights.id
+        client.post(
+            "/appeals/",
+            json={"lead_external_id": "metrics_1", "source_id": source_id}
+        )
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(
+            "text/plain; version=0.0.4"
+        )
+        text = response.text
+        assert "# TYPE crm_appeals_created_total counter" in text
+        assert f'crm_appeals_created_total{{source_id="{source_id}"}} 1' \
+            in text
+        assert "crm_operator_selection_seconds_count 1" in text
+        assert (
+            'crm_http_requests_total{method="POST",route="/appeals/",'
+            'status="201"} 1'
+        ) in text
+        assert (
+            'crm_http_request_duration_seconds_bucket{method="POST",'
+            'route="/appeals/",le="+Inf"} 1'
+        ) in text
+
+    def test_metrics_report_operator_utilization(
+        self, client, test_source_with_weights, test_operators
+    ):
+        for i in range(2):
+            client.post(
+                "/appeals/",
+                json={
+                    "lead_external_id": f"metrics_{i}",
+                    "source_id": test_source_with_weights.id
+                }
+            )
+
+        text = client.get("/metrics").text
+
+        loads = {
+            line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines()
+            if line.startswith("crm_operator_active_load{")
+        }
+        assert sum(loads.values()) == 2
+        assert "# TYPE crm_operator_utilization gauge" in text
+        operator = test_operators[2]
+        assert (
+            f'crm_operator_active{{operator_id="{operator.id}",'
+            f'operator="{operator.name}"}} 0'
+        ) in text
+
+    def test_metrics_report_waiting_appeals_and_pool(
+        self, client, test_source
+    ):
+        client.post(
+            "/appeals/",
+            json={"lead_external_id": "nobody", "source_id": test_source.id}
+        )
+
+        text = client.get("/metrics").text
+
+        assert f'crm_appeals_waiting{{source_id="{test_source.id}"}} 1' \
+            in text
+        assert f'crm_appeals_unassigned_total{{source_id="{test_source.id}"}}'\
+            ' 1' in text
+
+    def test_metrics_report_pool(self, client, tmp_path, monkeypatch):
+        from sqlalchemy import create_engine
+        from app import database
+
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=database.TimedQueuePool, pool_size=2
+        )
+        monkeypatch.setattr(database, "engine", engine)
+        engine.connect().close()
+
+        text = client.get("/metrics").text
+        engine.dispose()
+
+        assert 'crm_db_pool_size{pool="sync"} 2' in text
+        assert 'crm_db_pool_checkouts_total{pool="sync"} 1' in text
+        assert 'crm_db_pool_wait_seconds_bucket{pool="sync",le="5.0"} 1' \
+            in text
+        assert 'crm_db_pool_wait_seconds_bucket{pool="sync",le="+Inf"} 1' \
+            in text
+
+
+class TestConditionalGet:
+
+    def test_not_modified_skips_the_handler(self, client, test_operators):
+        first = client.get("/operators/")
+        etag = first.headers["ETag"]
+
+        response = client.get("/operators/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert 'desc="1 statements"' in response.headers["Server-Timing"]
+
+    def test_weak_and_listed_tags_match(self, client, test_source):
+        etag = client.get("/sources/").headers["ETag"]
+
+        for header in (f"W/{etag}", f'"other", {etag}', "*"):
+            response = client.get(
+                "/sources/", headers={"If-None-Match": header}
+            )
+            assert response.status_code == 304
+
+        response = client.get("/sources/", headers={"If-None-Match": '"x"'})
+        assert response.status_code == 200
+
+    def test_appeal_changes_data_tags_only(
+        self, client, test_source_with_weights
+    ):
+        source_id = test_source_with_weights.id
+        paths = (
+            "/operators/", "/stats/distribution", "/sources/",
+            f"/sources/{source_id}/weights",
+        )
+        before = {path: client.get(path).headers["ETag"] for path in paths}
+
+        client.post(
+            "/appeals/",
+            json={"lead_external_id": "etag", "source_id": source_id}
+        )
+        after = {path: client.get(path).headers["ETag"] for path in paths}
+
+        assert after["/operators/"] != before["/operators/"]
+        assert after["/stats/distribution"] != before["/stats/distribution"]
+        assert after["/sources/"] == before["/sources/"]
+        assert after[f"/sources/{source_id}/weights"] == \
+            before[f"/sources/{source_id}/weights"]
+
+    def test_config_change_changes_tags(
+        self, client, test_source_with_weights, test_operators
+    ):
+        source_id = test_source_with_weights.id
+        path = f"/sources/{source_id}/weights"
+        etag = client.get(path).headers["ETag"]
+
+        client.post(
+            f"/sources/{source_id}/weights",
+            json=[{"operator_id": test_operators[0].id, "weight": 5}]
+        )
+        response = client.get(path, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == 1
+
+    def test_closing_an_appeal_changes_operator_tags(
+        self, client, test_source_with_weights
+    ):
+        appeal = client.post(
+            "/appeals/",
+            json={
+                "lead_external_id": "etag_close",
+                "source_id": test_source_with_weights.id
+            }
+        ).json()
+        etag = client.get("/operators/").headers["ETag"]
+
+        response = client.patch(f"/appeals/{appeal['appeal_id']}/close")
+        assert response.status_code == 200
+
+        assert client.get("/operators/").headers["ETag"] != etag
+
+
+class TestFastJSONResponses:
+    """The fast path must produce the exact bytes of the validated
+    ``response_model`` path."""
+
+    NAMES = ["Оператор 1", 'quote " and \\ slash', "tab\tnew\nline\x1f",
+             "emoji 🚀  "]
+
+    @pytest.fixture
+    def rows(self, test_db):
+        from app.models import Lead, Operator
+        for i, name in enumerate(self.NAMES):
+            test_db.add(
+                Operator(name=name, is_active=i % 2 == 0, max_load=i + 1)
+            )
+            test_db.add(
+                Lead(
+                    external_id=f"golden_{i}", name=name,
+                    phone=None if i % 2 else "+7 700 000 00 00",
+                    email=None
+                )
+            )
+        test_db.commit()
+
+    def _both(self, client, monkeypatch, path):
+        from app.config import settings
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+        validated = client.get(path)
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+        fast = client.get(path)
+        assert validated.status_code == fast.status_code == 200
+        return validated, fast
+
+    @pytest.mark.parametrize(
+        "path", ["/operators/", "/operators/?limit=2&after=1"]
+    )
+    def test_operators_golden(self, client, rows, monkeypatch, path):
+        validated, fast = self._both(client, monkeypatch, path)
+
+        assert fast.content == validated.content
+        assert fast.headers["content-type"] == \
+            validated.headers["content-type"]
+        assert fast.headers["ETag"] == validated.headers["ETag"]
+
+    @pytest.mark.parametrize(
+        "path", ["/appeals/leads", "/appeals/leads?limit=3"]
+    )
+    def test_leads_golden(self, client, rows, monkeypatch, path):
+        validated, fast = self._both(client, monkeypatch, path)
+
+        assert fast.content == validated.content
+        assert fast.headers["content-type"] == \
+            validated.headers["content-type"]
+
+    def test_stdlib_fallback_golden(self, client, rows, monkeypatch):
+        from app import responses
+        monkeypatch.setattr(responses, "orjson", None)
+
+        validated, fast = self._both(client, monkeypatch, "/operators/")
+
+        assert fast.content == validated.content
+
+
+class TestExport:
+
+    @pytest.fixture
+    def appeals(self, client, test_source_with_weights):
+        other = client.post("/sources/", json={"name": "Other"}).json()
+        created = [
+            client.post(
+                "/appeals/",
+                json={
+                    "lead_external_id": f"export_{i % 3}",
+                    "lead_name": "Имя, с запятой" if i == 0 else None,
+                    "source_id": (
+                        test_source_with_weights.id if i % 2 == 0
+                        else other["id"]
+                    ),
+                    "message": 'line\n"quoted"' if i == 0 else None
+                }
+            ).json()
+            for i in range(5)
+        ]
+        client.patch(f"/appeals/{created[1]['appeal_id']}/close")
+        return created, other
+
+    @staticmethod
+    def _csv(response):
+        import csv
+        import io
+        return list(csv.DictReader(io.StringIO(response.text)))
+
+    def test_export_appeals_csv(self, client, appeals):
+        created, _ = appeals
+
+        response = client.get("/export/appeals?chunk_size=2")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "appeals.csv" in response.headers["content-disposition"]
+        rows = self._csv(response)
+        assert [int(row["appeal_id"]) for row in rows] == [
+            appeal["appeal_id"] for appeal in created
+        ]
+        first = rows[0]
+        assert first["source"] == "Test Source"
+        assert first["lead_name"] == "Имя, с запятой"
+        assert first["message"] == 'line\n"quoted"'
+        assert first["lead_external_id"] == "export_0"
+        assert first["operator"] == created[0]["operator"]["name"]
+        assert rows[1]["status"] == "closed"
+        assert rows[1]["operator"] == ""
+
+    def test_export_appeals_filters(self, client, appeals):
+        created, other = appeals
+
+        by_source = self._csv(
+            client.get(f"/export/appeals?source_id={other['id']}")
+        )
+        closed = self._csv(client.get("/export/appeals?status=closed"))
+        future = self._csv(client.get("/export/appeals?from=2999-01-01"))
+
+        assert {row["source"] for row in by_source} == {"Other"}
+        assert len(by_source) == 2
+        assert [int(row["appeal_id"]) for row in closed] == [
+            created[1]["appeal_id"]
+        ]
+        assert future == []
+
+    def test_export_leads_csv(self, client, appeals):
+        _, other = appeals
+
+        all_leads = self._csv(client.get("/export/leads?chunk_size=1"))
+        filtered = self._csv(
+            client.get(f"/export/leads?source_id={other['id']}")
+        )
+
+        assert {row["external_id"]: int(row["appeals_count"])
+                for row in all_leads} == {
+            "export_0": 2, "export_1": 2, "export_2": 1
+        }
+        assert {row["external_id"]: int(row["appeals_count"])
+                for row in filtered} == {"export_0": 1, "export_1": 1}
+
+    def test_export_rejects_empty_range(self, client):
+        response = client.get(
+            "/export/appeals?from=2024-01-02&to=2024-01-01"
+        )
+
+        assert response.status_code == 422
+
+    def test_export_appeals_parquet(self, client, appeals):
+        pq = pytest.importorskip("pyarrow.parquet")
+        import io
+        created, _ = appeals
+
+        response = client.get("/export/appeals?format=parquet&chunk_size=2")
+
+        assert response.status_code == 200
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.column("appeal_id").to_pylist() == [
+            appeal["appeal_id"] for appeal in created
+        ]
+        assert pq.ParquetFile(io.BytesIO(response.content)) \
+            .metadata.num_row_groups == 3
+
+    def test_parquet_without_pyarrow(self, client, monkeypatch):
+        from app.services import export
+        monkeypatch.setattr(export, "pyarrow", None)
+
+        response = client.get("/export/appeals?format=parquet")
+
+        assert response.status_code == 501
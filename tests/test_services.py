@@ -1,7 +1,10 @@
 import pytest
 from app.services import DistributionService, AppealService
 from app.schemas.appeal import AppealCreate
+from app.schemas.operator import OperatorUpdate
+from app.schemas.source import WeightConfig
 from app.models import Appeal, OperatorWeight
+from app.state import AliasSampler
 
 
 class TestDistributionService:
@@ -180,6 +183,51 @@ class TestDistributionService:
         assert op1_info["is_available"] is True
 
 
+    def test_assign_operator_retries_when_reservation_fails(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        from app.models import Operator
+        service = DistributionService(test_db)
+        # Another worker filled operator 2; the local ledger still sees 0
+        test_db.query(Operator).filter(
+            Operator.id == test_operators[1].id
+        ).update({"active_load": test_operators[1].max_load})
+        test_db.commit()
+
+        assigned = [
+            service.assign_operator(test_source_with_weights.id)
+            for _ in range(test_operators[0].max_load + 1)
+        ]
+
+        assert assigned[:-1] == [test_operators[0].id] * \
+            test_operators[0].max_load
+        assert assigned[-1] is None
+        test_db.refresh(test_operators[0])
+        assert test_operators[0].active_load == test_operators[0].max_load
+
+    def test_assign_operators_reassigns_refused_items(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        from app.models import Operator
+        service = DistributionService(test_db)
+        test_db.query(Operator).filter(
+            Operator.id == test_operators[1].id
+        ).update({"active_load": test_operators[1].max_load - 1})
+        test_db.commit()
+
+        assigned = service.assign_operators(
+            [test_source_with_weights.id] * 10
+        )
+
+        # 5 free slots on operator 1 and one left on operator 2
+        assert assigned.count(test_operators[0].id) == 5
+        assert assigned.count(test_operators[1].id) == 1
+        assert assigned.count(None) == 4
+        test_db.expire_all()
+        for operator in test_operators[:2]:
+            assert operator.active_load == operator.max_load
+
+
 class TestAppealService:
 
     def test_create_appeal_new_lead(self, test_db, test_source_with_weights):
@@ -263,6 +311,147 @@ class TestAppealService:
         assert result1.lead_id == result2.lead_id
         assert result1.appeal_id != result2.appeal_id
 
+    def test_create_appeal_single_transaction(
+        self, test_db, test_lead, test_source_with_weights, query_counter
+    ):
+        from sqlalchemy import event
+        service = AppealService(test_db)
+        source_id = test_source_with_weights.id
+        external_id = test_lead.external_id
+        service.create_appeal(
+            AppealCreate(lead_external_id="warm_up", source_id=source_id)
+        )
+        commits = []
+
+        def count_commit(session):
+            commits.append(session)
+
+        event.listen(test_db, "after_commit", count_commit)
+        query_counter.clear()
+
+        result = service.create_appeal(
+            AppealCreate(lead_external_id=external_id, source_id=source_id)
+        )
+        existing_lead_statements = len(query_counter)
+        query_counter.clear()
+        service.create_appeal(
+            AppealCreate(lead_external_id="new_lead", source_id=source_id)
+        )
+        new_lead_statements = len(query_counter)
+
+        event.remove(test_db, "after_commit", count_commit)
+        # lead lookup, capacity reservation, appeal INSERT and the two
+        # distribution counter upserts
+        assert existing_lead_statements < 7
+        assert new_lead_statements <= 7
+        assert len(commits) == 2
+        assert result.operator is not None
+        assert result.operator["name"] is not None
+        assert result.created_at is not None
+
+    def test_create_appeal_invalid_source_creates_no_lead(self, test_db):
+        from fastapi import HTTPException
+        from app.repositories import LeadRepository
+        service = AppealService(test_db)
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_appeal(
+                AppealCreate(lead_external_id="orphan_lead", source_id=9999)
+            )
+
+        assert exc_info.value.status_code == 404
+        assert LeadRepository(test_db).get_all() == []
+
+    def test_create_appeals_batch(
+        self, test_db, test_lead, test_source_with_weights, test_operators
+    ):
+        service = AppealService(test_db)
+        source_id = test_source_with_weights.id
+        items = [
+            AppealCreate(lead_external_id=f"batch_{i % 4}", source_id=source_id)
+            for i in range(12)
+        ]
+        items.insert(3, AppealCreate(lead_external_id="x", source_id=9999))
+        items.append(
+            AppealCreate(
+                lead_external_id=test_lead.external_id, source_id=source_id
+            )
+        )
+
+        results = service.create_appeals(items)
+
+        assert [r.index for r in results] == list(range(len(items)))
+        assert results[3].status == "error"
+        assert results[3].appeal is None
+        created = [r.appeal for r in results if r.status == "created"]
+        assert len(created) == 13
+        assert len({a.lead_id for a in created}) == 5
+        assert created[-1].lead_id == test_lead.id
+        assert all(
+            a.lead_external_id == item.lead_external_id
+            for a, item in zip(
+                created, [i for i in items if i.source_id == source_id]
+            )
+        )
+
+    def test_create_appeals_batch_respects_capacity(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        service = AppealService(test_db)
+        source_id = test_source_with_weights.id
+        capacity = test_operators[0].max_load + test_operators[1].max_load
+
+        results = service.create_appeals(
+            [
+                AppealCreate(lead_external_id=f"cap_{i}", source_id=source_id)
+                for i in range(capacity + 5)
+            ]
+        )
+
+        operators = [r.appeal.operator for r in results]
+        assert sum(1 for op in operators if op is None) == 5
+        assert sum(
+            1 for op in operators if op and op["id"] == test_operators[0].id
+        ) == test_operators[0].max_load
+
+    def test_create_appeals_batch_statement_count(
+        self, test_db, test_engine, test_source_with_weights
+    ):
+        from sqlalchemy import event
+        service = AppealService(test_db)
+        source_id = test_source_with_weights.id
+        service.create_appeals(
+            [AppealCreate(lead_external_id="warm_up", source_id=source_id)]
+        )
+        executions = []
+
+        def count_execution(conn, clauseelement, *args):
+            executions.append(clauseelement)
+
+        # Counted per execute() call: SQLAlchemy sends one multi-row INSERT
+        # where the dialect can return rows in order (PostgreSQL) and falls
+        # back to a row per statement on SQLite.
+        event.listen(test_engine, "before_execute", count_execution)
+        try:
+            results = service.create_appeals(
+                [
+                    AppealCreate(
+                        lead_external_id=f"bulk_{i}", source_id=source_id
+                    )
+                    for i in range(50)
+                ]
+            )
+        finally:
+            event.remove(test_engine, "before_execute", count_execution)
+
+        # plus one capacity reservation per assigned operator; the source
+        # comes from the config cache
+        assigned = {
+            result.appeal.operator["id"] for result in results
+            if result.appeal.operator
+        }
+        assert len(executions) == 6 + len(assigned)
+
     def test_close_appeal(
         self, test_db, test_lead, test_source, test_operator
     ):
@@ -319,3 +508,505 @@ class TestDistributionFairness:
         assert 15 < count_op1 < 35
         assert 65 < count_op2 < 85
         assert count_op1 + count_op2 == 100
+
+
+class TestOperatorLoadLedger:
+
+    def test_select_operator_does_not_count_appeals(
+        self, test_db, test_source_with_weights, query_counter
+    ):
+        service = DistributionService(test_db)
+        service.select_operator(test_source_with_weights.id)
+        query_counter.clear()
+
+        service.select_operator(test_source_with_weights.id)
+
+        assert query_counter == []
+
+    def test_repository_updates_ledger(
+        self, test_db, test_lead, test_source, test_operator
+    ):
+        from app.repositories import AppealRepository
+        from app.state import load_ledger
+        load_ledger.warm(test_db)
+        repo = AppealRepository(test_db)
+
+        appeal = repo.create(
+            lead_id=test_lead.id,
+            source_id=test_source.id,
+            operator_id=test_operator.id
+        )
+        assert load_ledger.get_load(test_db, test_operator.id) == 1
+
+        repo.close(appeal.id)
+        repo.close(appeal.id)
+        assert load_ledger.get_load(test_db, test_operator.id) == 0
+
+    def test_rollback_discards_pending_load(
+        self, test_db, test_lead, test_source, test_operator
+    ):
+        from app.state import load_ledger
+        load_ledger.warm(test_db)
+        operator_id = test_operator.id
+
+        test_db.add(
+            Appeal(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=operator_id
+            )
+        )
+        load_ledger.track(test_db, operator_id, 1)
+        test_db.rollback()
+
+        assert not test_db.info.get("on_commit_callbacks")
+        assert load_ledger.get_load(test_db, operator_id) == 0
+
+
+    def test_delta_committed_during_warm_is_kept(
+        self, test_db, test_engine, test_operator
+    ):
+        from sqlalchemy import event
+        from app.state import OperatorLoadLedger
+        ledger = OperatorLoadLedger()
+        operator_id = test_operator.id
+
+        def commit_during_warm(conn, cursor, statement, *args):
+            if "GROUP BY" in statement:
+                ledger._apply(operator_id, 1)
+
+        event.listen(test_engine, "before_cursor_execute", commit_during_warm)
+        try:
+            ledger.warm(test_db)
+        finally:
+            event.remove(
+                test_engine, "before_cursor_execute", commit_during_warm
+            )
+
+        assert ledger.get_load(test_db, operator_id) == 1
+
+    def test_rewarm_picks_up_external_changes(
+        self, test_db, test_lead, test_source, test_operator
+    ):
+        from app.state import OperatorLoadLedger
+        ledger = OperatorLoadLedger()
+        operator_id = test_operator.id
+        assert ledger.get_load(test_db, operator_id) == 0
+
+        test_db.add(
+            Appeal(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=operator_id
+            )
+        )
+        test_db.commit()
+        assert ledger.get_load(test_db, operator_id) == 0
+
+        ledger.invalidate()
+        assert ledger.get_load(test_db, operator_id) == 1
+
+    def test_rewarm_after_ttl(
+        self, test_db, test_lead, test_source, test_operator
+    ):
+        from app.state import OperatorLoadLedger
+        ledger = OperatorLoadLedger(ttl=0)
+        operator_id = test_operator.id
+        assert ledger.get_load(test_db, operator_id) == 0
+
+        test_db.add(
+            Appeal(
+                lead_id=test_lead.id,
+                source_id=test_source.id,
+                operator_id=operator_id
+            )
+        )
+        test_db.commit()
+
+        assert ledger.get_load(test_db, operator_id) == 1
+
+
+class TestAliasSampler:
+
+    def test_empty_sampler(self):
+        sampler = AliasSampler([])
+
+        assert sampler.draw(lambda operator_id: True) is None
+
+    def test_draw_follows_weights(self):
+        sampler = AliasSampler([(1, 10, 5), (2, 30, 5)])
+
+        draws = [sampler.draw(lambda operator_id: True) for _ in range(4000)]
+
+        assert 800 < draws.count(1) < 1200
+        assert draws.count(1) + draws.count(2) == 4000
+
+    def test_draw_skips_operators_at_capacity(self):
+        sampler = AliasSampler([(1, 99, 5), (2, 1, 5)])
+
+        for _ in range(50):
+            assert sampler.draw(lambda operator_id: operator_id == 2) == 2
+
+    def test_draw_all_at_capacity(self):
+        sampler = AliasSampler([(1, 10, 5), (2, 30, 5)])
+
+        assert sampler.draw(lambda operator_id: False) is None
+
+    def test_rebuilt_after_configure_weights(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        from app.repositories import SourceRepository
+        service = DistributionService(test_db)
+        service.select_operator(test_source_with_weights.id)
+
+        SourceRepository(test_db).configure_weights(
+            test_source_with_weights.id,
+            [WeightConfig(operator_id=test_operators[1].id, weight=1)]
+        )
+
+        for _ in range(10):
+            operator_id = service.select_operator(test_source_with_weights.id)
+            assert operator_id == test_operators[1].id
+
+    def test_rebuilt_after_change_from_another_worker(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        from sqlalchemy.orm import Session
+        from app.state import SamplerRegistry
+        from app.state.config_version import bump_config_version
+        registry = SamplerRegistry(poll_interval=0)
+        source_id = test_source_with_weights.id
+        operator_id = test_operators[1].id
+        assert len(registry.get(test_db, source_id)) == 2
+
+        other = Session(bind=test_db.get_bind())
+        other.query(OperatorWeight).filter(
+            OperatorWeight.source_id == source_id,
+            OperatorWeight.operator_id != operator_id
+        ).delete()
+        bump_config_version(other)
+        other.commit()
+        other.close()
+
+        assert registry.get(test_db, source_id).operator_ids == [operator_id]
+
+    def test_rebuilt_after_operator_update(
+        self, test_db, test_source_with_weights, test_operators
+    ):
+        from app.repositories import OperatorRepository
+        service = DistributionService(test_db)
+        service.select_operator(test_source_with_weights.id)
+
+        OperatorRepository(test_db).update(
+            test_operators[1].id, OperatorUpdate(is_active=False)
+        )
+
+        for _ in range(10):
+            operator_id = service.select_operator(test_source_with_weights.id)
+            assert operator_id == test_operators[0].id
+
+
+class TestReassignAppeals:
+
+    def _assign(self, test_db, source_id, operator_id, count, lead_id):
+        from app.repositories import AppealRepository, OperatorRepository
+        OperatorRepository(test_db).reserve(operator_id, count)
+        repo = AppealRepository(test_db)
+        return [
+            repo.create(
+                lead_id=lead_id, source_id=source_id, operator_id=operator_id
+            ).id
+            for _ in range(count)
+        ]
+
+    def _operators_of(self, test_db, appeal_ids):
+        test_db.expire_all()
+        return [test_db.get(Appeal, appeal_id).operator_id
+                for appeal_id in appeal_ids]
+
+    def test_deactivated_operator_appeals_move_in_chunks(
+        self, test_db, test_source_with_weights, test_operators, test_lead,
+        query_counter
+    ):
+        from app.repositories import (
+            DistributionCounterRepository,
+            OperatorRepository,
+        )
+        first, second = test_operators[0], test_operators[1]
+        appeal_ids = self._assign(
+            test_db, test_source_with_weights.id, first.id, 5, test_lead.id
+        )
+        OperatorRepository(test_db).update(
+            first.id, OperatorUpdate(is_active=False)
+        )
+        query_counter.clear()
+
+        moved = DistributionService(test_db).reassign_appeals(
+            first.id, chunk_size=2
+        )
+
+        assert moved == 5
+        assert self._operators_of(test_db, appeal_ids) == [second.id] * 5
+        assert sum("UPDATE appeals" in q for q in query_counter) == 3
+        test_db.refresh(first)
+        test_db.refresh(second)
+        assert first.active_load == 0
+        assert second.active_load == 5
+        assert DistributionCounterRepository(test_db).reconcile() == []
+
+    def test_lowered_max_load_moves_newest_appeals(
+        self, test_db, test_source_with_weights, test_operators, test_lead
+    ):
+        from app.repositories import OperatorRepository
+        first, second = test_operators[0], test_operators[1]
+        appeal_ids = self._assign(
+            test_db, test_source_with_weights.id, first.id, 5, test_lead.id
+        )
+        OperatorRepository(test_db).update(
+            first.id, OperatorUpdate(max_load=2)
+        )
+
+        moved = DistributionService(test_db).reassign_appeals(first.id)
+
+        assert moved == 3
+        assert self._operators_of(test_db, appeal_ids) == (
+            [first.id] * 2 + [second.id] * 3
+        )
+
+    def test_appeals_without_capacity_go_back_to_queue(
+        self, test_db, test_source_with_weights, test_operators, test_lead
+    ):
+        from app.repositories import (
+            DistributionCounterRepository,
+            OperatorRepository,
+        )
+        first, second = test_operators[0], test_operators[1]
+        operators = OperatorRepository(test_db)
+        operators.update(second.id, OperatorUpdate(max_load=1))
+        appeal_ids = self._assign(
+            test_db, test_source_with_weights.id, first.id, 3, test_lead.id
+        )
+        operators.update(first.id, OperatorUpdate(is_active=False))
+
+        DistributionService(test_db).reassign_appeals(first.id)
+
+        operator_ids = self._operators_of(test_db, appeal_ids)
+        assert operator_ids.count(second.id) == 1
+        assert operator_ids.count(None) == 2
+        assert DistributionCounterRepository(test_db).reconcile() == []
+
+
+class TestAppealImporter:
+
+    def test_run_reports_progress_and_errors(
+        self, test_db, test_source_with_weights
+    ):
+        import io
+        import json
+        from app.services.appeal_import import AppealImporter
+        source_id = test_source_with_weights.id
+        lines = [
+            json.dumps({"lead_external_id": f"imp_{i}", "source_id": source_id})
+            for i in range(5)
+        ]
+        lines.insert(2, "{not json")
+        lines.insert(4, "")
+        lines.append(json.dumps({"lead_external_id": "x", "source_id": 9999}))
+
+        stream = io.BytesIO("\n".join(lines).encode())
+
+        events = list(AppealImporter(test_db, chunk_size=3).run(stream))
+
+        errors = [e for e in events if e["type"] == "error"]
+        assert [e["line"] for e in errors] == [3, 8]
+        assert sum(1 for e in events if e["type"] == "progress") == 3
+        assert events[-1] == {
+            "type": "summary", "processed": 7, "created": 5, "failed": 2
+        }
+
+    def test_database_error_is_logged_not_sent(
+        self, test_db, test_source_with_weights, monkeypatch, caplog
+    ):
+        import json
+        from sqlalchemy.exc import OperationalError
+        from app.services.appeal_import import AppealImporter, CHUNK_FAILED
+        importer = AppealImporter(test_db)
+
+        def fail(items):
+            raise OperationalError("INSERT INTO leads ...", ("secret",), None)
+
+        monkeypatch.setattr(importer.service, "create_appeals", fail)
+        line = json.dumps(
+            {"lead_external_id": "a", "source_id": test_source_with_weights.id}
+        )
+
+        with caplog.at_level("ERROR", logger="app.import"):
+            events = importer.process_chunk([(1, line), (2, line)])
+
+        assert [e["error"] for e in events[:2]] == [CHUNK_FAILED] * 2
+        assert "secret" not in json.dumps(events)
+        assert "INSERT INTO leads" in caplog.text
+
+    def test_line_chunks_skip_long_lines(self):
+        import io
+        from app.services import appeal_import
+        stream = io.BytesIO(
+            b"first\n" + b"x" * (3 * appeal_import.MAX_LINE_BYTES)
+            + b"\nlast"
+        )
+
+        chunks = list(appeal_import.iter_line_chunks(stream, chunk_size=2))
+
+        assert chunks == [[(1, "first"), (2, None)], [(3, "last")]]
+
+    def test_ndjson_chunks_drop_long_lines(self):
+        import asyncio
+        from app.services import appeal_import
+
+        async def stream():
+            yield b'{"a": 1}\n{"b"'
+            yield b": 2}\n" + b"x" * (appeal_import.MAX_LINE_BYTES + 1)
+            yield b"xxx\nlast"
+
+        async def collect():
+            return [
+                chunk async for chunk in
+                appeal_import.iter_ndjson_chunks(stream(), chunk_size=2)
+            ]
+
+        chunks = asyncio.run(collect())
+
+        assert chunks == [
+            [(1, '{"a": 1}'), (2, '{"b": 2}')],
+            [(3, None), (4, "last")],
+        ]
+
+
+@pytest.mark.stress
+class TestCapacityUnderConcurrency:
+
+    def test_parallel_creates_never_exceed_max_load(self, tmp_path):
+        import os
+        import random
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from sqlalchemy import create_engine, event, func
+        from sqlalchemy.orm import sessionmaker
+        from app.models import Base, Operator, Source
+
+        appeals = int(os.environ.get("STRESS_APPEALS", "2000"))
+        threads = int(os.environ.get("STRESS_THREADS", "32"))
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'stress.db'}",
+            connect_args={"check_same_thread": False, "timeout": 60},
+            pool_size=threads
+        )
+
+        @event.listens_for(engine, "connect")
+        def set_pragmas(connection, record):
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with Session() as db:
+            operators = [
+                Operator(name=f"Stress {i}", max_load=random.randint(2, 6))
+                for i in range(10)
+            ]
+            sources = [Source(name=f"Stress source {i}") for i in range(3)]
+            db.add_all(operators + sources)
+            db.flush()
+            db.add_all(
+                [
+                    OperatorWeight(
+                        operator_id=operator.id,
+                        source_id=source.id,
+                        weight=random.randint(1, 50)
+                    )
+                    for source in sources for operator in operators
+                ]
+            )
+            db.commit()
+            max_loads = {operator.id: operator.max_load for operator in operators}
+            source_ids = [source.id for source in sources]
+
+        overshoots = []
+        lock = threading.Lock()
+
+        def create(i):
+            with Session() as db:
+                service = AppealService(db)
+                result = service.create_appeal(
+                    AppealCreate(
+                        lead_external_id=f"stress_{i % 500}",
+                        source_id=random.choice(source_ids)
+                    )
+                )
+                if not result.operator:
+                    return
+                operator_id = result.operator["id"]
+                active = db.query(func.count(Appeal.id)).filter(
+                    Appeal.operator_id == operator_id,
+                    Appeal.status == "active"
+                ).scalar()
+                if active > max_loads[operator_id]:
+                    with lock:
+                        overshoots.append((operator_id, active))
+                # Free capacity again for most appeals so that operators
+                # keep hitting their limit throughout the run
+                if i % 4:
+                    service.close_appeal(result.appeal_id)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(create, range(appeals)))
+        elapsed = time.perf_counter() - start
+
+        with Session() as db:
+            active = dict(
+                db.query(Appeal.operator_id, func.count(Appeal.id)).filter(
+                    Appeal.operator_id.isnot(None),
+                    Appeal.status == "active"
+                ).group_by(Appeal.operator_id).all()
+            )
+            active_loads = dict(db.query(Operator.id, Operator.active_load))
+        engine.dispose()
+
+        print(
+            f"\n{appeals} appeals on {threads} threads: "
+            f"{appeals / elapsed:,.0f} appeals/s"
+        )
+        assert overshoots == []
+        for operator_id, max_load in max_loads.items():
+            assert active.get(operator_id, 0) <= max_load
+            assert active_loads[operator_id] == active.get(operator_id, 0)
+
+
+class TestSimulation:
+
+    def test_simulate_replays_stream_through_service(self):
+        import random
+        from benchmarks.simulate import check_gates, simulate, synthetic_stream
+
+        events = list(
+            synthetic_stream(200, 2, 50, 0.5, random.Random(1))
+        )
+        result = simulate(events, operators=4, sources=2, max_load=3)
+
+        closes = sum(e["type"] == "close" for e in events)
+        assert result["appeals"] == 200
+        assert result["events"] == 200 + closes
+        assert result["queries_per_appeal"] > 0
+        assert {s["source_id"] for s in result["shares"]} == {1, 2}
+        for source_id in (1, 2):
+            configured = sum(
+                s["configured"] for s in result["shares"]
+                if s["source_id"] == source_id
+            )
+            assert configured == pytest.approx(1.0)
+        assert check_gates(result, None, 0.5, None) == [
+            f"{result['queries_per_appeal']:.2f} queries per appeal > 0.5"
+        ]